@@ -0,0 +1,265 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+
+class ArmazemResultados:
+    """Armazena os resultados em SQLite, uma linha por gravação (somente inserção).
+
+    Cada gravação é um INSERT com commit sincronizado em disco, então o custo por
+    processo não depende de quantas linhas já existem e nada se perde num crash.
+    O xlsx é gerado à parte por `exportar_xlsx`, numa única passada.
+
+    As colunas ficam num registro persistente (tabela `colunas`, na ordem em que
+    apareceram) e cada linha guarda seus valores pelo id da coluna. Uma parte
+    nova ("Terceiro", "Perito - Advogados", ...) custa um INSERT no registro e
+    nada nas linhas já gravadas; o layout físico só é montado na exportação.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=FULL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resultados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                numero_processo TEXT NOT NULL,
+                gravado_em REAL NOT NULL,
+                dados TEXT NOT NULL
+            )
+            """
+        )
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resultados_processo ON resultados (numero_processo)"
+        )
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS colunas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL UNIQUE
+            )
+            """
+        )
+        self._conexao.commit()
+        self._ids_colunas: Dict[str, int] = {
+            nome: id_coluna
+            for id_coluna, nome in self._conexao.execute("SELECT id, nome FROM colunas")
+        }
+
+    def _id_coluna(self, nome: str) -> int:
+        """Id da coluna no registro, criando-a na primeira vez (chamar com o lock)."""
+        id_coluna = self._ids_colunas.get(nome)
+        if id_coluna is None:
+            cursor = self._conexao.execute("INSERT INTO colunas (nome) VALUES (?)", (nome,))
+            id_coluna = cursor.lastrowid
+            self._ids_colunas[nome] = id_coluna
+        return id_coluna
+
+    def _codificar(self, resultado: Dict) -> str:
+        return json.dumps(
+            {str(self._id_coluna(str(chave))): valor for chave, valor in resultado.items()},
+            ensure_ascii=False,
+            default=str,
+        )
+
+    def colunas_registradas(self) -> List[str]:
+        """Nomes de todas as colunas já vistas, na ordem de registro."""
+        with self._lock:
+            return [nome for nome, _ in sorted(self._ids_colunas.items(), key=lambda item: item[1])]
+
+    def gravar(self, resultado: Dict[str, str]):
+        """Acrescenta o resultado; gravações posteriores do mesmo processo prevalecem."""
+        with self._lock:
+            self._conexao.execute(
+                "INSERT INTO resultados (numero_processo, gravado_em, dados) VALUES (?, ?, ?)",
+                (
+                    str(resultado.get("numero_processo", "")),
+                    time.time(),
+                    self._codificar(resultado),
+                ),
+            )
+            self._conexao.commit()
+
+    def gravar_varios(self, resultados: List[Dict[str, str]]) -> int:
+        """Como `gravar`, mas com um único commit para o lote (reprocessamentos em massa)."""
+        with self._lock:
+            agora = time.time()
+            self._conexao.executemany(
+                "INSERT INTO resultados (numero_processo, gravado_em, dados) VALUES (?, ?, ?)",
+                [
+                    (str(resultado.get("numero_processo", "")), agora, self._codificar(resultado))
+                    for resultado in resultados
+                ],
+            )
+            self._conexao.commit()
+        return len(resultados)
+
+    def atualizar_campos(self, numero_processo: str, campos: Dict[str, str]) -> bool:
+        """Acrescenta uma nova versão da última linha do processo com `campos` alterados."""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT dados FROM resultados WHERE numero_processo = ? ORDER BY id DESC LIMIT 1",
+                (numero_processo,),
+            ).fetchone()
+            if linha is None:
+                return False
+            dados = json.loads(linha[0])
+            for chave, valor in campos.items():
+                dados[str(self._id_coluna(chave))] = valor
+            self._conexao.execute(
+                "INSERT INTO resultados (numero_processo, gravado_em, dados) VALUES (?, ?, ?)",
+                (numero_processo, time.time(), json.dumps(dados, ensure_ascii=False, default=str)),
+            )
+            self._conexao.commit()
+            return True
+
+    def total(self) -> int:
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT COUNT(DISTINCT numero_processo) FROM resultados"
+            ).fetchone()[0]
+
+    def gravados_em(self, status: Tuple[str, ...] = ("OK",)) -> Dict[str, float]:
+        """Quando foi gravada a última versão de cada processo, se ela tem um destes `status`."""
+        if "Status" not in self._ids_colunas:
+            return {}
+        id_status = str(self._ids_colunas["Status"])
+        conexao = sqlite3.connect(str(self.caminho))
+        try:
+            cursor = conexao.execute(
+                """
+                SELECT r.numero_processo, r.gravado_em, r.dados
+                FROM resultados r
+                JOIN (SELECT MAX(id) AS ultimo FROM resultados GROUP BY numero_processo) u ON r.id = u.ultimo
+                """
+            )
+            gravados = {}
+            for numero, gravado_em, dados in cursor:
+                if json.loads(dados).get(id_status) in status:
+                    gravados[numero] = gravado_em
+            return gravados
+        finally:
+            conexao.close()
+
+    def valores_da_coluna(self, coluna: str) -> Dict[str, str]:
+        """Valor de `coluna` na última versão de cada processo (processos sem ele ficam de fora)."""
+        if coluna not in self._ids_colunas:
+            return {}
+        id_coluna = str(self._ids_colunas[coluna])
+        conexao = sqlite3.connect(str(self.caminho))
+        try:
+            cursor = conexao.execute(
+                """
+                SELECT r.numero_processo, r.dados
+                FROM resultados r
+                JOIN (SELECT MAX(id) AS ultimo FROM resultados GROUP BY numero_processo) u ON r.id = u.ultimo
+                """
+            )
+            valores_coluna = {}
+            for numero, dados in cursor:
+                valor = json.loads(dados).get(id_coluna)
+                if valor:
+                    valores_coluna[numero] = valor
+            return valores_coluna
+        finally:
+            conexao.close()
+
+    def iterar_resultados(self) -> Iterator[Dict[str, str]]:
+        """Última versão de cada processo, na ordem em que o processo apareceu pela primeira vez."""
+        # Conexão própria de leitura: no modo WAL ela não bloqueia as gravações em curso
+        conexao = sqlite3.connect(str(self.caminho))
+        try:
+            nomes = dict(conexao.execute("SELECT id, nome FROM colunas"))
+            cursor = conexao.execute(
+                """
+                SELECT r.dados
+                FROM resultados r
+                JOIN (
+                    SELECT MIN(id) AS primeiro, MAX(id) AS ultimo
+                    FROM resultados
+                    GROUP BY numero_processo
+                ) u ON r.id = u.ultimo
+                ORDER BY u.primeiro
+                """
+            )
+            for (dados,) in cursor:
+                yield {nomes[int(chave)]: valor for chave, valor in json.loads(dados).items()}
+        finally:
+            conexao.close()
+
+    def importar_xlsx(self, nome_arquivo: str) -> int:
+        """Carrega no armazém as linhas de um xlsx de resultados gerado antes dele existir."""
+        wb = openpyxl.load_workbook(nome_arquivo, read_only=True)
+        try:
+            linhas = wb.active.iter_rows(values_only=True)
+            cabecalhos = next(linhas, None)
+            if not cabecalhos:
+                return 0
+            total = 0
+            with self._lock:
+                for linha in linhas:
+                    resultado = {
+                        str(cabecalho): ("" if valor is None else valor)
+                        for cabecalho, valor in zip(cabecalhos, linha)
+                        if cabecalho
+                    }
+                    if not resultado.get("numero_processo"):
+                        continue
+                    self._conexao.execute(
+                        "INSERT INTO resultados (numero_processo, gravado_em, dados) VALUES (?, ?, ?)",
+                        (str(resultado["numero_processo"]), time.time(), self._codificar(resultado)),
+                    )
+                    total += 1
+                self._conexao.commit()
+        finally:
+            wb.close()
+        return total
+
+    def exportar_xlsx(
+        self,
+        nome_arquivo: str,
+        colunas_base: List[str],
+        coluna_ancora: str = "ADVOGADOS DEVEDOR",
+    ) -> int:
+        """Gera o xlsx em modo write-only. As colunas do registro que não estão em
+        `colunas_base` entram após `coluna_ancora`, na ordem em que foram registradas.
+        """
+        colunas_dinamicas = [nome for nome in self.colunas_registradas() if nome not in set(colunas_base)]
+        colunas = list(colunas_base)
+        posicao = colunas.index(coluna_ancora) + 1 if coluna_ancora in colunas else len(colunas)
+        colunas[posicao:posicao] = colunas_dinamicas
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        fonte_negrito = Font(bold=True)
+        cabecalho = []
+        for coluna in colunas:
+            cell = WriteOnlyCell(ws, value=coluna)
+            cell.font = fonte_negrito
+            cabecalho.append(cell)
+        ws.append(cabecalho)
+
+        total = 0
+        for resultado in self.iterar_resultados():
+            ws.append(["" if resultado.get(coluna) is None else resultado.get(coluna, "") for coluna in colunas])
+            total += 1
+
+        # Grava num temporário e troca, para não deixar um xlsx pela metade
+        temporario = Path(f"{nome_arquivo}.tmp")
+        wb.save(str(temporario))
+        temporario.replace(nome_arquivo)
+        return total
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
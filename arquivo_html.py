@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+
+NIVEL_COMPRESSAO = 6
+
+
+def comprimir(html: str) -> bytes:
+    return zlib.compress(html.encode("utf-8"), NIVEL_COMPRESSAO)
+
+
+def descomprimir(dados: bytes) -> str:
+    return zlib.decompress(dados).decode("utf-8")
+
+
+class ArquivoHTML:
+    """Arquivo das páginas de processo como vieram do ESAJ, comprimidas com zlib.
+
+    Cada consulta acrescenta uma linha (processo, momento da coleta, URL, HTML),
+    então melhorias nos extratores podem ser reaplicadas a todo o histórico sem
+    consultar o site de novo (ver `reprocessar_arquivo` em robo.py).
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS paginas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                numero_processo TEXT NOT NULL,
+                obtida_em REAL NOT NULL,
+                url TEXT,
+                html BLOB NOT NULL
+            )
+            """
+        )
+        self._conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_paginas_processo ON paginas (numero_processo, obtida_em)"
+        )
+        self._conexao.commit()
+
+    def guardar(self, numero_processo: str, html: str, url: Optional[str] = None):
+        # A compressão fica fora do lock: é a parte cara e pode correr em paralelo
+        html_comprimido = comprimir(html)
+        with self._lock:
+            self._conexao.execute(
+                "INSERT INTO paginas (numero_processo, obtida_em, url, html) VALUES (?, ?, ?, ?)",
+                (numero_processo, time.time(), url, html_comprimido),
+            )
+            self._conexao.commit()
+
+    def total(self) -> int:
+        with self._lock:
+            return self._conexao.execute("SELECT COUNT(DISTINCT numero_processo) FROM paginas").fetchone()[0]
+
+    def iterar_paginas(self) -> Iterator[Tuple[str, bytes]]:
+        """(processo, HTML comprimido) da coleta mais recente de cada processo."""
+        # Conexão própria de leitura, como em ArmazemResultados.iterar_resultados
+        conexao = sqlite3.connect(str(self.caminho))
+        try:
+            cursor = conexao.execute(
+                """
+                SELECT p.numero_processo, p.html
+                FROM paginas p
+                JOIN (
+                    SELECT MAX(id) AS ultimo
+                    FROM paginas
+                    GROUP BY numero_processo
+                ) u ON p.id = u.ultimo
+                ORDER BY p.id
+                """
+            )
+            yield from cursor
+        finally:
+            conexao.close()
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
@@ -0,0 +1,159 @@
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import robo
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures" / "esaj"
+# Os tempos só se comparam na mesma máquina: a baseline fica fora do repositório, uma por máquina
+ARQUIVO_BASELINE = Path.home() / ".robo" / "benchmark_parsers_baseline.json"
+REPETICOES = 20
+LIMITE_REGRESSAO = 0.20  # acima de 20% mais lento (ou mais memória) que a baseline é regressão
+TOLERANCIA_MS = 0.05  # diferenças menores que isso são ruído de medição, mesmo em percentual alto
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gisele", "Hugo", "Íris", "João"]
+SOBRENOMES = ["Almeida", "Barros", "Cardoso", "Duarte", "Esteves", "Freitas", "Gomes", "Hora"]
+TIPOS_PARTE = ["Reqte", "Entidade Devedora", "Terceiro", "Perito", "Interessado", "Credor", "Cessionário", "Herdeiro"]
+MOVIMENTOS = ["Juntada de Petição", "Conclusos para Despacho", "Ofício Expedido", "Publicado", "Certidão Emitida"]
+
+
+def _nome(aleatorio):
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+
+def gerar_pagina(num_partes, advogados_por_parte, num_movimentacoes, semente=0):
+    """Página de processo sintética (nomes fictícios) com a estrutura do ESAJ"""
+    aleatorio = random.Random(semente)
+    linhas_partes = []
+    for indice in range(num_partes):
+        tipo = TIPOS_PARTE[indice % len(TIPOS_PARTE)] if indice >= 2 else TIPOS_PARTE[indice]
+        advogados = "".join(
+            f'<br /><span class="mensagemExibindo">{aleatorio.choice(["Advogado:", "Advogada:"])}</span>'
+            f"&nbsp;{_nome(aleatorio)}\n"
+            for _ in range(advogados_por_parte)
+        )
+        linhas_partes.append(
+            f'<tr class="fundoClaro"><td class="label"><span class="mensagemExibindo tipoDeParticipacao">'
+            f'{tipo}&nbsp;</span></td><td class="nomeParteEAdvogado">\n{_nome(aleatorio)}\n{advogados}</td></tr>'
+        )
+    linhas_movimentacoes = [
+        f'<tr class="containerMovimentacao"><td class="dataMovimentacao">{aleatorio.randint(1, 28):02d}/'
+        f'{aleatorio.randint(1, 12):02d}/{aleatorio.randint(2000, 2024)}</td><td class="descricaoMovimentacao">'
+        f'{aleatorio.choice(MOVIMENTOS)}<br /><span style="font-style: italic;">Complemento {indice}</span></td></tr>'
+        for indice in range(num_movimentacoes)
+    ]
+    base = (PASTA_FIXTURES / "processo_completo.html").read_text(encoding="utf-8")
+    soup = BeautifulSoup(base, "html.parser")
+    soup.find("table", id="tablePartesPrincipais").replace_with(
+        BeautifulSoup(f'<table id="tablePartesPrincipais">{"".join(linhas_partes)}</table>', "html.parser")
+    )
+    soup.find(id="tabelaUltimasMovimentacoes").replace_with(
+        BeautifulSoup(f'<tbody id="tabelaUltimasMovimentacoes">{"".join(linhas_movimentacoes)}</tbody>', "html.parser")
+    )
+    return str(soup)
+
+
+def montar_corpus():
+    corpus = {
+        caminho.stem: caminho.read_text(encoding="utf-8")
+        for caminho in sorted(PASTA_FIXTURES.glob("processo_*.html"))
+    }
+    corpus["sintetica_muitas_partes"] = gerar_pagina(60, 3, 20, semente=1)
+    corpus["sintetica_tipos_dinamicos"] = gerar_pagina(24, 1, 20, semente=2)
+    corpus["sintetica_movimentacoes_longas"] = gerar_pagina(4, 2, 800, semente=3)
+    return corpus
+
+
+def _fragmento(html, element_id):
+    elemento = BeautifulSoup(html, "html.parser").find(id=element_id)
+    return str(elemento) if elemento else ""
+
+
+def casos_da_pagina(html):
+    """Funções medidas em cada página, com os argumentos já preparados fora da medição"""
+    tabela_partes = _fragmento(html, "tablePartesPrincipais")
+    tabela_movimentacoes = _fragmento(html, "tabelaUltimasMovimentacoes")
+    dados = robo.dados_para_resultado(robo.extrair_dados_html(html, parser="bs4"))
+    dados.setdefault("outros_numeros", "")
+    for campo in ("requerentes", "devedores", "advogados_req", "advogados_dev"):
+        dados.setdefault(campo, [])
+    dados.setdefault("partes_em_colunas", {})
+    dados.setdefault("movimentacoes", "")
+    return {
+        "extrair_partes": lambda: robo.extrair_partes(tabela_partes),
+        "extrair_movimentacoes": lambda: robo.extrair_movimentacoes(tabela_movimentacoes),
+        "extrair_outros_numeros": lambda: robo.extrair_outros_numeros(html),
+        "extrair_dados_html[bs4]": lambda: robo.extrair_dados_html(html, parser="bs4"),
+        "extrair_dados_html[lxml]": lambda: robo.extrair_dados_html(html, parser="lxml"),
+        "construir_resultado": lambda: robo.construir_resultado(processo="0000000-00.0000.8.26.0000", caminho_pdf=None, **dados),
+    }
+
+
+def medir(funcao, repeticoes=REPETICOES):
+    """Menor tempo entre as repetições (ms) e memória alocada no pico de uma chamada (KiB)"""
+    funcao()  # aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # O menor tempo é o menos afetado por outros processos da máquina
+    return {"ms": min(tempos) * 1000, "mediana_ms": statistics.median(tempos) * 1000, "kib": pico / 1024}
+
+
+def executar_benchmark():
+    resultados = {}
+    for nome_pagina, html in montar_corpus().items():
+        for nome_funcao, funcao in casos_da_pagina(html).items():
+            resultados[f"{nome_pagina} :: {nome_funcao}"] = medir(funcao)
+    return resultados
+
+
+def comparar(resultados, baseline):
+    regressoes = []
+    print(f"{'caso':<72} {'ms':>9} {'KiB':>9} {'Δ tempo':>9} {'Δ mem':>8}")
+    for caso, medida in resultados.items():
+        anterior = baseline.get(caso)
+        variacao_tempo = variacao_memoria = ""
+        if anterior:
+            razao_tempo = medida["ms"] / anterior["ms"] - 1 if anterior["ms"] else 0
+            razao_memoria = medida["kib"] / anterior["kib"] - 1 if anterior["kib"] else 0
+            variacao_tempo = f"{razao_tempo:+.0%}"
+            variacao_memoria = f"{razao_memoria:+.0%}"
+            tempo_pior = razao_tempo > LIMITE_REGRESSAO and medida["ms"] - anterior["ms"] > TOLERANCIA_MS
+            if tempo_pior or razao_memoria > LIMITE_REGRESSAO:
+                regressoes.append(caso)
+        print(f"{caso:<72} {medida['ms']:>9.3f} {medida['kib']:>9.1f} {variacao_tempo:>9} {variacao_memoria:>8}")
+    return regressoes
+
+
+# Benchmark
+if __name__ == "__main__":
+    resultados = executar_benchmark()
+    baseline = json.loads(ARQUIVO_BASELINE.read_text(encoding="utf-8")) if ARQUIVO_BASELINE.exists() else {}
+    regressoes = comparar(resultados, baseline)
+
+    # "python benchmark_parsers.py salvar" grava a execução atual como baseline
+    if (len(sys.argv) > 1 and sys.argv[1] == "salvar") or not baseline:
+        ARQUIVO_BASELINE.parent.mkdir(parents=True, exist_ok=True)
+        ARQUIVO_BASELINE.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nBaseline gravada em {ARQUIVO_BASELINE}")
+    elif regressoes:
+        print(f"\n[ERRO] {len(regressoes)} caso(s) acima de {LIMITE_REGRESSAO:.0%} da baseline:")
+        for caso in regressoes:
+            print(f"  {caso}")
+    else:
+        print("\n[OK] Nenhuma regressão em relação à baseline")
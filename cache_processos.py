@@ -0,0 +1,167 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+METADADOS = "metadados"
+PDF = "pdf"
+
+
+def hash_arquivo(caminho: Path, tamanho_bloco: int = 1 << 20) -> str:
+    """SHA-256 do arquivo, lido em blocos (as pastas digitais passam de centenas de MB)."""
+    resumo = hashlib.sha256()
+    with open(caminho, "rb") as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b""):
+            resumo.update(bloco)
+    return resumo.hexdigest()
+
+
+class CacheProcessos:
+    """Quando cada artefato de um processo (metadados, PDF) foi obtido pela última vez.
+
+    Um artefato está fresco enquanto não passou o TTL dele (`ttl[artefato]`, em
+    segundos; None = nunca expira, 0 = nunca está fresco). O PDF ainda precisa
+    existir no disco com o mesmo tamanho registrado; o hash fica guardado para
+    quem precisar saber se o conteúdo mudou.
+    """
+
+    def __init__(self, caminho: Path, ttl: Dict[str, Optional[float]]):
+        self.caminho = Path(caminho)
+        self.ttl = dict(ttl)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS artefatos (
+                numero_processo TEXT NOT NULL,
+                artefato TEXT NOT NULL,
+                obtido_em REAL NOT NULL,
+                caminho TEXT,
+                tamanho INTEGER,
+                hash TEXT,
+                PRIMARY KEY (numero_processo, artefato)
+            )
+            """
+        )
+        self._conexao.commit()
+
+    def registrar(
+        self,
+        numero_processo: str,
+        artefato: str,
+        caminho: Optional[Path] = None,
+        tamanho: Optional[int] = None,
+        hash_conteudo: Optional[str] = None,
+        obtido_em: Optional[float] = None,
+    ):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO artefatos (numero_processo, artefato, obtido_em, caminho, tamanho, hash) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    numero_processo,
+                    artefato,
+                    time.time() if obtido_em is None else obtido_em,
+                    None if caminho is None else str(caminho),
+                    tamanho,
+                    hash_conteudo,
+                ),
+            )
+            self._conexao.commit()
+
+    def registrar_pdf(
+        self,
+        numero_processo: str,
+        caminho: Path,
+        obtido_em: Optional[float] = None,
+        hash_conteudo: Optional[str] = None,
+    ):
+        """Registra o PDF; sem `hash_conteudo`, o arquivo é lido aqui para calculá-lo
+        (quem grava do laço de eventos deve mandar o hash já calculado pelo worker)."""
+        caminho = Path(caminho)
+        self.registrar(
+            numero_processo,
+            PDF,
+            caminho,
+            caminho.stat().st_size,
+            hash_conteudo or hash_arquivo(caminho),
+            obtido_em,
+        )
+
+    def _entrada(self, numero_processo: str, artefato: str):
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT obtido_em, caminho, tamanho, hash FROM artefatos WHERE numero_processo = ? AND artefato = ?",
+                (numero_processo, artefato),
+            ).fetchone()
+
+    def expirados(self, processos: Iterable[str], artefato: str, agora: Optional[float] = None) -> List[str]:
+        """Processos cujo `artefato` foi obtido, mas já passou do TTL (os nunca obtidos não entram)."""
+        ttl = self.ttl.get(artefato)
+        if ttl is None:
+            return []
+        limite = (time.time() if agora is None else agora) - ttl
+        expirados = []
+        for processo in processos:
+            entrada = self._entrada(processo, artefato)
+            if entrada is not None and (ttl <= 0 or entrada[0] < limite):
+                expirados.append(processo)
+        return expirados
+
+    def fresco(self, numero_processo: str, artefato: str, agora: Optional[float] = None) -> bool:
+        ttl = self.ttl.get(artefato)
+        if ttl is not None and ttl <= 0:
+            return False
+        entrada = self._entrada(numero_processo, artefato)
+        if entrada is None:
+            return False
+        obtido_em, caminho, tamanho, _ = entrada
+        if ttl is not None and (time.time() if agora is None else agora) - obtido_em > ttl:
+            return False
+        if artefato == PDF:
+            try:
+                return caminho is not None and Path(caminho).stat().st_size == tamanho
+            except OSError:
+                return False
+        return True
+
+    def caminho_pdf(self, numero_processo: str) -> Optional[Path]:
+        entrada = self._entrada(numero_processo, PDF)
+        return Path(entrada[1]) if entrada and entrada[1] else None
+
+    def hash_pdf(self, numero_processo: str) -> Optional[str]:
+        entrada = self._entrada(numero_processo, PDF)
+        return entrada[3] if entrada else None
+
+    def semear_pdfs(self, caminhos: Dict[str, Path]) -> int:
+        """Registra os PDFs já no disco (processo -> caminho) que o cache ainda não
+        conhece, com a data de modificação do arquivo. Retorna quantos entraram."""
+        total = 0
+        for processo, caminho in caminhos.items():
+            if self._entrada(processo, PDF) is not None:
+                continue
+            try:
+                modificado_em = caminho.stat().st_mtime
+            except OSError:
+                continue
+            self.registrar_pdf(processo, caminho, obtido_em=modificado_em)
+            total += 1
+        return total
+
+    def semear_metadados(self, gravados_em: Dict[str, float]) -> int:
+        """Registra metadados gravados antes do cache existir (processo -> quando)."""
+        with self._lock:
+            cursor = self._conexao.executemany(
+                "INSERT OR IGNORE INTO artefatos (numero_processo, artefato, obtido_em) VALUES (?, ?, ?)",
+                [(processo, METADADOS, obtido_em) for processo, obtido_em in gravados_em.items()],
+            )
+            self._conexao.commit()
+            return cursor.rowcount
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
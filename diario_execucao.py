@@ -0,0 +1,173 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+PENDENTE = "pendente"
+EM_ANDAMENTO = "em_andamento"
+PDF_PENDENTE = "pdf_pendente"  # metadados gravados, download da pasta digital na fila
+CONCLUIDO = "concluido"
+FALHA = "falha"
+ESTADOS = (PENDENTE, EM_ANDAMENTO, PDF_PENDENTE, CONCLUIDO, FALHA)
+
+
+class DiarioExecucao:
+    """Diário durável do estado de cada processo do lote.
+
+    Substitui a remoção dos processos da planilha de entrada: cada transição de
+    estado é gravada em SQLite assim que acontece, então uma execução
+    interrompida é retomada exatamente de onde parou.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=FULL")
+        self._conexao.execute(
+            """
+            CREATE TABLE IF NOT EXISTS processos (
+                numero TEXT PRIMARY KEY,
+                ordem INTEGER NOT NULL,
+                estado TEXT NOT NULL,
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                classe_erro TEXT,
+                mensagem TEXT,
+                atualizado_em REAL NOT NULL
+            )
+            """
+        )
+        colunas = {linha[1] for linha in self._conexao.execute("PRAGMA table_info(processos)")}
+        if "url_processo" not in colunas:
+            self._conexao.execute("ALTER TABLE processos ADD COLUMN url_processo TEXT")
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_processos_estado ON processos (estado, ordem)")
+        self._conexao.commit()
+
+    def _executar(self, sql: str, parametros=()):
+        with self._lock:
+            self._conexao.execute(sql, parametros)
+            self._conexao.commit()
+
+    def registrar_processos(self, processos: Iterable[str]) -> int:
+        """Inclui como pendentes os processos ainda desconhecidos. Retorna quantos eram novos."""
+        with self._lock:
+            ordem = self._conexao.execute("SELECT COALESCE(MAX(ordem), 0) FROM processos").fetchone()[0]
+            antes = self._conexao.total_changes
+            agora = time.time()
+            for processo in processos:
+                ordem += 1
+                self._conexao.execute(
+                    "INSERT OR IGNORE INTO processos (numero, ordem, estado, atualizado_em) VALUES (?, ?, ?, ?)",
+                    (processo, ordem, PENDENTE, agora),
+                )
+            self._conexao.commit()
+            return self._conexao.total_changes - antes
+
+    def retomar(self) -> int:
+        """Devolve à fila os processos que ficaram em andamento numa execução interrompida."""
+        with self._lock:
+            cursor = self._conexao.execute(
+                "UPDATE processos SET estado = ?, atualizado_em = ? WHERE estado = ?",
+                (PENDENTE, time.time(), EM_ANDAMENTO),
+            )
+            self._conexao.commit()
+            return cursor.rowcount
+
+    def pendentes(self, limite: Optional[int] = None) -> List[str]:
+        sql = "SELECT numero FROM processos WHERE estado = ? ORDER BY ordem"
+        parametros: tuple = (PENDENTE,)
+        if limite:
+            sql += " LIMIT ?"
+            parametros += (limite,)
+        with self._lock:
+            return [numero for (numero,) in self._conexao.execute(sql, parametros)]
+
+    def concluidos(self) -> List[str]:
+        with self._lock:
+            return [
+                numero
+                for (numero,) in self._conexao.execute(
+                    "SELECT numero FROM processos WHERE estado = ? ORDER BY ordem", (CONCLUIDO,)
+                )
+            ]
+
+    def reabrir(self, processos: Iterable[str]) -> int:
+        """Devolve à fila processos concluídos (ex.: metadados vencidos no cache). Retorna quantos."""
+        with self._lock:
+            antes = self._conexao.total_changes
+            agora = time.time()
+            for processo in processos:
+                self._conexao.execute(
+                    "UPDATE processos SET estado = ?, atualizado_em = ? WHERE numero = ? AND estado = ?",
+                    (PENDENTE, agora, processo, CONCLUIDO),
+                )
+            self._conexao.commit()
+            return self._conexao.total_changes - antes
+
+    def iniciar(self, processo: str):
+        self._executar(
+            "UPDATE processos SET estado = ?, tentativas = tentativas + 1, atualizado_em = ? WHERE numero = ?",
+            (EM_ANDAMENTO, time.time(), processo),
+        )
+
+    def aguardar_pdf(self, processo: str, url_processo: str):
+        """Metadados gravados; guarda a URL para retomar só o download se a execução cair."""
+        self._executar(
+            "UPDATE processos SET estado = ?, url_processo = ?, atualizado_em = ? WHERE numero = ?",
+            (PDF_PENDENTE, url_processo, time.time(), processo),
+        )
+
+    def pdfs_pendentes(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return list(
+                self._conexao.execute(
+                    "SELECT numero, url_processo FROM processos WHERE estado = ? ORDER BY ordem",
+                    (PDF_PENDENTE,),
+                )
+            )
+
+    def url_processo(self, processo: str) -> Optional[str]:
+        with self._lock:
+            linha = self._conexao.execute("SELECT url_processo FROM processos WHERE numero = ?", (processo,)).fetchone()
+        return linha[0] if linha else None
+
+    def adiar(self, processo: str, erro: Exception):
+        """Falha transitória: volta a pendente, guardando o erro da última tentativa."""
+        self._executar(
+            "UPDATE processos SET estado = ?, classe_erro = ?, mensagem = ?, atualizado_em = ? WHERE numero = ?",
+            (PENDENTE, type(erro).__name__, str(erro), time.time(), processo),
+        )
+
+    def concluir(self, processo: str):
+        self._executar(
+            "UPDATE processos SET estado = ?, classe_erro = NULL, mensagem = NULL, atualizado_em = ? WHERE numero = ?",
+            (CONCLUIDO, time.time(), processo),
+        )
+
+    def falhar(self, processo: str, erro: Exception):
+        self._executar(
+            "UPDATE processos SET estado = ?, classe_erro = ?, mensagem = ?, atualizado_em = ? WHERE numero = ?",
+            (FALHA, type(erro).__name__, str(erro), time.time(), processo),
+        )
+
+    def contagens(self) -> Dict[str, int]:
+        """Total de processos por estado (consulta só o índice)."""
+        with self._lock:
+            contagens = dict(self._conexao.execute("SELECT estado, COUNT(*) FROM processos GROUP BY estado"))
+        return {estado: contagens.get(estado, 0) for estado in ESTADOS}
+
+    def falhas_por_classe(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(
+                self._conexao.execute(
+                    "SELECT classe_erro, COUNT(*) FROM processos WHERE estado = ? GROUP BY classe_erro",
+                    (FALHA,),
+                )
+            )
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
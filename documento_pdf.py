@@ -0,0 +1,216 @@
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pdfplumber
+import pytesseract
+from pdf2image import convert_from_path
+
+from indice_pdfs import OCR, TABELAS, TEXTO, IndicePDFs, normalizar_sondagem
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # sem o pdfium, a página do Anexo II é procurada só com o pdfplumber
+    pdfium = None
+
+
+PADRAO_ANEXO = re.compile(r"anexo\s+(?:ii|2)\b", re.IGNORECASE)
+ORDENS_BUSCA = ("inicio", "fim")
+
+
+class DocumentoPDF:
+    """PDF aberto uma única vez, com o texto, as tabelas e o OCR de cada página
+    calculados só quando pedidos e guardados para os próximos pedidos.
+
+    Os extratores do roboCPF e o teste_pdf recebem o mesmo documento: o segundo
+    a olhar uma página usa o que o primeiro já extraiu. Com um `indice`, o que
+    foi extraído fica também para as próximas execuções, o Anexo II é procurado
+    no texto indexado e o PDF só é aberto para o que ainda não está no índice.
+    """
+
+    def __init__(
+        self,
+        caminho_pdf: str,
+        poppler_path: Optional[str] = None,
+        dpi: int = 300,
+        indice: Optional[IndicePDFs] = None,
+    ):
+        self.caminho_pdf = caminho_pdf
+        self.poppler_path = poppler_path
+        self.dpi = dpi
+        self._indice = indice
+        self._numero_processo = Path(caminho_pdf).stem
+        if indice is not None:
+            indice.atualizar(Path(caminho_pdf), self._numero_processo)
+        self._plumber = None
+        self._textos: Dict[int, str] = {}
+        self._tabelas: Dict[int, List] = {}
+        self._ocr: Dict[int, str] = {}
+        self._erros_ocr: Dict[int, Exception] = {}
+        self._textos_rapidos: Dict[int, str] = {}
+        self._pdfium = None
+        self._pdfium_falhou = False
+        self._paginas_anexo: Dict[Tuple[str, str, bool], Optional[int]] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        if self._pdfium is not None:
+            self._pdfium.close()
+        if self._plumber is not None:
+            self._plumber.close()
+
+    @property
+    def _pdf(self):
+        """O pdfplumber só abre o arquivo quando alguma extração precisa dele."""
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.caminho_pdf)
+        return self._plumber
+
+    @property
+    def total_paginas(self) -> int:
+        if self._indice is not None:
+            total = self._indice.total_paginas(self._numero_processo)
+            if total is not None:
+                return total
+        return len(self._pdf.pages)
+
+    def _extrair(self, memoria: Dict, indice: int, tipo: str, extrair):
+        """Memória da execução, depois o índice persistente, e só então o PDF."""
+        if indice not in memoria:
+            conteudo = None
+            if self._indice is not None:
+                conteudo = self._indice.extracao(self._numero_processo, indice, tipo)
+            if conteudo is None:
+                conteudo = extrair()
+                if self._indice is not None:
+                    self._indice.guardar_extracao(self._numero_processo, indice, tipo, conteudo)
+            memoria[indice] = conteudo
+        return memoria[indice]
+
+    def texto(self, indice: int) -> str:
+        """`extract_text()` da página (índice a partir de 0); "" se não houver texto."""
+        return self._extrair(self._textos, indice, TEXTO, lambda: self._pdf.pages[indice].extract_text() or "")
+
+    def tabelas(self, indice: int) -> List:
+        return self._extrair(self._tabelas, indice, TABELAS, lambda: self._pdf.pages[indice].extract_tables() or [])
+
+    def texto_com_tabelas(self, indice: int) -> str:
+        """Texto da página seguido de uma linha por linha de tabela (células separadas por espaço)."""
+        texto = self.texto(indice)
+        for tabela in self.tabelas(indice):
+            for linha in tabela:
+                if linha:
+                    texto += "\n" + " ".join([str(cell) if cell else "" for cell in linha])
+        return texto
+
+    def ocr(self, indice: int) -> str:
+        """Texto da página por OCR (tesseract, português). Uma falha também é
+        guardada: a página não é convertida de novo só para falhar outra vez."""
+        if indice in self._erros_ocr:
+            raise self._erros_ocr[indice]
+        try:
+            return self._extrair(self._ocr, indice, OCR, lambda: self._ocr_da_pagina(indice))
+        except Exception as e:
+            self._erros_ocr[indice] = e
+            raise
+
+    def _ocr_da_pagina(self, indice: int) -> str:
+        imagens = convert_from_path(
+            self.caminho_pdf,
+            first_page=indice + 1,
+            last_page=indice + 1,
+            poppler_path=self.poppler_path,
+            dpi=self.dpi,
+        )
+        return pytesseract.image_to_string(imagens[0], lang="por")
+
+    def texto_rapido(self, indice: int) -> Optional[str]:
+        """Texto bruto da página pelo pdfium, sem análise de layout (só para sondar).
+        None se o pdfium não estiver disponível ou não abrir o arquivo."""
+        if pdfium is None or self._pdfium_falhou:
+            return None
+        if indice not in self._textos_rapidos:
+            try:
+                if self._pdfium is None:
+                    self._pdfium = pdfium.PdfDocument(self.caminho_pdf)
+            except Exception:
+                self._pdfium_falhou = True
+                return None
+            try:
+                pagina = self._pdfium[indice]
+                pagina_texto = pagina.get_textpage()
+                self._textos_rapidos[indice] = pagina_texto.get_text_bounded()
+                pagina_texto.close()
+                pagina.close()
+            except Exception:
+                return None
+        return self._textos_rapidos[indice]
+
+    def _indices(self, ordem: str) -> Iterator[int]:
+        indices = range(self.total_paginas)
+        return iter(reversed(indices) if ordem == "fim" else indices)
+
+    def _sondagem_casa(self, indice: int, padrao: re.Pattern) -> bool:
+        sondagem = self.texto_rapido(indice)
+        return sondagem is None or bool(padrao.search(normalizar_sondagem(sondagem)))
+
+    def _confirma(self, indice: int, padrao: re.Pattern) -> bool:
+        return bool(padrao.search(normalizar_sondagem(self.texto(indice))))
+
+    def pagina_anexo(
+        self,
+        ordem: str = "inicio",
+        padrao: re.Pattern = PADRAO_ANEXO,
+        varredura_completa: bool = False,
+    ) -> Optional[int]:
+        """Primeira página (na `ordem` de busca) cujo texto casa com `padrao`, ou None.
+
+        A sondagem usa o texto bruto do pdfium, muito mais barato que o
+        `extract_text()` do pdfplumber; só a página candidata passa pelo
+        pdfplumber, que confirma o marcador. Sem o pdfium, a busca é feita
+        página a página com o pdfplumber. Com o índice, as candidatas saem da
+        busca no texto indexado, sem sondar o PDF.
+
+        Sondagem e confirmação procuram o marcador no texto normalizado
+        (normalizar_sondagem): espaços a mais, quebras de linha e hifenização não
+        o escondem. Com `varredura_completa`, se nenhuma candidata se confirmar,
+        as demais páginas ainda passam pelo pdfplumber antes de a resposta ser None.
+        """
+        if ordem not in ORDENS_BUSCA:
+            raise ValueError(f"Ordem de busca inválida: {ordem!r} (use {' ou '.join(ORDENS_BUSCA)})")
+        chave = (ordem, padrao.pattern, varredura_completa)
+        if chave not in self._paginas_anexo:
+            encontrada = None
+            if self._indice is not None:
+                candidatas = iter(self._indice.paginas_anexo(self._numero_processo, padrao, ordem))
+            else:
+                candidatas = (indice for indice in self._indices(ordem) if self._sondagem_casa(indice, padrao))
+            vistas = set()
+            for indice in candidatas:
+                vistas.add(indice)
+                if self._confirma(indice, padrao):
+                    encontrada = indice
+                    break
+            if encontrada is None and varredura_completa:
+                for indice in self._indices(ordem):
+                    if indice not in vistas and self._confirma(indice, padrao):
+                        encontrada = indice
+                        break
+            self._paginas_anexo[chave] = encontrada
+        return self._paginas_anexo[chave]
+
+
+@contextmanager
+def abrir_documento(pdf, poppler_path: Optional[str] = None, indice: Optional[IndicePDFs] = None):
+    """Usa o DocumentoPDF recebido ou abre (e fecha ao final) um para o caminho."""
+    if isinstance(pdf, DocumentoPDF):
+        yield pdf
+    else:
+        with DocumentoPDF(pdf, poppler_path, indice=indice) as documento:
+            yield documento
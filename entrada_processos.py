@@ -0,0 +1,160 @@
+import csv
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import openpyxl
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional; xlsx e CSV não dependem do pyarrow
+    pq = None
+
+
+TAMANHO_LOTE = 10_000
+# Ordem dos dígitos para o cálculo do módulo 97 (CNJ, Res. 65/2008): NNNNNNN AAAA J TR OOOO DD
+ORDEM_MOD97 = list(range(0, 7)) + list(range(9, 20)) + [7, 8]
+
+
+class RelatorioEntrada:
+    """Contagens da leitura e a lista de entradas descartadas por inválidas."""
+
+    def __init__(self):
+        self.lidos = 0
+        self.validos = 0
+        self.duplicados = 0
+        self.invalidos: List[Tuple[int, str, str]] = []  # (linha, valor original, motivo)
+
+    def resumo(self) -> str:
+        return (
+            f"{self.lidos} números lidos: {self.validos} válidos, "
+            f"{self.duplicados} duplicados, {len(self.invalidos)} inválidos"
+        )
+
+
+def ler_coluna(caminho: Path, coluna: str = "Processo") -> Iterator[Tuple[int, object]]:
+    """(linha, valor) da coluna `coluna`, lidos em fluxo de xlsx, CSV ou Parquet."""
+    caminho = Path(caminho)
+    sufixo = caminho.suffix.lower()
+    if sufixo in (".xlsx", ".xlsm"):
+        wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True)
+        try:
+            linhas = wb.active.iter_rows(values_only=True)
+            cabecalho = [str(valor).strip() if valor is not None else "" for valor in next(linhas, ())]
+            if coluna not in cabecalho:
+                raise ValueError(f"Coluna {coluna!r} não encontrada em {caminho}")
+            indice = cabecalho.index(coluna)
+            for numero_linha, linha in enumerate(linhas, start=2):
+                yield numero_linha, linha[indice] if indice < len(linha) else None
+        finally:
+            wb.close()
+    elif sufixo in (".csv", ".txt"):
+        with open(caminho, newline="", encoding="utf-8-sig") as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.DictReader(arquivo, dialect=dialeto)
+            if coluna not in (leitor.fieldnames or []):
+                raise ValueError(f"Coluna {coluna!r} não encontrada em {caminho}")
+            for numero_linha, linha in enumerate(leitor, start=2):
+                yield numero_linha, linha[coluna]
+    elif sufixo == ".parquet":
+        if pq is None:
+            raise ImportError("Leitura de Parquet requer o pacote pyarrow")
+        numero_linha = 1
+        for lote in pq.ParquetFile(caminho).iter_batches(columns=[coluna], batch_size=TAMANHO_LOTE):
+            for valor in lote.column(0).to_pylist():
+                numero_linha += 1
+                yield numero_linha, valor
+    else:
+        raise ValueError(f"Formato de entrada não suportado: {caminho.suffix}")
+
+
+def normalizar_cnj(valor) -> str:
+    """Os 20 dígitos do número CNJ, ou "" se o valor não puder ser um.
+
+    Aceita o número com ou sem máscara e também o valor numérico que o Excel
+    guarda quando a célula não é texto (sem os zeros à esquerda).
+    """
+    if valor is None:
+        return ""
+    if isinstance(valor, float):
+        if not valor.is_integer():
+            return ""
+        valor = int(valor)
+    digitos = re.sub(r"\D", "", str(valor).strip())
+    if isinstance(valor, int) and 0 < len(digitos) < 20:
+        digitos = digitos.zfill(20)
+    return digitos if len(digitos) == 20 else ""
+
+
+def formatar_cnj(digitos: str) -> str:
+    return f"{digitos[:7]}-{digitos[7:9]}.{digitos[9:13]}.{digitos[13]}.{digitos[14:16]}.{digitos[16:]}"
+
+
+def digitos_verificadores_validos(numeros: List[str]) -> np.ndarray:
+    """Confere o módulo 97 de um lote de números de 20 dígitos de uma só vez.
+
+    Os 20 dígitos não cabem em int64, então o resto é acumulado dígito a dígito
+    (Horner), com as operações aplicadas ao lote inteiro a cada passo.
+    """
+    if not numeros:
+        return np.zeros(0, dtype=bool)
+    matriz = np.frombuffer("".join(numeros).encode("ascii"), dtype=np.uint8).reshape(len(numeros), 20) - ord("0")
+    resto = np.zeros(len(numeros), dtype=np.int64)
+    for coluna in ORDEM_MOD97:
+        resto = (resto * 10 + matriz[:, coluna]) % 97
+    return resto == 1
+
+
+def carregar_processos(
+    caminho: Path,
+    coluna: str = "Processo",
+    limite: Optional[int] = None,
+    relatorio: Optional[RelatorioEntrada] = None,
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> Iterator[str]:
+    """Números CNJ válidos e únicos da entrada, formatados, na ordem da planilha.
+
+    A leitura é em fluxo e a validação é feita por lote; as entradas descartadas
+    ficam em `relatorio`.
+    """
+    relatorio = relatorio if relatorio is not None else RelatorioEntrada()
+    vistos: Set[str] = set()
+    entregues = 0
+    lote: List[Tuple[int, object, str]] = []
+
+    def _processar_lote():
+        nonlocal entregues
+        validos = digitos_verificadores_validos([digitos for _, _, digitos in lote])
+        for (numero_linha, valor, digitos), valido in zip(lote, validos):
+            if not valido:
+                relatorio.invalidos.append((numero_linha, str(valor), "dígito verificador inválido"))
+            elif digitos in vistos:
+                relatorio.duplicados += 1
+            elif limite is None or entregues < limite:
+                vistos.add(digitos)
+                relatorio.validos += 1
+                entregues += 1
+                yield formatar_cnj(digitos)
+        lote.clear()
+
+    for numero_linha, valor in ler_coluna(caminho, coluna):
+        if valor is None or str(valor).strip() == "":
+            continue
+        relatorio.lidos += 1
+        digitos = normalizar_cnj(valor)
+        if not digitos:
+            relatorio.invalidos.append((numero_linha, str(valor), "não tem 20 dígitos"))
+            continue
+        lote.append((numero_linha, valor, digitos))
+        if len(lote) >= tamanho_lote:
+            yield from _processar_lote()
+            if limite is not None and entregues >= limite:
+                return
+    if lote:
+        yield from _processar_lote()
@@ -0,0 +1,271 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pdfplumber
+
+from cache_processos import hash_arquivo
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # sem o pdfium, o texto das páginas é extraído pelo pdfplumber
+    pdfium = None
+
+
+# Consulta FTS que traz as candidatas a Anexo II; a confirmação é feita com PADRAO_ANEXO
+CONSULTA_ANEXO = '"anexo ii" OR "anexo 2"'
+TEXTO = "texto"
+TABELAS = "tabelas"
+OCR = "ocr"
+# PRAGMA user_version do índice: a partir da 1, o texto das páginas é guardado já normalizado
+VERSAO_TEXTO = 1
+# Hífen (ou hífen opcional) de fim de linha no meio de uma palavra
+HIFEN_QUEBRA = re.compile(r"(?<=\w)[-\xad]\s*\n\s*")
+
+
+def normalizar_sondagem(texto: str) -> str:
+    """Texto bruto pronto para procurar marcadores como o do Anexo II: desfaz a
+    hifenização de fim de linha e colapsa espaços e quebras de linha."""
+    return " ".join(HIFEN_QUEBRA.sub("", texto).split())
+
+
+def textos_das_paginas(caminho_pdf: Path) -> List[str]:
+    """Texto bruto de cada página (pdfium, sem layout; pdfplumber se o pdfium faltar)."""
+    if pdfium is not None:
+        try:
+            documento = pdfium.PdfDocument(str(caminho_pdf))
+        except Exception:
+            documento = None
+        if documento is not None:
+            try:
+                textos = []
+                for pagina in documento:
+                    pagina_texto = pagina.get_textpage()
+                    textos.append(pagina_texto.get_text_bounded())
+                    pagina_texto.close()
+                    pagina.close()
+                return textos
+            finally:
+                documento.close()
+    with pdfplumber.open(caminho_pdf) as pdf:
+        return [pagina.extract_text() or "" for pagina in pdf.pages]
+
+
+class IndicePDFs:
+    """Índice persistente (SQLite FTS5) do texto de cada página dos PDFs.
+
+    Cada PDF é identificado pelo processo (nome do arquivo) e guardado com
+    tamanho, data de modificação e hash: só é reindexado quando muda. Além do
+    texto bruto de todas as páginas (para achar o Anexo II sem abrir o PDF), o
+    índice guarda, conforme são pedidos, o texto com layout, as tabelas e o OCR
+    das páginas que os extratores realmente leem.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.caminho), timeout=60, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS arquivos (
+                numero_processo TEXT PRIMARY KEY,
+                caminho TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                modificado_em REAL NOT NULL,
+                hash TEXT NOT NULL,
+                total_paginas INTEGER NOT NULL,
+                indexado_em REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS paginas (
+                id INTEGER PRIMARY KEY,
+                numero_processo TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                texto TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_paginas_processo ON paginas (numero_processo, pagina);
+            CREATE VIRTUAL TABLE IF NOT EXISTS paginas_fts USING fts5(
+                texto, content='paginas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS paginas_ai AFTER INSERT ON paginas BEGIN
+                INSERT INTO paginas_fts (rowid, texto) VALUES (new.id, new.texto);
+            END;
+            CREATE TRIGGER IF NOT EXISTS paginas_ad AFTER DELETE ON paginas BEGIN
+                INSERT INTO paginas_fts (paginas_fts, rowid, texto) VALUES ('delete', old.id, old.texto);
+            END;
+            CREATE TABLE IF NOT EXISTS extracoes (
+                numero_processo TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                tipo TEXT NOT NULL,
+                conteudo TEXT NOT NULL,
+                PRIMARY KEY (numero_processo, pagina, tipo)
+            );
+            """
+        )
+        self._conexao.commit()
+        if self._conexao.execute("PRAGMA user_version").fetchone()[0] < VERSAO_TEXTO:
+            self._normalizar_paginas()
+
+    def _normalizar_paginas(self):
+        """Normaliza o texto já indexado por versões anteriores, sem reabrir os PDFs."""
+        linhas = self._conexao.execute("SELECT id, numero_processo, pagina, texto FROM paginas").fetchall()
+        # Apagar e reinserir mantém o FTS em dia pelos gatilhos
+        self._conexao.execute("DELETE FROM paginas")
+        self._conexao.executemany(
+            "INSERT INTO paginas (id, numero_processo, pagina, texto) VALUES (?, ?, ?, ?)",
+            [(id_pagina, numero, pagina, normalizar_sondagem(texto)) for id_pagina, numero, pagina, texto in linhas],
+        )
+        self._conexao.execute(f"PRAGMA user_version = {VERSAO_TEXTO}")
+        self._conexao.commit()
+
+    def _registro(self, numero_processo: str):
+        with self._lock:
+            return self._conexao.execute(
+                "SELECT caminho, tamanho, modificado_em, hash, total_paginas FROM arquivos WHERE numero_processo = ?",
+                (numero_processo,),
+            ).fetchone()
+
+    def atualizar(self, caminho_pdf: Path, numero_processo: Optional[str] = None) -> bool:
+        """Indexa o PDF se ele é novo ou mudou. Retorna True se (re)indexou.
+
+        Tamanho e data de modificação iguais bastam para considerar o arquivo o
+        mesmo; se só a data mudou (cópia, sincronização do drive), o hash decide.
+        """
+        caminho_pdf = Path(caminho_pdf)
+        numero_processo = numero_processo or caminho_pdf.stem
+        estado = caminho_pdf.stat()
+        registro = self._registro(numero_processo)
+        if registro and registro[1] == estado.st_size and registro[2] == estado.st_mtime:
+            return False
+        hash_conteudo = hash_arquivo(caminho_pdf)
+        if registro and registro[3] == hash_conteudo:
+            with self._lock:
+                self._conexao.execute(
+                    "UPDATE arquivos SET caminho = ?, tamanho = ?, modificado_em = ? WHERE numero_processo = ?",
+                    (str(caminho_pdf), estado.st_size, estado.st_mtime, numero_processo),
+                )
+                self._conexao.commit()
+            return False
+
+        textos = textos_das_paginas(caminho_pdf)
+        with self._lock:
+            self._conexao.execute("DELETE FROM paginas WHERE numero_processo = ?", (numero_processo,))
+            self._conexao.execute("DELETE FROM extracoes WHERE numero_processo = ?", (numero_processo,))
+            self._conexao.executemany(
+                "INSERT INTO paginas (numero_processo, pagina, texto) VALUES (?, ?, ?)",
+                [(numero_processo, indice, normalizar_sondagem(texto)) for indice, texto in enumerate(textos)],
+            )
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO arquivos "
+                "(numero_processo, caminho, tamanho, modificado_em, hash, total_paginas, indexado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    numero_processo, str(caminho_pdf), estado.st_size, estado.st_mtime,
+                    hash_conteudo, len(textos), time.time(),
+                ),
+            )
+            self._conexao.commit()
+        return True
+
+    def indexar_pasta(self, pasta: Path) -> Tuple[int, int, int]:
+        """Passa por todos os PDFs da pasta. Retorna (indexados, inalterados, com erro)."""
+        indexados = inalterados = erros = 0
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                if not entrada.name.lower().endswith(".pdf"):
+                    continue
+                try:
+                    if self.atualizar(Path(entrada.path)):
+                        indexados += 1
+                        print(f"[OK] {entrada.name} indexado")
+                    else:
+                        inalterados += 1
+                except Exception as e:
+                    erros += 1
+                    print(f"[ERRO] {entrada.name}: {type(e).__name__}: {e}")
+        return indexados, inalterados, erros
+
+    def total_paginas(self, numero_processo: str) -> Optional[int]:
+        registro = self._registro(numero_processo)
+        return registro[4] if registro else None
+
+    def paginas_anexo(self, numero_processo: str, padrao: re.Pattern, ordem: str = "inicio") -> List[int]:
+        """Candidatas a Anexo II: páginas cujo texto bruto (normalizado) casa com `padrao`, na ordem de busca."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                """
+                SELECT p.pagina, p.texto
+                FROM paginas_fts f JOIN paginas p ON p.id = f.rowid
+                WHERE paginas_fts MATCH ? AND p.numero_processo = ?
+                ORDER BY p.pagina
+                """,
+                (CONSULTA_ANEXO, numero_processo),
+            ).fetchall()
+        paginas = [pagina for pagina, texto in linhas if padrao.search(texto)]
+        return paginas[::-1] if ordem == "fim" else paginas
+
+    def extracao(self, numero_processo: str, pagina: int, tipo: str):
+        """Texto com layout, tabelas ou OCR da página, se já foram guardados."""
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT conteudo FROM extracoes WHERE numero_processo = ? AND pagina = ? AND tipo = ?",
+                (numero_processo, pagina, tipo),
+            ).fetchone()
+        if linha is None:
+            return None
+        return json.loads(linha[0]) if tipo == TABELAS else linha[0]
+
+    def guardar_extracao(self, numero_processo: str, pagina: int, tipo: str, conteudo):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO extracoes (numero_processo, pagina, tipo, conteudo) VALUES (?, ?, ?, ?)",
+                (numero_processo, pagina, tipo, json.dumps(conteudo) if tipo == TABELAS else conteudo),
+            )
+            self._conexao.commit()
+
+    def buscar(self, consulta: str, limite: int = 50) -> Iterator[Tuple[str, int, str]]:
+        """(processo, página, trecho) das páginas que casam com a consulta FTS5."""
+        with self._lock:
+            linhas = self._conexao.execute(
+                """
+                SELECT p.numero_processo, p.pagina, snippet(paginas_fts, 0, '[', ']', '...', 12)
+                FROM paginas_fts f JOIN paginas p ON p.id = f.rowid
+                WHERE paginas_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (consulta, limite),
+            ).fetchall()
+        return iter(linhas)
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+
+# Indexação
+if __name__ == "__main__":
+    # python indice_pdfs.py <pasta dos PDFs> [arquivo do índice]
+    # python indice_pdfs.py buscar "<consulta FTS5>" [arquivo do índice]
+    if len(sys.argv) > 2 and sys.argv[1] == "buscar":
+        indice = IndicePDFs(Path(sys.argv[3]) if len(sys.argv) > 3 else Path("indice_pdfs.sqlite3"))
+        for numero_processo, pagina, trecho in indice.buscar(sys.argv[2]):
+            print(f"{numero_processo} p.{pagina + 1}: {trecho}")
+        indice.fechar()
+    elif len(sys.argv) > 1:
+        indice = IndicePDFs(Path(sys.argv[2]) if len(sys.argv) > 2 else Path("indice_pdfs.sqlite3"))
+        inicio = time.perf_counter()
+        indexados, inalterados, erros = indice.indexar_pasta(Path(sys.argv[1]))
+        indice.fechar()
+        print(
+            f"\n[CONCLUÍDO] {indexados} indexado(s), {inalterados} inalterado(s), {erros} com erro "
+            f"em {time.perf_counter() - inicio:.1f} s"
+        )
+    else:
+        print("Uso: python indice_pdfs.py <pasta dos PDFs> | buscar \"<consulta>\"")
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import deque
+
+
+# Tipos de sinal aceitos por LimitadorAdaptativo.registrar_sinal
+SINAL_TIMEOUT = "timeout"
+SINAL_MENSAGEM_ERRO = "mensagem_erro"
+SINAL_SESSAO = "sessao"  # redirecionamento para o login no meio da execução
+SINAL_ERRO = "erro"
+
+
+class LimitadorAdaptativo:
+    """Token bucket compartilhado por todos os workers, com taxa ajustada pelos
+    sinais de saúde do servidor (aumento aditivo, redução multiplicativa).
+
+    Cada sucesso rápido soma `incremento` à taxa até `taxa_maxima`; timeouts,
+    picos de `.mensagemErro`, latência acima do alvo e redirecionamentos de
+    sessão reduzem a taxa. Acima da taxa em que a última redução aconteceu, a
+    recuperação é quatro vezes mais lenta, para não voltar direto ao limite.
+    Taxas em requisições por segundo.
+    """
+
+    def __init__(
+        self,
+        taxa_maxima: float,
+        taxa_minima: float,
+        latencia_alvo: float,
+        capacidade: float = 1.0,
+        janela_mensagens: int = 20,
+        limiar_mensagens: float = 0.5,
+        intervalo_reducao: float = 10.0,
+    ):
+        self.taxa_maxima = taxa_maxima
+        self.taxa_minima = taxa_minima
+        self.latencia_alvo = latencia_alvo
+        self.capacidade = capacidade
+        self.limiar_mensagens = limiar_mensagens
+        self.intervalo_reducao = intervalo_reducao
+        self.incremento = taxa_maxima / 20
+
+        self._lock = threading.Lock()
+        self._taxa = taxa_maxima
+        self._taxa_segura = taxa_maxima
+        self._tokens = capacidade
+        self._ultimo_abastecimento = time.monotonic()
+        self._ultima_reducao = 0.0
+        self._mensagens: deque = deque(maxlen=janela_mensagens)
+
+    @property
+    def taxa(self) -> float:
+        return self._taxa
+
+    @property
+    def taxa_por_minuto(self) -> float:
+        return self._taxa * 60
+
+    def _abastecer(self, agora: float):
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo_abastecimento) * self._taxa)
+        self._ultimo_abastecimento = agora
+
+    def adquirir(self):
+        """Bloqueia até haver uma ficha disponível na taxa atual."""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._abastecer(agora)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self._taxa
+            time.sleep(espera)
+
+    def _reduzir(self, fator: float):
+        """Reduz a taxa (chamar com o lock). Sinais simultâneos de vários workers
+        sobre o mesmo problema contam como uma redução só."""
+        agora = time.monotonic()
+        if agora - self._ultima_reducao < self.intervalo_reducao:
+            return
+        self._abastecer(agora)
+        self._ultima_reducao = agora
+        self._taxa_segura = self._taxa
+        self._taxa = max(self.taxa_minima, self._taxa * fator)
+
+    def registrar_sucesso(self, latencia: float):
+        with self._lock:
+            self._mensagens.append(False)
+            if latencia > self.latencia_alvo:
+                self._reduzir(0.8)
+                return
+            self._abastecer(time.monotonic())
+            passo = self.incremento if self._taxa < self._taxa_segura else self.incremento / 4
+            self._taxa = min(self.taxa_maxima, self._taxa + passo)
+
+    def registrar_sinal(self, sinal: str):
+        with self._lock:
+            if sinal == SINAL_MENSAGEM_ERRO:
+                self._mensagens.append(True)
+                amostras = len(self._mensagens)
+                if amostras >= self._mensagens.maxlen // 2 and sum(self._mensagens) / amostras > self.limiar_mensagens:
+                    self._mensagens.clear()
+                    self._reduzir(0.7)
+            elif sinal == SINAL_TIMEOUT:
+                self._reduzir(0.5)
+            elif sinal == SINAL_SESSAO:
+                self._reduzir(self.taxa_minima / max(self._taxa, self.taxa_minima))
+            else:
+                self._reduzir(0.9)
@@ -0,0 +1,173 @@
+import csv
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Coletor ativo da execução; sem ele, `medir` não registra nada
+_coletor: Optional["MetricasExecucao"] = None
+_contexto = threading.local()
+
+
+def ativar(coletor: Optional["MetricasExecucao"]):
+    global _coletor
+    _coletor = coletor
+
+
+@contextmanager
+def processo_atual(processo: str):
+    """Associa os tempos medidos nesta thread ao `processo`."""
+    anterior = getattr(_contexto, "processo", "")
+    _contexto.processo = processo
+    try:
+        yield
+    finally:
+        _contexto.processo = anterior
+
+
+@contextmanager
+def medir(etapa: str):
+    """Mede o tempo de uma etapa. Etapas que terminam em exceção também contam."""
+    inicio = time.monotonic()
+    try:
+        yield
+    finally:
+        coletor = _coletor
+        if coletor is not None:
+            coletor.registrar(getattr(_contexto, "processo", ""), etapa, time.monotonic() - inicio)
+
+
+def formatar_duracao(segundos: float) -> str:
+    """H:MM:SS sem dar a volta em 24 h (uma execução grande passa de dias)."""
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
+
+
+def percentil(valores_ordenados: List[float], fracao: float) -> float:
+    if not valores_ordenados:
+        return 0.0
+    posicao = min(len(valores_ordenados) - 1, int(round(fracao * (len(valores_ordenados) - 1))))
+    return valores_ordenados[posicao]
+
+
+class MetricasExecucao:
+    """Tempos por etapa e por processo, vazão e previsão de término da execução.
+
+    Os tempos novos vão para `arquivo_csv` (um por linha, acrescentados a cada
+    relatório) e o resumo atual é regravado em `arquivo_prometheus`, no formato
+    textfile do node_exporter.
+    """
+
+    def __init__(
+        self,
+        total_previsto: int,
+        arquivo_csv: Optional[Path] = None,
+        arquivo_prometheus: Optional[Path] = None,
+    ):
+        self.total_previsto = total_previsto
+        self.arquivo_csv = Path(arquivo_csv) if arquivo_csv else None
+        self.arquivo_prometheus = Path(arquivo_prometheus) if arquivo_prometheus else None
+        self._lock = threading.Lock()
+        self._duracoes: Dict[str, List[float]] = {}
+        self._pendentes_csv: List[Tuple[float, str, str, str, float]] = []
+        self._concluidos = 0
+        self._inicio = time.monotonic()
+        self._parar = threading.Event()
+        self._relator: Optional[threading.Thread] = None
+
+    def registrar(self, processo: str, etapa: str, duracao: float):
+        with self._lock:
+            self._duracoes.setdefault(etapa, []).append(duracao)
+            self._pendentes_csv.append((time.time(), threading.current_thread().name, processo, etapa, duracao))
+
+    def concluir_processo(self):
+        with self._lock:
+            self._concluidos += 1
+
+    def vazao_por_hora(self) -> float:
+        decorrido = time.monotonic() - self._inicio
+        return self._concluidos / decorrido * 3600 if decorrido > 0 else 0.0
+
+    def eta_segundos(self) -> Optional[float]:
+        vazao = self.vazao_por_hora()
+        if not vazao:
+            return None
+        return max(0, self.total_previsto - self._concluidos) / vazao * 3600
+
+    def resumo_etapas(self) -> Dict[str, Tuple[int, float, float, float]]:
+        """Por etapa: (quantidade, soma, p50, p95) em segundos."""
+        with self._lock:
+            copias = {etapa: sorted(duracoes) for etapa, duracoes in self._duracoes.items()}
+        return {
+            etapa: (len(duracoes), sum(duracoes), percentil(duracoes, 0.5), percentil(duracoes, 0.95))
+            for etapa, duracoes in copias.items()
+        }
+
+    def relatorio(self) -> str:
+        eta = self.eta_segundos()
+        linhas = [
+            f"--- {self._concluidos}/{self.total_previsto} processos | "
+            f"{self.vazao_por_hora():.1f} processos/h | "
+            f"término em {'?' if eta is None else formatar_duracao(eta)}"
+        ]
+        for etapa, (quantidade, _, p50, p95) in sorted(self.resumo_etapas().items()):
+            linhas.append(f"    {etapa:<22} n={quantidade:<6} p50={p50:6.2f}s  p95={p95:6.2f}s")
+        return "\n".join(linhas)
+
+    def gravar(self):
+        """Acrescenta os tempos novos ao CSV e regrava o arquivo do Prometheus."""
+        if self.arquivo_csv is not None:
+            with self._lock:
+                pendentes, self._pendentes_csv = self._pendentes_csv, []
+            novo = not self.arquivo_csv.exists()
+            with open(self.arquivo_csv, "a", newline="", encoding="utf-8") as arquivo:
+                escritor = csv.writer(arquivo)
+                if novo:
+                    escritor.writerow(["momento", "thread", "processo", "etapa", "segundos"])
+                for momento, thread, processo, etapa, duracao in pendentes:
+                    escritor.writerow([f"{momento:.3f}", thread, processo, etapa, f"{duracao:.4f}"])
+
+        if self.arquivo_prometheus is not None:
+            linhas = [
+                "# HELP robo_etapa_segundos Tempo gasto em cada etapa da consulta de um processo.",
+                "# TYPE robo_etapa_segundos summary",
+            ]
+            for etapa, (quantidade, soma, p50, p95) in sorted(self.resumo_etapas().items()):
+                linhas.append(f'robo_etapa_segundos{{etapa="{etapa}",quantile="0.5"}} {p50:.4f}')
+                linhas.append(f'robo_etapa_segundos{{etapa="{etapa}",quantile="0.95"}} {p95:.4f}')
+                linhas.append(f'robo_etapa_segundos_sum{{etapa="{etapa}"}} {soma:.4f}')
+                linhas.append(f'robo_etapa_segundos_count{{etapa="{etapa}"}} {quantidade}')
+            linhas += [
+                "# TYPE robo_processos_concluidos counter",
+                f"robo_processos_concluidos {self._concluidos}",
+                "# TYPE robo_processos_por_hora gauge",
+                f"robo_processos_por_hora {self.vazao_por_hora():.2f}",
+            ]
+            eta = self.eta_segundos()
+            if eta is not None:
+                linhas += ["# TYPE robo_eta_segundos gauge", f"robo_eta_segundos {eta:.0f}"]
+            # O node_exporter pode ler a qualquer momento: grava num temporário e troca
+            temporario = self.arquivo_prometheus.with_name(self.arquivo_prometheus.name + ".tmp")
+            temporario.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+            temporario.replace(self.arquivo_prometheus)
+
+    def iniciar_relatorios(self, intervalo: float):
+        """Imprime o relatório e grava os arquivos a cada `intervalo` segundos."""
+
+        def _relatar():
+            while not self._parar.wait(intervalo):
+                print(self.relatorio())
+                self.gravar()
+
+        self._relator = threading.Thread(target=_relatar, name="metricas", daemon=True)
+        self._relator.start()
+
+    def encerrar(self):
+        self._parar.set()
+        if self._relator is not None:
+            self._relator.join(timeout=5)
+        print(self.relatorio())
+        self.gravar()
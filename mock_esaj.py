@@ -0,0 +1,394 @@
+import hashlib
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlparse
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures" / "esaj"
+PORTA = 8765
+
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Fábio", "Gisele", "Hugo", "Íris", "João"]
+SOBRENOMES = ["Almeida", "Barros", "Cardoso", "Duarte", "Esteves", "Freitas", "Gomes", "Hora"]
+
+
+class ConfiguracaoMock:
+    """Comportamento injetado no servidor; pode ser alterado com ele rodando."""
+
+    def __init__(
+        self,
+        latencia: float = 0.3,
+        variacao_latencia: float = 0.2,
+        taxa_erro: float = 0.0,
+        taxa_nao_encontrado: float = 0.05,
+        expirar_sessao_a_cada: int = 0,
+        tempo_geracao_pdf: float = 1.0,
+        paginas_pdf: int = 8,
+    ):
+        self.latencia = latencia  # segundos por resposta, mais uma variação uniforme
+        self.variacao_latencia = variacao_latencia
+        self.taxa_erro = taxa_erro  # fração das consultas respondidas com HTTP 500
+        self.taxa_nao_encontrado = taxa_nao_encontrado  # fração dos números que dão .mensagemErro
+        self.expirar_sessao_a_cada = expirar_sessao_a_cada  # derruba todas as sessões a cada N consultas (0 = nunca)
+        self.tempo_geracao_pdf = tempo_geracao_pdf  # tempo com o #msgAguarde visível
+        self.paginas_pdf = paginas_pdf
+
+
+def _semente(numero: str) -> int:
+    return int(hashlib.sha1(numero.encode()).hexdigest()[:8], 16)
+
+
+def nome_ficticio(numero: str, deslocamento: int = 0) -> str:
+    aleatorio = random.Random(_semente(numero) + deslocamento)
+    return f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)}"
+
+
+def cpf_ficticio(numero: str) -> str:
+    """CPF com dígitos verificadores válidos, derivado do número do processo."""
+    base = [int(d) for d in str(_semente(numero)).zfill(9)[:9]]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(base, range(tamanho + 1, 1, -1)))
+        base.append((soma * 10 % 11) % 10)
+    texto = "".join(map(str, base))
+    return f"{texto[:3]}.{texto[3:6]}.{texto[6:9]}-{texto[9:]}"
+
+
+def gerar_numero_cnj(sequencial: int, ano: int = 2020, foro: str = "0053") -> str:
+    """Número CNJ (NNNNNNN-DD.AAAA.8.26.OOOO) com dígito verificador mod 97 válido."""
+    numero = f"{sequencial:07d}"
+    digito = 98 - int(f"{numero}{ano}826{foro}") * 100 % 97
+    return f"{numero}-{digito:02d}.{ano}.8.26.{foro}"
+
+
+def gerar_pdf(linhas_por_pagina) -> bytes:
+    """PDF mínimo, só texto (Helvetica), uma lista de linhas por página."""
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages, preenchido quando as páginas forem conhecidas
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    paginas = []
+    for linhas in linhas_por_pagina:
+        comandos = ["BT /F1 11 Tf 50 790 Td 14 TL"]
+        for linha in linhas:
+            texto = linha.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            comandos.append(f"({texto}) Tj T*")
+        comandos.append("ET")
+        conteudo = "\n".join(comandos).encode("cp1252", errors="replace")
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream")
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objetos)
+        )
+        paginas.append(len(objetos))
+    objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % pagina for pagina in paginas),
+        len(paginas),
+    )
+
+    saida = bytearray(b"%PDF-1.4\n")
+    posicoes = []
+    for indice, objeto in enumerate(objetos, start=1):
+        posicoes.append(len(saida))
+        saida += b"%d 0 obj\n" % indice + objeto + b"\nendobj\n"
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for posicao in posicoes:
+        saida += b"%010d 00000 n \n" % posicao
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
+
+
+def pdf_do_processo(numero: str, paginas: int) -> bytes:
+    """Pasta digital sintética: páginas de andamento e, no fim, o Anexo II com o CPF."""
+    requerente = nome_ficticio(numero)
+    conteudo = [
+        [f"Processo {numero}", f"Folha {pagina + 1}", "Documento gerado pelo servidor de testes."]
+        for pagina in range(max(0, paginas - 1))
+    ]
+    conteudo.append([
+        "ANEXO II",
+        "Relação de credores",
+        f"Processo {numero}",
+        f"Nome: {requerente}",
+        f"CPF: {cpf_ficticio(numero)}",
+    ])
+    return gerar_pdf(conteudo)
+
+
+PAGINA_LOGIN = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>e-SAJ | Identificação</title></head>
+<body>
+<form id="formLogin" action="/sajcas/login" method="post">
+  <input type="hidden" name="service" value="{service}">
+  <input type="text" id="usernameForm" name="username" value="teste">
+  <input type="password" id="passwordForm" name="password" value="teste">
+  <input type="submit" id="pbEntrar" value="Entrar">
+</form>
+</body></html>"""
+
+PAGINA_NAO_ENCONTRADO = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>e-SAJ | Consulta</title></head>
+<body>
+<table id="spwTabelaMensagem"><tr>
+  <td id="mensagemRetorno" class="mensagemErro"><li>Não existem informações disponíveis para os parâmetros informados.</li></td>
+</tr></table>
+</body></html>"""
+
+PAGINA_ERRO = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Erro</title></head><body><h1>Erro interno</h1></body></html>"""
+
+PAGINA_PASTA_DIGITAL = """<!DOCTYPE html>
+<html lang="pt-BR"><head><meta charset="utf-8"><title>Pasta Digital</title>
+<style>.oculto {{ display: none; }}</style></head>
+<body>
+<button id="selecionarButton">Selecionar todos</button>
+<button id="salvarButton" onclick="document.getElementById('opcoes').className = ''">Salvar</button>
+<div id="opcoes" class="oculto">
+  <input type="radio" id="opcao1" name="opcao" value="1"><label for="opcao1">Arquivo único</label>
+  <button id="botaoContinuar" onclick="gerar()">Continuar</button>
+</div>
+<div id="msgAguarde" class="oculto">Aguarde, gerando o documento...</div>
+<a id="btnDownloadDocumento" class="oculto" href="/pastadigital/documento.pdf?processo={numero}">Salvar o documento</a>
+<script>
+function gerar() {{
+  document.getElementById('msgAguarde').className = '';
+  setTimeout(function () {{
+    document.getElementById('msgAguarde').className = 'oculto';
+    document.getElementById('btnDownloadDocumento').className = '';
+  }}, {espera_ms});
+}}
+</script>
+</body></html>"""
+
+
+class EstadoMock:
+    def __init__(self, configuracao: ConfiguracaoMock):
+        self.configuracao = configuracao
+        self.lock = threading.Lock()
+        self.sessoes = set()
+        self.consultas = 0
+        self.downloads = 0
+        self.erros_injetados = 0
+        self.sessoes_derrubadas = 0
+        self.modelo_processo = (PASTA_FIXTURES / "processo_completo.html").read_text(encoding="utf-8")
+        self.pagina_consulta = (PASTA_FIXTURES / "consulta.html").read_text(encoding="utf-8")
+
+
+class ManipuladorMock(BaseHTTPRequestHandler):
+    """Rotas do ESAJ usadas pelo robô: login, consulta, processo e pasta digital."""
+
+    estado: EstadoMock = None  # atribuído por criar_servidor
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status: int, corpo: bytes, tipo: str = "text/html; charset=utf-8", cabecalhos=None):
+        self.send_response(status)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _redirecionar(self, destino: str, cabecalhos=None):
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+
+    def _sessao_valida(self) -> bool:
+        cookies = self.headers.get("Cookie", "")
+        encontrado = re.search(r"JSESSIONID=([^;]+)", cookies)
+        with self.estado.lock:
+            return bool(encontrado) and encontrado.group(1) in self.estado.sessoes
+
+    def _exigir_sessao(self) -> bool:
+        if self._sessao_valida():
+            return True
+        self._redirecionar(f"/sajcas/login?service={quote(self.path, safe='')}")
+        return False
+
+    def _esperar(self):
+        configuracao = self.estado.configuracao
+        time.sleep(max(0.0, configuracao.latencia + random.uniform(-1, 1) * configuracao.variacao_latencia))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parametros = {chave: valores[0] for chave, valores in parse_qs(url.query, keep_blank_values=True).items()}
+        self._esperar()
+
+        if url.path == "/sajcas/login":
+            corpo = PAGINA_LOGIN.format(service=parametros.get("service", "/cpopg/abrirConsultaDeRequisitorios.do"))
+            self._responder(200, corpo.encode("utf-8"))
+        elif url.path == "/cpopg/abrirConsultaDeRequisitorios.do":
+            if self._exigir_sessao():
+                self._responder(200, self.estado.pagina_consulta.encode("utf-8"))
+        elif url.path == "/cpopg/search.do":
+            if self._exigir_sessao():
+                self._consultar(parametros)
+        elif url.path == "/pastadigital/abrirPastaProcessoDigital.do":
+            if self._exigir_sessao():
+                corpo = PAGINA_PASTA_DIGITAL.format(
+                    numero=parametros.get("processo.codigo", ""),
+                    espera_ms=int(self.estado.configuracao.tempo_geracao_pdf * 1000),
+                )
+                self._responder(200, corpo.encode("utf-8"))
+        elif url.path == "/pastadigital/documento.pdf":
+            if self._exigir_sessao():
+                numero = parametros.get("processo", "")
+                with self.estado.lock:
+                    self.estado.downloads += 1
+                self._responder(
+                    200,
+                    pdf_do_processo(numero, self.estado.configuracao.paginas_pdf),
+                    "application/pdf",
+                    {"Content-Disposition": f'attachment; filename="{numero}.pdf"'},
+                )
+        else:
+            self._responder(404, b"Not found", "text/plain")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        formulario = {chave: valores[0] for chave, valores in parse_qs(self.rfile.read(tamanho).decode()).items()}
+        if url.path != "/sajcas/login":
+            self._responder(404, b"Not found", "text/plain")
+            return
+        sessao = secrets.token_hex(16)
+        with self.estado.lock:
+            self.estado.sessoes.add(sessao)
+        self._redirecionar(
+            formulario.get("service") or "/cpopg/abrirConsultaDeRequisitorios.do",
+            {"Set-Cookie": f"JSESSIONID={sessao}; Path=/"},
+        )
+
+    def _consultar(self, parametros):
+        configuracao = self.estado.configuracao
+        with self.estado.lock:
+            self.estado.consultas += 1
+            expirar = configuracao.expirar_sessao_a_cada and self.estado.consultas % configuracao.expirar_sessao_a_cada == 0
+            if expirar:
+                self.estado.sessoes.clear()
+                self.estado.sessoes_derrubadas += 1
+        if expirar:
+            self._redirecionar(f"/sajcas/login?service={quote(self.path, safe='')}")
+            return
+        if random.random() < configuracao.taxa_erro:
+            with self.estado.lock:
+                self.estado.erros_injetados += 1
+            self._responder(500, PAGINA_ERRO.encode("utf-8"))
+            return
+
+        # O navegador envia os dígitos crus (sem a máscara do ESAJ); o motor HTTP envia com máscara
+        digitos = re.sub(r"\D", "", parametros.get("numeroDigitoAnoUnificado", ""))
+        foro = re.sub(r"\D", "", parametros.get("foroNumeroUnificado", ""))
+        if len(digitos) != 13 or len(foro) != 4:
+            self._responder(200, PAGINA_NAO_ENCONTRADO.encode("utf-8"))
+            return
+        numero = f"{digitos[:7]}-{digitos[7:9]}.{digitos[9:13]}.8.26.{foro}"
+        if random.Random(_semente(numero)).random() < configuracao.taxa_nao_encontrado:
+            self._responder(200, PAGINA_NAO_ENCONTRADO.encode("utf-8"))
+            return
+        self._responder(200, self._pagina_processo(numero).encode("utf-8"))
+
+    def _pagina_processo(self, numero: str) -> str:
+        return (
+            self.estado.modelo_processo
+            .replace("0000001-45.2020.8.26.0053", numero)
+            .replace("Maria da Silva Souza", nome_ficticio(numero))
+            .replace("Banco Cessionário S/A", nome_ficticio(numero, 1))
+            .replace("processo.codigo=1H000ABC0000", f"processo.codigo={numero}")
+        )
+
+
+def criar_servidor(configuracao: ConfiguracaoMock = None, porta: int = PORTA) -> ThreadingHTTPServer:
+    manipulador = type("ManipuladorConfigurado", (ManipuladorMock,), {"estado": EstadoMock(configuracao or ConfiguracaoMock())})
+    servidor = ThreadingHTTPServer(("127.0.0.1", porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def autenticar_no_mock(url_base: str):
+    """Login automático no servidor de testes; devolve os cookies no formato do Selenium."""
+    import requests
+
+    resposta = requests.post(
+        f"{url_base}/sajcas/login",
+        data={"username": "teste", "password": "teste", "service": "/cpopg/abrirConsultaDeRequisitorios.do"},
+        allow_redirects=False,
+        timeout=10,
+    )
+    sessao = resposta.cookies.get("JSESSIONID")
+    return [{"name": "JSESSIONID", "value": sessao, "domain": "127.0.0.1", "path": "/"}]
+
+
+def executar_carga(total: int = 50, configuracao: ConfiguracaoMock = None, motor: str = "selenium"):
+    """Roda o pool do robo.py contra o servidor local e mede processos/hora de ponta a ponta."""
+    import motor_http
+    import robo
+
+    servidor = criar_servidor(configuracao, porta=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url_base = f"http://127.0.0.1:{servidor.server_address[1]}"
+    pasta = Path(tempfile.mkdtemp(prefix="carga_esaj_"))
+
+    # Aponta o robô para o servidor local
+    robo.URL_LOGIN = f"{url_base}/sajcas/login?service=%2Fcpopg%2FabrirConsultaDeRequisitorios.do"
+    robo.URL_CONSULTA = f"{url_base}/cpopg/abrirConsultaDeRequisitorios.do"
+    robo.HOSTS_PERMITIDOS = ("127.0.0.1",)
+    robo.PASTA_DOWNLOAD = pasta / "downloads"
+    robo.PASTA_PERFIS = pasta / "perfis"
+    robo.ARQUIVO_METRICAS_CSV = pasta / "metricas_etapas.csv"
+    robo.ARQUIVO_METRICAS_PROMETHEUS = pasta / "robo_processos.prom"
+    robo.MOTOR_CONSULTA = motor
+    robo.TAXA_MAXIMA_POR_MINUTO = 100_000  # o ritmo aqui é o do servidor, não o do limitador
+    robo.autenticar = lambda pasta_download: autenticar_no_mock(url_base)
+    motor_http.URL_BASE_ESAJ = url_base
+
+    diario = robo.DiarioExecucao(pasta / "diario.sqlite3")
+    armazem = robo.ArmazemResultados(pasta / "resultados.sqlite3")
+    try:
+        diario.registrar_processos(gerar_numero_cnj(sequencial) for sequencial in range(1, total + 1))
+        inicio = time.monotonic()
+        robo.executar_em_pool(diario.pendentes(), armazem, diario, robo.NUM_WORKERS, robo.NUM_WORKERS_PDF)
+        decorrido = time.monotonic() - inicio
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    estado = servidor.RequestHandlerClass.estado
+    contagens = diario.contagens()
+    print("=" * 80)
+    print(f"CARGA CONTRA O MOCK: {total} processos em {decorrido:.1f} s ({motor})")
+    print(f"  Vazão: {total / decorrido * 3600:.0f} processos/hora")
+    print(f"  Estados: {contagens}")
+    print(f"  Consultas: {estado.consultas} | downloads: {estado.downloads} | "
+          f"erros injetados: {estado.erros_injetados} | sessões derrubadas: {estado.sessoes_derrubadas}")
+    print(f"  Arquivos em {pasta}")
+    diario.fechar()
+    armazem.fechar()
+    return contagens
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "carga":
+        # python mock_esaj.py carga [total] [selenium|http]
+        total = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        motor = sys.argv[3] if len(sys.argv) > 3 else "selenium"
+        executar_carga(total, ConfiguracaoMock(taxa_erro=0.05, expirar_sessao_a_cada=40), motor)
+    else:
+        servidor = criar_servidor()
+        print(f"Mock do ESAJ em http://127.0.0.1:{PORTA} (Ctrl+C para parar)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            servidor.shutdown()
@@ -0,0 +1,110 @@
+import os
+import queue
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # sem watchdog, o monitor cai para varredura periódica
+    FileSystemEventHandler = object
+    Observer = None
+
+
+INTERVALO_VARREDURA = 0.25  # segundos entre varreduras quando não há eventos do sistema
+EXTENSOES_PARCIAIS = (".crdownload", ".tmp", ".part")
+
+
+def download_concluido(nome: str) -> bool:
+    nome = nome.lower()
+    return nome.endswith(".pdf") and not nome.endswith(EXTENSOES_PARCIAIS)
+
+
+class _ReceptorEventos(FileSystemEventHandler):
+    def __init__(self, fila: "queue.Queue[str]"):
+        super().__init__()
+        self.fila = fila
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.fila.put(os.path.basename(event.src_path))
+
+    def on_moved(self, event):
+        # O Chrome grava em ".crdownload" e renomeia para ".pdf" ao terminar
+        if not event.is_directory:
+            self.fila.put(os.path.basename(event.dest_path))
+
+
+class MonitorDownload:
+    """Espera o PDF terminar de baixar numa pasta de download exclusiva do driver.
+
+    Deve ser aberto antes do clique que inicia o download. Usa eventos do sistema
+    de arquivos (watchdog/inotify) quando disponíveis e, sem eles, varre apenas a
+    pasta exclusiva, que só contém o download em curso. A pasta deve ser nova a
+    cada tentativa (robo.preparar_pasta_tentativa): um download que passe do
+    tempo limite continua chegando na pasta antiga.
+
+        with MonitorDownload(pasta) as monitor:
+            clicar(...)
+            nome = monitor.aguardar(timeout)
+    """
+
+    def __init__(self, pasta: Path):
+        self.pasta = Path(pasta)
+        self._fila: "queue.Queue[str]" = queue.Queue()
+        self._observador = None
+        self._existentes: Set[str] = set()
+
+    def __enter__(self) -> "MonitorDownload":
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._existentes = {entrada.name for entrada in os.scandir(self.pasta)}
+        if Observer is not None:
+            self._observador = Observer()
+            self._observador.schedule(_ReceptorEventos(self._fila), str(self.pasta), recursive=False)
+            self._observador.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join(timeout=5)
+            self._observador = None
+        return False
+
+    def _novo_pdf(self, nome: str) -> bool:
+        return (
+            nome not in self._existentes
+            and download_concluido(nome)
+            and (self.pasta / nome).exists()
+        )
+
+    def _varrer(self) -> Optional[str]:
+        for entrada in os.scandir(self.pasta):
+            if self._novo_pdf(entrada.name):
+                return entrada.name
+        return None
+
+    def aguardar(self, timeout: float) -> Optional[str]:
+        """Nome do PDF concluído, ou None se o tempo limite estourar."""
+        prazo = time.monotonic() + timeout
+        while True:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                return self._varrer()
+            if self._observador is not None:
+                try:
+                    nome = self._fila.get(timeout=min(restante, 5))
+                except queue.Empty:
+                    # Salvaguarda contra evento perdido (ex.: pastas de rede)
+                    nome = self._varrer()
+                    if nome:
+                        return nome
+                    continue
+                if self._novo_pdf(nome):
+                    return nome
+            else:
+                nome = self._varrer()
+                if nome:
+                    return nome
+                time.sleep(min(INTERVALO_VARREDURA, restante))
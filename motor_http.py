@@ -0,0 +1,145 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from sessao_esaj import SessaoExpirada, redirecionado_para_login
+
+
+URL_BASE_ESAJ = "https://esaj.tjsp.jus.br"
+CAMINHO_CONSULTA = "/cpopg/abrirConsultaDeRequisitorios.do"
+TAMANHO_POOL_HTTP = 10
+TIMEOUT_HTTP = 30
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+
+class SessaoHTTP:
+    """Sessão requests com pool de conexões e o formulário de consulta já carregado."""
+
+    def __init__(self, url_base: Optional[str] = None, tamanho_pool: int = TAMANHO_POOL_HTTP):
+        # Resolvido na chamada, para que apontar URL_BASE_ESAJ para outro servidor (ex.: mock_esaj) valha
+        self.url_base = (url_base or URL_BASE_ESAJ).rstrip("/")
+        self.http = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool)
+        self.http.mount("http://", adaptador)
+        self.http.mount("https://", adaptador)
+        self.http.headers["User-Agent"] = USER_AGENT
+        self._formulario: Optional[Tuple[str, str, List[Tuple[str, str]]]] = None
+
+    def url(self, caminho: str) -> str:
+        return urljoin(self.url_base + "/", caminho.lstrip("/"))
+
+
+def criar_sessao_http(
+    cookies: List[Dict],
+    url_base: Optional[str] = None,
+    tamanho_pool: int = TAMANHO_POOL_HTTP,
+) -> SessaoHTTP:
+    """Cria a sessão HTTP reaproveitando os cookies do login feito no navegador."""
+    sessao = SessaoHTTP(url_base, tamanho_pool)
+    atualizar_cookies(sessao, cookies)
+    return sessao
+
+
+def atualizar_cookies(sessao: SessaoHTTP, cookies: List[Dict]):
+    """Copia cookies no formato do Selenium (`driver.get_cookies()`) para a sessão."""
+    for cookie in cookies:
+        sessao.http.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+
+def formatar_numero_digito_ano(parte1: str) -> str:
+    """Aplica a máscara NNNNNNN-DD.AAAA que o campo do ESAJ preenche via JavaScript."""
+    return f"{parte1[:7]}-{parte1[7:9]}.{parte1[9:13]}"
+
+
+def _obter(sessao: SessaoHTTP, url: str, params=None) -> requests.Response:
+    resposta = sessao.http.get(url, params=params, timeout=TIMEOUT_HTTP)
+    resposta.raise_for_status()
+    if redirecionado_para_login(resposta.url):
+        raise SessaoExpirada(f"Redirecionado para o login ao abrir {url}")
+    return resposta
+
+
+def carregar_formulario_consulta(sessao: SessaoHTTP) -> Tuple[str, str, List[Tuple[str, str]]]:
+    """Lê a ação e os campos padrão do formulário de consulta (uma vez por sessão)."""
+    if sessao._formulario is not None:
+        return sessao._formulario
+
+    url_consulta = sessao.url(CAMINHO_CONSULTA)
+    resposta = _obter(sessao, url_consulta)
+    soup = BeautifulSoup(resposta.text, "html.parser")
+    campo_numero = soup.find(id="numeroDigitoAnoUnificado")
+    formulario = campo_numero.find_parent("form") if campo_numero else None
+    if not formulario:
+        raise ValueError(f"Formulário de consulta não encontrado em {url_consulta}")
+
+    campos: List[Tuple[str, str]] = []
+    for campo in formulario.find_all(["input", "select"]):
+        nome = campo.get("name")
+        if not nome:
+            continue
+        if campo.name == "select":
+            opcao = campo.find("option", selected=True) or campo.find("option")
+            campos.append((nome, opcao.get("value", "") if opcao else ""))
+            continue
+        tipo = (campo.get("type") or "text").lower()
+        if tipo in ("submit", "button", "image", "reset"):
+            continue
+        if tipo in ("radio", "checkbox") and not campo.has_attr("checked"):
+            continue
+        campos.append((nome, campo.get("value", "")))
+
+    acao = urljoin(resposta.url, formulario.get("action") or resposta.url)
+    metodo = (formulario.get("method") or "get").lower()
+    sessao._formulario = (acao, metodo, campos)
+    return sessao._formulario
+
+
+def consultar_processo(sessao: SessaoHTTP, parte1: str, parte3: str) -> Tuple[str, str]:
+    """Submete a consulta como o navegador faria e devolve (html, url) da página do processo.
+
+    Quando o ESAJ devolve uma listagem em vez do processo, segue o primeiro link.
+    """
+    acao, metodo, campos_padrao = carregar_formulario_consulta(sessao)
+    numero_digito_ano = formatar_numero_digito_ano(parte1)
+    numero_unificado = f"{numero_digito_ano}.8.26.{parte3}"
+
+    campos: List[Tuple[str, str]] = []
+    for nome, valor in campos_padrao:
+        if nome == "numeroDigitoAnoUnificado":
+            valor = numero_digito_ano
+        elif nome == "foroNumeroUnificado":
+            valor = parte3
+        elif nome == "dadosConsulta.valorConsultaNuUnificado" and valor != "UNIFICADO":
+            valor = numero_unificado
+        campos.append((nome, valor))
+
+    if metodo == "post":
+        resposta = sessao.http.post(acao, data=campos, timeout=TIMEOUT_HTTP)
+        resposta.raise_for_status()
+        if redirecionado_para_login(resposta.url):
+            raise SessaoExpirada(f"Redirecionado para o login ao consultar {numero_unificado}")
+    else:
+        resposta = _obter(sessao, acao, params=campos)
+
+    html = resposta.text
+    if 'id="classeProcesso"' not in html and "mensagemErro" not in html:
+        link = re.search(r'<a[^>]+class="[^"]*linkProcesso[^"]*"[^>]+href="([^"]+)"', html)
+        if not link:
+            link = re.search(r'<a[^>]+href="([^"]+)"[^>]+class="[^"]*linkProcesso', html)
+        if link:
+            resposta = _obter(sessao, urljoin(resposta.url, link.group(1).replace("&amp;", "&")))
+            html = resposta.text
+
+    return html, resposta.url
@@ -0,0 +1,274 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from lxml import etree
+except ImportError:  # sem lxml, robo.py volta para o BeautifulSoup
+    etree = None
+
+
+# O BeautifulSoup não devolve em get_text o texto destes elementos nem dos comentários
+TAGS_SEM_TEXTO = {"script", "style", "template"}
+ROTULO_OUTROS_NUMEROS = re.compile("Outros números", re.IGNORECASE)
+PALAVRAS_REQUERENTE = ["REQTE", "REQUERENTE", "EXEQUENTE", "PARTE ATIVA"]
+PALAVRAS_DEVEDOR = ["DEVEDOR", "DEVEDORA", "ENT. DEVEDORA", "REQUERIDO", "EXECUTADO", "PARTE PASSIVA"]
+
+
+def lxml_disponivel() -> bool:
+    return etree is not None
+
+
+def _eh_elemento(no) -> bool:
+    return isinstance(no.tag, str)
+
+
+def _textos(elemento, raiz: bool = True) -> Iterator[str]:
+    """Os textos de `elemento` na ordem do documento, como os strings do BeautifulSoup.
+
+    Um <script> só tem texto quando é o próprio elemento pedido, como no get_text.
+    """
+    if not raiz and elemento.tag in TAGS_SEM_TEXTO:
+        return
+    if elemento.text:
+        yield elemento.text
+    for filho in elemento:
+        if _eh_elemento(filho):
+            yield from _textos(filho, raiz=False)
+        if filho.tail:
+            yield filho.tail
+
+
+def texto(elemento, separador: str = "", strip: bool = False) -> str:
+    """Equivalente a `get_text(separator=..., strip=...)` do BeautifulSoup."""
+    partes = _textos(elemento)
+    if strip:
+        partes = (parte.strip() for parte in partes)
+        return separador.join(parte for parte in partes if parte)
+    return separador.join(partes)
+
+
+def texto_colapsado(elemento) -> str:
+    return " ".join(texto(elemento, " ").split())
+
+
+def _conteudo(elemento) -> Iterator:
+    """Filhos de `elemento` intercalados com os textos soltos, como `Tag.contents`.
+
+    Comentários viram texto, como no BeautifulSoup (Comment é um str).
+    """
+    if elemento.text:
+        yield elemento.text
+    for filho in elemento:
+        yield filho if _eh_elemento(filho) else (filho.text or "")
+        if filho.tail:
+            yield filho.tail
+
+
+def _irmaos_seguintes(elemento) -> Iterator:
+    if elemento.tail:
+        yield elemento.tail
+    for irmao in elemento.itersiblings():
+        yield irmao if _eh_elemento(irmao) else (irmao.text or "")
+        if irmao.tail:
+            yield irmao.tail
+
+
+def _string_unico(elemento) -> Optional[str]:
+    """Equivalente a `Tag.string`: o texto do único filho, descendo por filhos únicos."""
+    filhos = list(elemento)
+    if not filhos:
+        return elemento.text
+    if len(filhos) > 1 or elemento.text or filhos[0].tail:
+        return None
+    if not _eh_elemento(filhos[0]):
+        return filhos[0].text
+    return _string_unico(filhos[0])
+
+
+def _classes(elemento) -> List[str]:
+    return (elemento.get("class") or "").split()
+
+
+def _descendentes(elemento, *tags: str):
+    return [no for no in elemento.iter(*tags) if no is not elemento]
+
+
+def _primeiro_descendente(elemento, tag: str, classe: Optional[str] = None):
+    for no in elemento.iter(tag):
+        if no is not elemento and (classe is None or classe in _classes(no)):
+            return no
+    return None
+
+
+class ArvoreLxml:
+    """Página do processo parseada uma vez pelo lxml, com índice de ids.
+
+    Reproduz exatamente as extrações feitas sobre o BeautifulSoup em robo.py
+    (ArvoreBS4), em uma fração do tempo; teste_parsers.py confere os dois contra
+    a saída capturada da versão de referência (fixtures/esaj/*.esperado.json).
+    """
+
+    def __init__(self, html: str):
+        self._raiz = None
+        self._ids: Dict[str, list] = {}
+        if html:
+            parser = etree.HTMLParser(encoding="utf-8")
+            self._raiz = etree.fromstring(html.encode("utf-8"), parser)
+        if self._raiz is not None:
+            for no in self._raiz.iter():
+                if _eh_elemento(no):
+                    element_id = no.get("id")
+                    if element_id is not None:
+                        self._ids.setdefault(element_id, []).append(no)
+
+    def existe(self, element_id: str) -> bool:
+        return element_id in self._ids
+
+    def texto(self, element_id: str) -> str:
+        elementos = self._ids.get(element_id)
+        return texto_colapsado(elementos[0]) if elementos else ""
+
+    def mensagem_erro(self) -> Optional[str]:
+        if self._raiz is None:
+            return None
+        for no in self._raiz.iter():
+            if _eh_elemento(no) and "mensagemErro" in _classes(no):
+                return texto_colapsado(no)
+        return None
+
+    def _tabela(self, element_id: str, tag: Optional[str] = None):
+        for elemento in self._ids.get(element_id, []):
+            if tag is None or elemento.tag == tag:
+                return elemento
+        return None
+
+    def outros_numeros(self) -> str:
+        if self._raiz is None:
+            return ""
+        for span in self._raiz.iter("span"):
+            string = _string_unico(span)
+            if string is not None and ROTULO_OUTROS_NUMEROS.search(string):
+                break
+        else:
+            return ""
+        div_conteudo = next((ancestral for ancestral in span.iterancestors("div")), None)
+        if div_conteudo is None:
+            return ""
+        div_texto = _primeiro_descendente(div_conteudo, "div")
+        return texto(div_texto, strip=True) if div_texto is not None else ""
+
+    def movimentacoes(self) -> str:
+        tabela = self._tabela("tabelaUltimasMovimentacoes")
+        if tabela is None:
+            return ""
+        linhas = [texto(linha, " ", strip=True) for linha in _descendentes(tabela, "tr")]
+        return "\n".join(filter(None, linhas))
+
+    def partes(self) -> Tuple[List[str], List[str], List[str], List[str], Dict[str, str]]:
+        tabela = self._tabela("tablePartesPrincipais", "table")
+        if tabela is None:
+            return [], [], [], [], {}
+        return extrair_partes(tabela)
+
+
+def extrair_partes(tabela) -> Tuple[List[str], List[str], List[str], List[str], Dict[str, str]]:
+    """Porta de `extrair_partes_arvore` (robo.py) para o lxml: só a leitura das linhas
+    muda; a classificação é a mesma, em `classificar_partes`."""
+    return classificar_partes(_linhas_partes(tabela))
+
+
+def _linhas_partes(tabela) -> Iterator[Tuple[str, List[str], Optional[str], List[str]]]:
+    for linha in _descendentes(tabela, "tr"):
+        celulas = _descendentes(linha, "td", "th")
+        if not celulas or all(celula.tag == "th" for celula in celulas):
+            continue
+        tds = [celula for celula in celulas if celula.tag == "td"]
+        if not tds:
+            continue
+
+        span_tipo = _primeiro_descendente(linha, "span", "tipoDeParticipacao")
+        tipo_original = texto(span_tipo, strip=True) if span_tipo is not None else ""
+
+        informacoes_linha = [t for t in (texto(celula, " ", strip=True) for celula in tds) if t]
+
+        td_nome = _primeiro_descendente(linha, "td", "nomeParteEAdvogado")
+        nome_parte = None
+        advogados_local: List[str] = []
+        if td_nome is not None:
+            nome_parts: List[str] = []
+            for item in _conteudo(td_nome):
+                if isinstance(item, str):
+                    t = item.strip()
+                else:
+                    if item.tag == "br" or (item.tag == "span" and "mensagemExibindo" in _classes(item)):
+                        break
+                    t = texto(item, strip=True)
+                if t:
+                    nome_parts.append(t)
+            nome_parte = " ".join(nome_parts).strip() if nome_parts else None
+
+            for span in _descendentes(td_nome, "span"):
+                if "mensagemExibindo" not in _classes(span):
+                    continue
+                if "ADVOGAD" in texto(span).strip().upper():
+                    for irmao in _irmaos_seguintes(span):
+                        s = irmao.strip() if isinstance(irmao, str) else texto(irmao, strip=True)
+                        if s:
+                            advogados_local.append(s)
+                            break
+
+        yield tipo_original, informacoes_linha, nome_parte, advogados_local
+
+
+def classificar_partes(
+    linhas: Iterable[Tuple[str, List[str], Optional[str], List[str]]],
+) -> Tuple[List[str], List[str], List[str], List[str], Dict[str, str]]:
+    """Regras de classificação das partes, comuns aos backends BeautifulSoup e lxml.
+
+    Recebe, por linha da tabela de partes, (tipo de participação, textos das
+    células, nome da parte ou None, advogados) e separa requerentes, devedores,
+    os advogados de cada lado e as colunas dinâmicas dos demais tipos.
+    """
+    requerentes, devedores = [], []
+    advogados_req, advogados_dev = [], []
+    # estrutura para armazenar colunas dinâmicas: cada chave terá 'valores' e 'advogados'
+    partes_em_colunas: Dict[str, Dict[str, List[str]]] = {}
+    # Tipos que já são tratados separadamente (não criar colunas adicionais)
+    tipos_ignorados = PALAVRAS_REQUERENTE + PALAVRAS_DEVEDOR
+
+    for tipo_original, informacoes_linha, nome_parte, advogados_local in linhas:
+        tipo = tipo_original.upper()
+        if nome_parte:
+            if any(palavra in tipo for palavra in PALAVRAS_REQUERENTE):
+                requerentes.append(nome_parte)
+                advogados_req.extend(advogados_local)
+            elif any(palavra in tipo for palavra in PALAVRAS_DEVEDOR):
+                devedores.append(nome_parte)
+                advogados_dev.extend(advogados_local)
+
+        # Para tipos adicionais (não requerente/devedor), cria colunas dinâmicas
+        if tipo_original and not any(palavra in tipo for palavra in tipos_ignorados):
+            informacoes_limpas = [info for info in informacoes_linha if info.strip()]
+            if informacoes_limpas:
+                chave_coluna = informacoes_limpas[0]
+                # Prefere o nome extraído (limpo) como valor; se não existir, usa o texto bruto das células
+                if nome_parte:
+                    valor_coluna = nome_parte
+                else:
+                    valor_coluna = " | ".join(informacoes_limpas[1:]) if len(informacoes_limpas) > 1 else ""
+                blocos = partes_em_colunas.setdefault(chave_coluna, {"valores": [], "advogados": []})
+                if valor_coluna:
+                    blocos["valores"].append(valor_coluna)
+                blocos["advogados"].extend(a for a in advogados_local if a)
+
+    # formata o dicionário final: cria colunas para valores e para advogados separados
+    partes_em_colunas_formatadas: Dict[str, str] = {}
+    for chave, blocos in partes_em_colunas.items():
+        valores = [v for v in blocos["valores"] if v]
+        advs = [a for a in blocos["advogados"] if a]
+        if valores:
+            partes_em_colunas_formatadas[chave] = " | ".join(valores)
+        if advs:
+            partes_em_colunas_formatadas[f"{chave} - Advogados"] = " | ".join(advs)
+
+    return requerentes, devedores, advogados_req, advogados_dev, partes_em_colunas_formatadas
@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+from typing import Callable, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+class PoliticaRetentativa:
+    """Retentativas com espera exponencial e jitter, decididas pelo tipo da exceção.
+
+    Exceções em `permanentes` nunca são repetidas, mesmo que também sejam
+    subclasses de alguma transitória (ex.: NoSuchElementException é uma
+    WebDriverException). Exceções fora das duas listas também não são repetidas.
+    """
+
+    def __init__(
+        self,
+        tentativas: int = 3,
+        espera_base: float = 1.0,
+        fator: float = 2.0,
+        espera_maxima: float = 30.0,
+        jitter: float = 0.5,
+        transitorias: Tuple[Type[BaseException], ...] = (),
+        permanentes: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.tentativas = tentativas
+        self.espera_base = espera_base
+        self.fator = fator
+        self.espera_maxima = espera_maxima
+        self.jitter = jitter
+        self.transitorias = transitorias
+        self.permanentes = permanentes
+
+    def transitoria(self, erro: BaseException) -> bool:
+        if isinstance(erro, self.permanentes):
+            return False
+        return isinstance(erro, self.transitorias)
+
+    def espera(self, tentativa: int) -> float:
+        """Espera antes da tentativa seguinte à `tentativa` (1 = após a primeira falha)."""
+        espera = min(self.espera_maxima, self.espera_base * self.fator ** (tentativa - 1))
+        return espera * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def executar(self, funcao: Callable[[], T], ao_falhar: Optional[Callable[[BaseException], None]] = None) -> T:
+        """Executa `funcao`, repetindo falhas transitórias; a última falha é relançada."""
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                return funcao()
+            except BaseException as erro:
+                if not self.transitoria(erro) or tentativa == self.tentativas:
+                    raise
+                if ao_falhar is not None:
+                    ao_falhar(erro)
+                time.sleep(self.espera(tentativa))
+        raise RuntimeError("PoliticaRetentativa configurada com zero tentativas")
+
+
+class DisjuntorCircuito:
+    """Pausa todos os workers quando as falhas consecutivas passam do limite.
+
+    Aberto, `aguardar_liberacao` segura quem chamar até o fim da pausa; depois
+    disso o circuito fica meio-aberto e uma nova falha o reabre na hora, com a
+    pausa dobrada (até `pausa_maxima`). Um sucesso fecha o circuito.
+    """
+
+    def __init__(self, limite_falhas: int, pausa: float, pausa_maxima: Optional[float] = None):
+        self.limite_falhas = limite_falhas
+        self.pausa = pausa
+        self.pausa_maxima = pausa_maxima or pausa * 8
+        self._lock = threading.Lock()
+        self._falhas_consecutivas = 0
+        self._pausa_atual = pausa
+        self._liberado_em = 0.0
+        self._meio_aberto = False
+
+    @property
+    def aberto(self) -> bool:
+        return time.monotonic() < self._liberado_em
+
+    @property
+    def pausa_atual(self) -> float:
+        return self._pausa_atual
+
+    def aguardar_liberacao(self):
+        while True:
+            with self._lock:
+                restante = self._liberado_em - time.monotonic()
+            if restante <= 0:
+                return
+            time.sleep(min(restante, 5))
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._falhas_consecutivas = 0
+            self._pausa_atual = self.pausa
+            self._meio_aberto = False
+
+    def registrar_falha(self) -> bool:
+        """Conta uma falha; retorna True se esta falha abriu o circuito."""
+        with self._lock:
+            if self.aberto:
+                return False
+            self._falhas_consecutivas += 1
+            if self._meio_aberto:
+                self._pausa_atual = min(self.pausa_maxima, self._pausa_atual * 2)
+            elif self._falhas_consecutivas < self.limite_falhas:
+                return False
+            self._liberado_em = time.monotonic() + self._pausa_atual
+            self._falhas_consecutivas = 0
+            self._meio_aberto = True
+            return True
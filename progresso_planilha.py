@@ -0,0 +1,55 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def impressao_pdf(caminho_pdf) -> str:
+    """Identifica a versão do PDF sem lê-lo: tamanho e data de modificação."""
+    estado = os.stat(caminho_pdf)
+    return f"{estado.st_size}:{estado.st_mtime_ns}"
+
+
+class ProgressoPlanilha:
+    """Diário (JSON Lines) das linhas já processadas de uma planilha do roboCPF.
+
+    Cada linha processada é acrescentada e sincronizada em disco na hora, então a
+    planilha pode ser gravada só de tempos em tempos: o que ainda não foi salvo
+    nela é recuperado do diário na próxima execução. Guarda, por processo, a
+    impressão do PDF lido e os valores escritos em cada coluna de CPF/CNPJ.
+    """
+
+    def __init__(self, caminho: Path):
+        self.caminho = Path(caminho)
+        self._arquivo = None
+
+    def carregar(self) -> Dict[str, Dict]:
+        """Última entrada de cada processo. Regrava o diário só com elas (compacta)."""
+        entradas: Dict[str, Dict] = {}
+        if self.caminho.exists():
+            with open(self.caminho, encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    try:
+                        entrada = json.loads(linha)
+                    except json.JSONDecodeError:
+                        continue  # última linha cortada por uma interrupção
+                    entradas[entrada["processo"]] = entrada
+            temporario = self.caminho.with_name(self.caminho.name + ".tmp")
+            with open(temporario, "w", encoding="utf-8") as arquivo:
+                for entrada in entradas.values():
+                    arquivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            temporario.replace(self.caminho)
+        self._arquivo = open(self.caminho, "a", encoding="utf-8")
+        return entradas
+
+    def registrar(self, processo: str, impressao: str, valores: Dict[str, str], erro: Optional[str] = None):
+        entrada = {"processo": processo, "pdf": impressao, "valores": valores, "erro": erro, "em": time.time()}
+        self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
@@ -1,14 +1,19 @@
 import os
+import queue
 import re
+import shutil
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import openpyxl
-import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple
+import requests
 import logging
 from logging.handlers import RotatingFileHandler
 from bs4 import BeautifulSoup
-from openpyxl.styles import Font
 from selenium import webdriver
 from selenium.common.exceptions import (
     ElementClickInterceptedException,
@@ -27,6 +32,25 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from webdriver_manager.chrome import ChromeDriverManager
 
+import metricas
+import motor_http
+import parser_esaj
+from arquivo_html import ArquivoHTML, descomprimir
+from armazem_resultados import ArmazemResultados
+from cache_processos import METADADOS, PDF, CacheProcessos, hash_arquivo
+from entrada_processos import RelatorioEntrada, carregar_processos
+from diario_execucao import CONCLUIDO, EM_ANDAMENTO, FALHA, PDF_PENDENTE, PENDENTE, DiarioExecucao
+from limitador_taxa import (
+    SINAL_ERRO,
+    SINAL_MENSAGEM_ERRO,
+    SINAL_SESSAO,
+    SINAL_TIMEOUT,
+    LimitadorAdaptativo,
+)
+from monitor_downloads import MonitorDownload
+from politica_retentativa import DisjuntorCircuito, PoliticaRetentativa
+from sessao_esaj import CoordenadorSessao, ParticipanteSessao, SessaoExpirada, redirecionado_para_login
+
 
 CAMINHO_PLANILHA = Path("XXXXXXX")
 PASTA_DOWNLOAD = Path("XXXXXXX")
@@ -36,20 +60,44 @@ URL_LOGIN = (
 )
 URL_CONSULTA = "https://esaj.tjsp.jus.br/cpopg/abrirConsultaDeRequisitorios.do"
 TEMPO_DOWNLOAD = 90
-#GAP_ENTRE_PROCESSOS = 3  # segundos: pequena pausa entre cada processo
-#PAUSA_2_MINUTOS = 120  # segundos: pausa longa de 2 minutos entre processos
+NUM_WORKERS = 4  # limite de navegadores Chrome consultando em paralelo
+NUM_WORKERS_PDF = 2  # navegadores dedicados ao download da pasta digital (0 = baixa junto da consulta; PDFs pendentes de antes ainda abrem 1)
+MODO_DRIVER = "enxuto"  # "completo": Chrome visível carregando a página inteira, para quando o enxuto falhar
+PARSER_HTML = "lxml"  # "bs4": BeautifulSoup, mais lento; usado também quando o lxml não está instalado
+MOTOR_CONSULTA = "selenium"  # "http": consulta via requests; o navegador só baixa a pasta digital
+# Ritmo das consultas: o limitador adapta a taxa entre o mínimo e o máximo conforme a saúde do ESAJ
+TAXA_MAXIMA_POR_MINUTO = 30
+TAXA_MINIMA_POR_MINUTO = 1
+LATENCIA_ALVO = 10  # segundos por consulta; acima disso a taxa é reduzida
+PASSADAS_ADIADAS = 2  # novas passadas, no fim do lote, pelos processos com falha transitória
+LIMITE_FALHAS_CONSECUTIVAS = 5  # falhas seguidas que abrem o disjuntor e pausam todos os workers
+PAUSA_DISJUNTOR = 120  # segundos
 LOG_ARQUIVO = Path("erros_processos.log")
 NOME_ARQUIVO_RESULTADOS = "resultados_processos.xlsx"
+ARQUIVO_ARMAZEM = Path("resultados_processos.sqlite3")
+ARQUIVO_DIARIO = Path("diario_execucao.sqlite3")
+ARQUIVO_PAGINAS = Path("paginas_processos.sqlite3")  # HTML bruto de cada consulta, para reprocessar offline
+PROCESSOS_REPROCESSAMENTO = os.cpu_count() or 2
+# Cache de frescor: metadados e PDF obtidos há menos que o TTL (segundos) não são buscados de novo.
+# None = nunca expira; 0 = sempre busca de novo
+ARQUIVO_CACHE = Path("cache_processos.sqlite3")
+TTL_METADADOS = 7 * 24 * 3600
+TTL_PDF = None
+# Tempos por etapa: resumo impresso a cada INTERVALO_RELATORIO segundos e exportado nestes arquivos
+INTERVALO_RELATORIO = 60
+ARQUIVO_METRICAS_CSV = Path("metricas_etapas.csv")
+ARQUIVO_METRICAS_PROMETHEUS = Path("robo_processos.prom")
+# Perfis do Chrome mantidos entre execuções: com a sessão ainda válida, o login manual é dispensado
+PASTA_PERFIS = Path("perfis_chrome")
+# Modo enxuto: só estes hosts resolvem; o resto (analytics, CDNs de fontes, ...) nem é consultado
+HOSTS_PERMITIDOS = ("esaj.tjsp.jus.br",)
+RECURSOS_BLOQUEADOS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp3", "*.mp4", "*.webm", "*.ogg",
+]
 logger = logging.getLogger("robo_processos")
 
-def carregar_processos(caminho: Path, limite: Optional[int] = None) -> List[str]:
-    df = pd.read_excel(caminho)
-    serie = df["Processo"].dropna().astype(str)
-    if limite:
-        serie = serie.iloc[:limite]
-    return serie.tolist()
-
-
 def separar_numero_processo(numero: str) -> Tuple[str, str]:
     numero_limpo = re.sub(r"[.-]", "", numero)
     if len(numero_limpo) != 20:
@@ -57,27 +105,108 @@ def separar_numero_processo(numero: str) -> Tuple[str, str]:
     return numero_limpo[:13], numero_limpo[16:]
 
 
-def inicializar_driver() -> Chrome:
-    PASTA_DOWNLOAD.mkdir(parents=True, exist_ok=True)
+@lru_cache(maxsize=1)
+def caminho_chromedriver() -> str:
+    # Instala uma única vez: vários drivers iniciados em paralelo disputariam o download
+    return ChromeDriverManager().install()
+
+
+def inicializar_driver(
+    pasta_download: Path = PASTA_DOWNLOAD,
+    modo: str = MODO_DRIVER,
+    perfil: Optional[Path] = None,
+) -> Chrome:
+    """Abre um Chrome que baixa em `pasta_download`, usando o diretório `perfil` se informado.
+
+    No modo "enxuto" o navegador roda headless, numa janela menor, sem esperar
+    o carregamento completo da página (os elementos são aguardados um a um) e
+    sem baixar imagens, fontes, mídia nem nada fora de HOSTS_PERMITIDOS.
+    """
+    pasta_download.mkdir(parents=True, exist_ok=True)
+    enxuto = modo == "enxuto"
 
     options = Options()
-    options.add_argument("--start-maximized")
     options.add_argument("--disable-notifications")
     options.add_argument("--disable-infobars")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
+    if perfil is not None:
+        # Um perfil por navegador: o Chrome trava o diretório enquanto está aberto
+        perfil.mkdir(parents=True, exist_ok=True)
+        options.add_argument(f"--user-data-dir={perfil.resolve()}")
+    if enxuto:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1280,900")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--mute-audio")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        excecoes = ", ".join(f"EXCLUDE {host}" for host in HOSTS_PERMITIDOS)
+        options.add_argument(f"--host-resolver-rules=MAP * ~NOTFOUND, {excecoes}")
+        options.page_load_strategy = "eager"
+    else:
+        options.add_argument("--start-maximized")
 
     prefs = {
-        "download.default_directory": str(PASTA_DOWNLOAD),
+        "download.default_directory": str(pasta_download),
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True,
         "plugins.always_open_pdf_externally": True,
     }
+    if enxuto:
+        prefs["profile.managed_default_content_settings.images"] = 2
     options.add_experimental_option("prefs", prefs)
 
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
+    service = Service(caminho_chromedriver())
+    driver = webdriver.Chrome(service=service, options=options)
+    if enxuto:
+        # Headless ignora parte das prefs de download; a pasta é liberada via CDP
+        driver.execute_cdp_cmd(
+            "Browser.setDownloadBehavior",
+            {"behavior": "allow", "downloadPath": str(pasta_download.resolve()), "eventsEnabled": True},
+        )
+        bloquear_recursos(driver)
+    return driver
+
+
+def bloquear_recursos(driver: Chrome):
+    """Bloqueia RECURSOS_BLOQUEADOS na aba atual. O bloqueio do CDP vale por aba:
+    cada janela nova (a pasta digital abre numa) precisa recebê-lo de novo."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": RECURSOS_BLOQUEADOS})
+
+
+def autenticar(pasta_download: Path) -> List[Dict]:
+    """Abre um Chrome visível no perfil de login e devolve os cookies da sessão.
+
+    O login manual só é pedido se o perfil não tiver mais uma sessão válida.
+    """
+    driver = inicializar_driver(pasta_download, modo="completo", perfil=PASTA_PERFIS / "login")
+    try:
+        driver.get(URL_CONSULTA)
+        if redirecionado_para_login(driver.current_url):
+            driver.get(URL_LOGIN)
+            input("Faça o login manualmente e pressione ENTER para continuar...")
+            driver.get(URL_CONSULTA)
+        return driver.get_cookies()
+    finally:
+        driver.quit()
+
+
+def verificar_sessao(driver: Chrome):
+    if redirecionado_para_login(driver.current_url):
+        raise SessaoExpirada(f"Redirecionado para o login: {driver.current_url}")
+
+
+def aplicar_cookies(driver: Chrome, cookies: List[Dict]):
+    """Replica no driver os cookies de uma sessão já autenticada."""
+    driver.get(URL_CONSULTA)
+    driver.delete_all_cookies()
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except WebDriverException as erro:
+            logger.warning("Cookie %s não copiado: %s", cookie.get("name"), erro)
 
 
 def aguardar(
@@ -103,17 +232,17 @@ def clicar_com_retentativa(
     timeout: int = 15,
     tentativas: int = 3,
 ):
-    ultimo_erro: Optional[Exception] = None
-    for tentativa in range(1, tentativas + 1):
-        try:
-            elemento = aguardar(driver, locator, EC.element_to_be_clickable, timeout)
-            elemento.click()
-            return
-        except (ElementClickInterceptedException, StaleElementReferenceException, TimeoutException) as erro:
-            ultimo_erro = erro
-            time.sleep(tentativa)
-    if ultimo_erro:
-        raise ultimo_erro
+    politica = PoliticaRetentativa(
+        tentativas=tentativas,
+        espera_base=1.0,
+        transitorias=(ElementClickInterceptedException, StaleElementReferenceException, TimeoutException),
+    )
+
+    def _clicar():
+        elemento = aguardar(driver, locator, EC.element_to_be_clickable, timeout)
+        elemento.click()
+
+    politica.executar(_clicar)
 
 
 def extrair_texto_por_id(driver, element_id, timeout = 10) -> str:
@@ -139,6 +268,15 @@ def extrair_texto_por_id(driver, element_id, timeout = 10) -> str:
     except TimeoutException:
         return ""
 
+def extrair_texto_html(soup: BeautifulSoup, element_id: str) -> str:
+    """Equivalente a `extrair_texto_por_id` lendo um HTML já carregado: como o `.text`
+    do Selenium (texto renderizado), &nbsp; vira espaço e os espaços são colapsados."""
+    elemento = soup.find(id=element_id)
+    if not elemento:
+        return ""
+    return " ".join(elemento.get_text(separator=" ").split())
+
+
 def extrair_html(driver: Chrome, locator: Tuple[str, str], timeout: int = 10) -> str:
     try:
         elemento = aguardar(driver, locator, EC.presence_of_element_located, timeout)
@@ -159,7 +297,10 @@ def aguardar_resultado_consulta(driver: Chrome, timeout: int = 25):
 def extrair_outros_numeros(html: str) -> str:
     if not html:
         return ""
-    soup = BeautifulSoup(html, "html.parser")
+    return extrair_outros_numeros_arvore(BeautifulSoup(html, "html.parser"))
+
+
+def extrair_outros_numeros_arvore(soup: BeautifulSoup) -> str:
     span_rotulo = soup.find("span", string=re.compile("Outros números", re.IGNORECASE))
     if not span_rotulo:
         return ""
@@ -177,20 +318,19 @@ def extrair_partes(
         return [], [], [], [], {}
 
     soup = BeautifulSoup(html, "html.parser")
-    tabela = soup.find("table", id="tablePartesPrincipais") or soup
-    requerentes, devedores = [], []
-    advogados_req, advogados_dev = [], []
-
-    # estrutura para armazenar colunas dinâmicas: cada chave terá 'valores' e 'advogados'
-    partes_em_colunas: Dict[str, Dict[str, List[str]]] = {}
-
-    # Tipos que já são tratados separadamente (não criar colunas adicionais)
-    tipos_ignorados = {
-        "REQTE", "REQUERENTE", "EXEQUENTE", "PARTE ATIVA",
-        "DEVEDOR", "DEVEDORA", "ENT. DEVEDORA", "REQUERIDO",
-        "EXECUTADO", "PARTE PASSIVA"
-    }
+    return extrair_partes_arvore(soup.find("table", id="tablePartesPrincipais") or soup)
 
+
+def extrair_partes_arvore(
+    tabela,
+) -> Tuple[List[str], List[str], List[str], List[str], Dict[str, str]]:
+    """Mesma extração de `extrair_partes` sobre uma tabela já parseada."""
+    return parser_esaj.classificar_partes(linhas_partes_arvore(tabela))
+
+
+def linhas_partes_arvore(tabela) -> Iterator[Tuple[str, List[str], Optional[str], List[str]]]:
+    """Lê cada linha da tabela de partes: (tipo, textos das células, nome, advogados).
+    As regras de requerente/devedor ficam em parser_esaj.classificar_partes."""
     for linha in tabela.find_all("tr"):
         celulas = linha.find_all(["td", "th"])
         if not celulas:
@@ -207,7 +347,6 @@ def extrair_partes(
         # Extrai o tipo de participação
         span_tipo = linha.find("span", class_="tipoDeParticipacao")
         tipo_original = span_tipo.get_text(strip=True) if span_tipo else ""
-        tipo = tipo_original.upper()
 
         # Extrai todas as informações da linha (texto de cada célula)
         informacoes_linha: List[str] = []
@@ -257,59 +396,16 @@ def extrair_partes(
                                 advogados_local.append(s)
                                 break
 
-        # Mantém lógica original para requerentes e devedores
-        if nome_parte:
-            if any(palavra in tipo for palavra in ["REQTE", "REQUERENTE", "EXEQUENTE", "PARTE ATIVA"]):
-                requerentes.append(nome_parte)
-                if advogados_local:
-                    advogados_req.extend(advogados_local)
-            elif any(palavra in tipo for palavra in [
-                "DEVEDOR", "DEVEDORA", "ENT. DEVEDORA", "REQUERIDO", "EXECUTADO", "PARTE PASSIVA",
-            ]):
-                devedores.append(nome_parte)
-                if advogados_local:
-                    advogados_dev.extend(advogados_local)
-
-        # Para tipos adicionais (não requerente/devedor), cria colunas dinâmicas
-        if tipo_original and not any(palavra in tipo for palavra in tipos_ignorados):
-            informacoes_limpas = [info for info in informacoes_linha if info.strip()]
-            if informacoes_limpas:
-                chave_coluna = informacoes_limpas[0]
-                # Prefere o nome extraído (limpo) como valor; se não existir, usa o texto bruto das células
-                if nome_parte:
-                    valor_coluna = nome_parte
-                else:
-                    valor_coluna = " | ".join(informacoes_limpas[1:]) if len(informacoes_limpas) > 1 else ""
-
-                if chave_coluna not in partes_em_colunas:
-                    partes_em_colunas[chave_coluna] = {"valores": [], "advogados": []}
-
-                # adiciona o valor (nome ou outras informações)
-                if valor_coluna:
-                    partes_em_colunas[chave_coluna]["valores"].append(valor_coluna)
-
-                # adiciona advogados separados, se houver
-                for a in advogados_local:
-                    if a:
-                        partes_em_colunas[chave_coluna]["advogados"].append(a)
-
-    # formata o dicionário final: cria colunas para valores e para advogados separados
-    partes_em_colunas_formatadas: Dict[str, str] = {}
-    for chave, blocos in partes_em_colunas.items():
-        valores = [v for v in blocos.get("valores", []) if v]
-        advs = [a for a in blocos.get("advogados", []) if a]
-        if valores:
-            partes_em_colunas_formatadas[chave] = " | ".join(valores)
-        if advs:
-            partes_em_colunas_formatadas[f"{chave} - Advogados"] = " | ".join(advs)
-
-    return requerentes, devedores, advogados_req, advogados_dev, partes_em_colunas_formatadas
+        yield tipo_original, informacoes_linha, nome_parte, advogados_local
 
 def extrair_movimentacoes(html: str) -> str:
     if not html:
         return ""
-    soup = BeautifulSoup(html, "html.parser")
-    linhas = [linha.get_text(separator=" ", strip=True) for linha in soup.find_all("tr")]
+    return extrair_movimentacoes_arvore(BeautifulSoup(html, "html.parser"))
+
+
+def extrair_movimentacoes_arvore(tabela) -> str:
+    linhas = [linha.get_text(separator=" ", strip=True) for linha in tabela.find_all("tr")]
     return "\n".join(filter(None, linhas))
 
 
@@ -317,21 +413,58 @@ def abrir_pasta_digital(driver: Chrome):
     clicar_com_retentativa(driver, (By.ID, "linkPasta"))
     time.sleep(1.5)
     driver.switch_to.window(driver.window_handles[-1])
+    if MODO_DRIVER == "enxuto":
+        bloquear_recursos(driver)
+
+
+PREFIXO_PASTA_TENTATIVA = ".download_"
 
 
-def baixar_pdf(driver: Chrome) -> Optional[str]:
-    clicar_com_retentativa(driver, (By.ID, "selecionarButton"), timeout=25)
-    clicar_com_retentativa(driver, (By.ID, "salvarButton"), timeout=25)
+def preparar_pasta_tentativa(driver: Chrome, pasta_download: Path) -> Path:
+    """Aponta os downloads do driver para uma pasta nova, só desta tentativa.
+
+    O Chrome mantém o destino de um download já iniciado: um PDF que termine
+    depois do tempo limite cai na pasta da tentativa abandonada, nunca na do
+    próximo processo. As pastas abandonadas de tentativas anteriores são apagadas.
+    """
+    for entrada in os.scandir(pasta_download):
+        if entrada.is_dir() and entrada.name.startswith(PREFIXO_PASTA_TENTATIVA):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+    pasta = pasta_download / f"{PREFIXO_PASTA_TENTATIVA}{time.time_ns()}"
+    pasta.mkdir(parents=True)
+    driver.execute_cdp_cmd(
+        "Browser.setDownloadBehavior",
+        {"behavior": "allow", "downloadPath": str(pasta.resolve()), "eventsEnabled": True},
+    )
+    return pasta
+
 
-    clicar_com_retentativa(driver, (By.ID, "opcao1"), timeout=15)
+def baixar_pdf(driver: Chrome, pasta_download: Path = PASTA_DOWNLOAD) -> Optional[str]:
+    with metricas.medir("selecao_documentos"):
+        clicar_com_retentativa(driver, (By.ID, "selecionarButton"), timeout=25)
+        clicar_com_retentativa(driver, (By.ID, "salvarButton"), timeout=25)
 
-    botao_continuar = aguardar(driver, (By.ID, "botaoContinuar"), EC.visibility_of_element_located, 20)
-    ActionChains(driver).move_to_element(botao_continuar).pause(0.5).click().perform()
+        clicar_com_retentativa(driver, (By.ID, "opcao1"), timeout=15)
 
-    aguardar(driver, (By.ID, "msgAguarde"), EC.invisibility_of_element_located, 40)
-    clicar_com_retentativa(driver, (By.ID, "btnDownloadDocumento"), timeout=25)
+        botao_continuar = aguardar(driver, (By.ID, "botaoContinuar"), EC.visibility_of_element_located, 20)
+        ActionChains(driver).move_to_element(botao_continuar).pause(0.5).click().perform()
 
-    return aguardar_download(PASTA_DOWNLOAD, TEMPO_DOWNLOAD)
+    with metricas.medir("geracao_pdf"):
+        aguardar(driver, (By.ID, "msgAguarde"), EC.invisibility_of_element_located, 40)
+    pasta_tentativa = preparar_pasta_tentativa(driver, pasta_download)
+    # O monitor é armado antes do clique para não perder um download rápido
+    with metricas.medir("download"), MonitorDownload(pasta_tentativa) as monitor:
+        clicar_com_retentativa(driver, (By.ID, "btnDownloadDocumento"), timeout=25)
+        nome_pdf = monitor.aguardar(TEMPO_DOWNLOAD)
+
+    if not nome_pdf:
+        # A pasta fica para trás com o que ainda chegar e é apagada na próxima tentativa
+        print("Tempo limite atingido. Nenhum PDF encontrado.")
+        return None
+    print(f"PDF baixado: {nome_pdf}")
+    nome_pdf = mover_para_pasta_download(pasta_tentativa / nome_pdf)
+    shutil.rmtree(pasta_tentativa, ignore_errors=True)
+    return nome_pdf
 
 
 def fechar_abas_extras(driver: Chrome):
@@ -342,20 +475,36 @@ def fechar_abas_extras(driver: Chrome):
     driver.switch_to.window(driver.window_handles[0])
 
 
-def aguardar_download(pasta: Path, timeout: int = 60) -> Optional[str]:
-    tempo_inicial = time.time()
-    existentes = {arquivo.name for arquivo in pasta.glob("*.pdf")}
+def mover_para_pasta_download(arquivo: Path) -> str:
+    """Move o PDF da pasta do worker para PASTA_DOWNLOAD sem sobrescrever outro arquivo.
+
+    O nome é reservado criando o destino com O_EXCL: dois workers que baixem PDFs
+    de mesmo nome ao mesmo tempo nunca escolhem o mesmo destino. A pasta do worker
+    fica dentro de PASTA_DOWNLOAD, então o os.replace sobre a reserva é um rename.
+    """
+    contador = 0
+    while True:
+        sufixo = f" ({contador})" if contador else ""
+        destino = PASTA_DOWNLOAD / f"{arquivo.stem}{sufixo}{arquivo.suffix}"
+        try:
+            os.close(os.open(str(destino), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            contador += 1
+    os.replace(str(arquivo), str(destino))
+    return destino.name
+
+
+def formatar_link_pdf(caminho_pdf: Optional[str]) -> str:
+    if not caminho_pdf:
+        return "Não baixado"
+    return f'=HYPERLINK("{Path(PASTA_DOWNLOAD, caminho_pdf)}", "{Path(PASTA_DOWNLOAD, caminho_pdf)}")'
 
-    while time.time() - tempo_inicial < timeout:
-        for arquivo in pasta.glob("*.pdf"):
-            if arquivo.name not in existentes:
-                if not arquivo.name.endswith(".crdownload"):
-                    print(f"PDF baixado: {arquivo.name}")
-                    return arquivo.name
-        time.sleep(1)
 
-    print("Tempo limite atingido. Nenhum PDF encontrado.")
-    return None
+def caminho_do_link_pdf(link: str) -> Optional[Path]:
+    """Inverso de formatar_link_pdf: o caminho do PDF gravado na coluna PDF, se houver."""
+    encontrado = re.match(r'=HYPERLINK\("([^"]+)"', link or "")
+    return Path(encontrado.group(1)) if encontrado else None
 
 
 def construir_resultado(
@@ -383,12 +532,6 @@ def construir_resultado(
     status: str = "OK",
     partes_em_colunas: Optional[Dict[str, str]] = None,
 ) -> Dict[str, str]:
-    link_pdf = (
-        f'=HYPERLINK("{Path(PASTA_DOWNLOAD, caminho_pdf)}", "{Path(PASTA_DOWNLOAD, caminho_pdf)}")'
-        if caminho_pdf
-        else "Não baixado"
-    )
-
     resultado = {
         "numero_processo": processo,
         "Status": status,
@@ -411,7 +554,7 @@ def construir_resultado(
         "Incidentes, acoes incidentais, recursos e execucoes de sentencas": incidentes,
         "Apensos, Entranhados e Unificados": apensos,
         "Audiencias": audiencias,
-        "PDF": link_pdf,
+        "PDF": formatar_link_pdf(caminho_pdf),
     }
 
     if partes_em_colunas:
@@ -454,77 +597,290 @@ def registrar_erro(processo: str, erro: Exception) -> Dict[str, str]:
     )
 
 
-def processar_processo(driver: Chrome, processo: str) -> Dict[str, str]:
-    parte1, parte3 = separar_numero_processo(processo)
+def registrar_nao_encontrado(processo: str, mensagem: str) -> Dict[str, str]:
+    try:
+        logger.info("Processo %s não encontrado | %s", processo, mensagem)
+    except Exception:
+        pass
+    print(f"Processo não encontrado {processo}: {mensagem}")
+    return construir_resultado(
+        processo=processo,
+        classe="Não encontrado",
+        assunto="Não encontrado",
+        foro="",
+        vara="",
+        juiz="",
+        data_hora="",
+        controle="",
+        area="",
+        valor="",
+        outros_numeros="",
+        requerentes=[],
+        advogados_req=[],
+        devedores=[],
+        advogados_dev=[],
+        movimentacoes=mensagem,
+        peticoes="",
+        incidentes="",
+        apensos="",
+        audiencias="",
+        caminho_pdf=None,
+        status=STATUS_NAO_ENCONTRADO,
+        partes_em_colunas={},
+    )
 
-    driver.get(URL_CONSULTA)
-    preencher_campo(driver, (By.ID, "numeroDigitoAnoUnificado"), parte1)
-    preencher_campo(driver, (By.ID, "foroNumeroUnificado"), parte3)
-
-    clicar_com_retentativa(driver, (By.ID, "botaoConsultarProcessos"))
-    aguardar_resultado_consulta(driver)
-
-    html_pagina = driver.page_source
-    outros_numeros = extrair_outros_numeros(html_pagina)
-
-    classe = extrair_texto_por_id(driver, "classeProcesso")
-    assunto = extrair_texto_por_id(driver, "assuntoProcesso")
-    foro = extrair_texto_por_id(driver, "foroProcesso")
-    vara = extrair_texto_por_id(driver, "varaProcesso")
-    juiz = extrair_texto_por_id(driver, "juizProcesso")
-    data_hora = extrair_texto_por_id(driver, "dataHoraDistribuicaoProcesso")
-    controle = extrair_texto_por_id(driver, "numeroControleProcesso")
-    area = extrair_texto_por_id(driver, "areaProcesso")
-    valor = extrair_texto_por_id(driver, "valorAcaoProcesso")
-
-    peticoes = extrair_texto_por_id(driver, "processoSemDiversas")
-    incidentes = extrair_texto_por_id(driver, "processoSemIncidentes")
-    apensos = extrair_texto_por_id(driver, "dadosApensosNaoDisponiveis")
-    audiencias = extrair_texto_por_id(driver, "processoSemAudiencias")
-
-    html_partes = extrair_html(driver, (By.ID, "tablePartesPrincipais"))
+
+# Campos de texto simples da página do processo: argumento de construir_resultado -> id
+CAMPOS_PROCESSO = {
+    "classe": "classeProcesso",
+    "assunto": "assuntoProcesso",
+    "foro": "foroProcesso",
+    "vara": "varaProcesso",
+    "juiz": "juizProcesso",
+    "data_hora": "dataHoraDistribuicaoProcesso",
+    "controle": "numeroControleProcesso",
+    "area": "areaProcesso",
+    "valor": "valorAcaoProcesso",
+    "peticoes": "processoSemDiversas",
+    "incidentes": "processoSemIncidentes",
+    "apensos": "dadosApensosNaoDisponiveis",
+    "audiencias": "processoSemAudiencias",
+}
+
+
+STATUS_NAO_ENCONTRADO = "NAO ENCONTRADO"
+TEXTO_PDF_PENDENTE = "PDF pendente"
+
+
+class PaginaIncompleta(Exception):
+    """A consulta devolveu uma página sem os dados do processo e sem mensagem de erro
+    (login, página em branco, snapshot pela metade): nada a gravar, vale nova tentativa."""
+
+
+class ArvoreBS4:
+    """Página do processo parseada uma vez pelo BeautifulSoup (backend de referência).
+
+    Mesma interface de parser_esaj.ArvoreLxml: todos os extratores usam a mesma árvore.
+    """
+
+    def __init__(self, html: str):
+        self.soup = BeautifulSoup(html or "", "html.parser")
+
+    def existe(self, element_id: str) -> bool:
+        return self.soup.find(id=element_id) is not None
+
+    def texto(self, element_id: str) -> str:
+        return extrair_texto_html(self.soup, element_id)
+
+    def mensagem_erro(self) -> Optional[str]:
+        erro = self.soup.select_one(".mensagemErro")
+        return " ".join(erro.get_text(separator=" ").split()) if erro else None
+
+    def outros_numeros(self) -> str:
+        return extrair_outros_numeros_arvore(self.soup)
+
+    def partes(self) -> Tuple[List[str], List[str], List[str], List[str], Dict[str, str]]:
+        tabela_partes = self.soup.find("table", id="tablePartesPrincipais")
+        return extrair_partes_arvore(tabela_partes) if tabela_partes else ([], [], [], [], {})
+
+    def movimentacoes(self) -> str:
+        tabela_movimentacoes = self.soup.find(id="tabelaUltimasMovimentacoes")
+        return extrair_movimentacoes_arvore(tabela_movimentacoes) if tabela_movimentacoes else ""
+
+
+def criar_arvore(html: str, parser: str = PARSER_HTML):
+    if parser == "lxml" and parser_esaj.lxml_disponivel():
+        return parser_esaj.ArvoreLxml(html)
+    return ArvoreBS4(html)
+
+
+def classificar_pagina(arvore) -> Dict:
+    """Classifica o resultado da consulta uma única vez: encontrado, não encontrado
+    ou incompleto.
+
+    Só a página de detalhe tem `classeProcesso`: sem ele, a página é de "não
+    encontrado" se trouxer `.mensagemErro` e incompleta (`incompleta`) se não
+    trouxer nenhum dos dois. `ids_presentes` diz quais elementos existem no
+    snapshot; só esses justificam uma espera no WebDriver.
+    """
+    ids_monitorados = list(CAMPOS_PROCESSO.values()) + [
+        "tablePartesPrincipais",
+        "tabelaUltimasMovimentacoes",
+        "linkPasta",
+    ]
+    ids_presentes = {element_id for element_id in ids_monitorados if arvore.existe(element_id)}
+    erro = arvore.mensagem_erro()
+    encontrado = "classeProcesso" in ids_presentes
+    return {
+        "encontrado": encontrado,
+        "incompleta": not encontrado and erro is None,
+        "mensagem_erro": erro or "",
+        "ids_presentes": ids_presentes,
+    }
+
+
+def extrair_dados_html(html: str, parser: str = PARSER_HTML) -> Dict:
+    """Extrai da página do processo todos os argumentos de construir_resultado.
+
+    O HTML é parseado uma única vez (lxml ou BeautifulSoup, conforme `parser`) e
+    a mesma árvore alimenta a classificação e todos os extratores. Campos
+    ausentes no HTML voltam vazios.
+    """
+    arvore = criar_arvore(html, parser)
+    classificacao = classificar_pagina(arvore)
+    dados: Dict = {
+        campo: arvore.texto(element_id)
+        for campo, element_id in CAMPOS_PROCESSO.items()
+    }
+    dados["_classificacao"] = classificacao
+    if not classificacao["encontrado"]:
+        return dados
+
+    dados["outros_numeros"] = arvore.outros_numeros()
     (
-        requerentes,
-        devedores,
-        advogados_req,
-        advogados_dev,
-        partes_em_colunas,
-    ) = extrair_partes(html_partes)
+        dados["requerentes"],
+        dados["devedores"],
+        dados["advogados_req"],
+        dados["advogados_dev"],
+        dados["partes_em_colunas"],
+    ) = arvore.partes()
+    dados["movimentacoes"] = arvore.movimentacoes()
+    return dados
+
+
+def completar_dados_pelo_driver(driver: Chrome, dados: Dict) -> Dict:
+    """Lê ao vivo, pelo WebDriver, apenas campos presentes no snapshot mas ainda sem texto.
+
+    Elementos que a classificação não encontrou (ex.: a mensagem "Não há petições"
+    quando o processo tem petições) não custam espera nenhuma.
+    """
+    ids_presentes = dados["_classificacao"]["ids_presentes"]
+    for campo, element_id in CAMPOS_PROCESSO.items():
+        if not dados[campo] and element_id in ids_presentes:
+            dados[campo] = extrair_texto_por_id(driver, element_id)
+    return dados
+
+
+def dados_para_resultado(dados: Dict) -> Dict:
+    """Remove as marcações internas de extrair_dados_html antes de construir_resultado."""
+    return {chave: valor for chave, valor in dados.items() if not chave.startswith("_")}
+
+
+def consultar_processo_navegador(driver: Chrome, processo: str) -> Tuple[Dict, str]:
+    """Preenche e submete a consulta no navegador; devolve os dados e a URL do processo."""
+    parte1, parte3 = separar_numero_processo(processo)
 
-    html_movimentacoes = extrair_html(driver, (By.ID, "tabelaUltimasMovimentacoes"))
-    movimentacoes = extrair_movimentacoes(html_movimentacoes)
+    with metricas.medir("navegacao"):
+        driver.get(URL_CONSULTA)
+        verificar_sessao(driver)
+    with metricas.medir("preenchimento"):
+        preencher_campo(driver, (By.ID, "numeroDigitoAnoUnificado"), parte1)
+        preencher_campo(driver, (By.ID, "foroNumeroUnificado"), parte3)
 
-    caminho_pdf = None
+    with metricas.medir("submissao"):
+        clicar_com_retentativa(driver, (By.ID, "botaoConsultarProcessos"))
+        try:
+            aguardar_resultado_consulta(driver)
+        except TimeoutException:
+            # A sessão pode cair entre abrir o formulário e submeter a consulta
+            verificar_sessao(driver)
+            raise
+
+    # Um único snapshot alimenta todos os campos; o driver só é consultado para o que faltar
+    with metricas.medir("extracao"):
+        html_pagina = driver.page_source
+        dados = extrair_dados_html(html_pagina)
+        if dados["_classificacao"]["encontrado"]:
+            dados = completar_dados_pelo_driver(driver, dados)
+    dados["_html"] = html_pagina
+    return dados, driver.current_url
+
+
+def consultar_processo_http(sessao: motor_http.SessaoHTTP, processo: str) -> Tuple[Dict, str]:
+    """Consulta o processo por HTTP, sem passar pelo navegador."""
+    parte1, parte3 = separar_numero_processo(processo)
+    with metricas.medir("consulta_http"):
+        html_pagina, url_processo = motor_http.consultar_processo(sessao, parte1, parte3)
+    with metricas.medir("extracao"):
+        dados = extrair_dados_html(html_pagina)
+    dados["_html"] = html_pagina
+    return dados, url_processo
+
+
+def baixar_pasta_digital(driver: Chrome, url_processo: Optional[str], pasta_download: Path) -> Optional[str]:
+    """Abre a pasta digital do processo (navegando até ele, se preciso) e baixa o PDF."""
     try:
-        abrir_pasta_digital(driver)
-        caminho_pdf = baixar_pdf(driver)
+        with metricas.medir("abrir_pasta"):
+            if url_processo and driver.current_url != url_processo:
+                driver.get(url_processo)
+                verificar_sessao(driver)
+            abrir_pasta_digital(driver)
+        return baixar_pdf(driver, pasta_download)
     finally:
         fechar_abas_extras(driver)
 
-    return construir_resultado(
-        processo=processo,
-        classe=classe,
-        assunto=assunto,
-        foro=foro,
-        vara=vara,
-        juiz=juiz,
-        data_hora=data_hora,
-        controle=controle,
-        area=area,
-        valor=valor,
-        outros_numeros=outros_numeros,
-        requerentes=requerentes,
-        advogados_req=advogados_req,
-        devedores=devedores,
-        advogados_dev=advogados_dev,
-        movimentacoes=movimentacoes,
-        peticoes=peticoes,
-        incidentes=incidentes,
-        apensos=apensos,
-        audiencias=audiencias,
-        caminho_pdf=caminho_pdf,
-        partes_em_colunas=partes_em_colunas,
-    )
+
+def processar_processo(
+    driver: Optional[Chrome],
+    processo: str,
+    pasta_download: Path = PASTA_DOWNLOAD,
+    sessao: Optional[motor_http.SessaoHTTP] = None,
+    adiar_pdf: bool = False,
+    limitador: Optional[LimitadorAdaptativo] = None,
+    arquivo: Optional[ArquivoHTML] = None,
+    pdf_em_cache: Optional[str] = None,
+) -> Tuple[Dict[str, str], Optional[str], Optional[str]]:
+    """Consulta o processo e baixa a pasta digital.
+
+    Com `sessao`, a consulta é feita por HTTP e o navegador só baixa o PDF. Com
+    `adiar_pdf`, o PDF não é baixado aqui: o resultado sai com o PDF pendente e a
+    URL do processo é devolvida para o estágio de download. O `limitador` dita o
+    ritmo das consultas e recebe a latência e o resultado de cada uma. Com
+    `arquivo`, o HTML da página é guardado para reprocessamento. Com
+    `pdf_em_cache` (PDF ainda fresco), o resultado aponta para ele e nada é
+    baixado. Retorna (resultado, url_pdf_pendente, pdf_baixado_agora).
+    """
+    if limitador is not None:
+        with metricas.medir("espera_limitador"):
+            limitador.adquirir()
+    inicio = time.monotonic()
+    if sessao is not None:
+        dados, url_processo = consultar_processo_http(sessao, processo)
+    else:
+        dados, url_processo = consultar_processo_navegador(driver, processo)
+
+    classificacao = dados["_classificacao"]
+    if classificacao["incompleta"]:
+        # Nem dados nem mensagem de erro: não é um "não encontrado" e não pode virar linha OK
+        if sessao is None:
+            verificar_sessao(driver)
+        raise PaginaIncompleta(f"Página sem classeProcesso nem mensagem de erro: {url_processo}")
+    if arquivo is not None:
+        with metricas.medir("arquivo_html"):
+            arquivo.guardar(processo, dados["_html"], url_processo)
+
+    if limitador is not None:
+        if classificacao["encontrado"]:
+            limitador.registrar_sucesso(time.monotonic() - inicio)
+        else:
+            limitador.registrar_sinal(SINAL_MENSAGEM_ERRO)
+    if not classificacao["encontrado"]:
+        return registrar_nao_encontrado(processo, classificacao["mensagem_erro"]), None, None
+
+    if "linkPasta" not in classificacao["ids_presentes"]:
+        return construir_resultado(processo=processo, caminho_pdf=None, **dados_para_resultado(dados)), None, None
+
+    if pdf_em_cache:
+        return construir_resultado(processo=processo, caminho_pdf=pdf_em_cache, **dados_para_resultado(dados)), None, None
+
+    if adiar_pdf:
+        resultado = construir_resultado(processo=processo, caminho_pdf=None, **dados_para_resultado(dados))
+        resultado["PDF"] = TEXTO_PDF_PENDENTE
+        return resultado, url_processo, None
+
+    caminho_pdf = baixar_pasta_digital(driver, url_processo if sessao is not None else None, pasta_download)
+    resultado = construir_resultado(processo=processo, caminho_pdf=caminho_pdf, **dados_para_resultado(dados))
+    return resultado, None, caminho_pdf
 
 
 def obter_colunas_resultado() -> List[str]:
@@ -555,110 +911,532 @@ def obter_colunas_resultado() -> List[str]:
     ]
 
 
-def inicializar_arquivo_resultados(nome_arquivo: str):
-    """Cria o arquivo Excel com os cabeçalhos se não existir."""
-    if Path(nome_arquivo).exists():
-        return
-    
-    # Cria um novo workbook usando openpyxl diretamente
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
-    # Adiciona os cabeçalhos
-    colunas = obter_colunas_resultado()
-    for col_idx, coluna in enumerate(colunas, start=1):
-        cell = ws.cell(row=1, column=col_idx, value=coluna)
-        cell.font = Font(bold=True)
-    
-    # Salva o arquivo
-    wb.save(nome_arquivo)
-    wb.close()
-    print(f"Arquivo de resultados criado: {nome_arquivo}")
+def exportar_resultados(armazem: ArmazemResultados, nome_arquivo: str = NOME_ARQUIVO_RESULTADOS):
+    """Gera o xlsx de resultados a partir do armazém, numa única passada."""
+    total = armazem.exportar_xlsx(nome_arquivo, obter_colunas_resultado())
+    print(f"{total} resultados exportados para {nome_arquivo}")
+
+
+def abrir_armazem(caminho: Path = ARQUIVO_ARMAZEM) -> ArmazemResultados:
+    """Abre o armazém; na primeira vez importa o xlsx de resultados de execuções anteriores."""
+    novo = not caminho.exists()
+    armazem = ArmazemResultados(caminho)
+    if novo and Path(NOME_ARQUIVO_RESULTADOS).exists():
+        importados = armazem.importar_xlsx(NOME_ARQUIVO_RESULTADOS)
+        print(f"{importados} resultados anteriores importados de {NOME_ARQUIVO_RESULTADOS}")
+    return armazem
+
+
+# Falhas de processo que valem nova tentativa no fim do lote; número inválido nunca vale
+POLITICA_PROCESSOS = PoliticaRetentativa(
+    tentativas=PASSADAS_ADIADAS + 1,
+    espera_base=30.0,
+    espera_maxima=300.0,
+    transitorias=(
+        TimeoutException,
+        StaleElementReferenceException,
+        ElementClickInterceptedException,
+        WebDriverException,
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.HTTPError,
+        SessaoExpirada,
+        PaginaIncompleta,
+    ),
+    permanentes=(ValueError, NoSuchElementException),
+)
+
+
+def reprocessar_pagina(item: Tuple[str, bytes]) -> Optional[Dict[str, str]]:
+    """Refaz o resultado de um processo a partir do HTML arquivado (roda no pool de processos).
+
+    None se a página arquivada estiver incompleta: o resultado atual é mantido.
+    """
+    processo, html_comprimido = item
+    dados = extrair_dados_html(descomprimir(html_comprimido))
+    classificacao = dados["_classificacao"]
+    if classificacao["incompleta"]:
+        return None
+    if not classificacao["encontrado"]:
+        return registrar_nao_encontrado(processo, classificacao["mensagem_erro"])
+    return construir_resultado(processo=processo, caminho_pdf=None, **dados_para_resultado(dados))
+
+
+def reprocessar_arquivo(
+    arquivo: ArquivoHTML,
+    armazem: ArmazemResultados,
+    num_processos: int = PROCESSOS_REPROCESSAMENTO,
+    tamanho_lote: int = 2000,
+) -> int:
+    """Reaplica os extratores atuais à última página arquivada de cada processo, sem acessar o ESAJ.
+
+    Os novos resultados entram no armazém como novas versões; a coluna PDF da
+    versão anterior é mantida, já que o download não é refeito.
+    """
+    pdfs = {resultado["numero_processo"]: resultado.get("PDF", "") for resultado in armazem.iterar_resultados()}
+    total = arquivo.total()
+    feitos = 0
+    paginas = arquivo.iterar_paginas()
+    with ProcessPoolExecutor(max_workers=num_processos) as executor:
+        # Em lotes: executor.map enviaria todo o arquivo para a memória de uma vez
+        while True:
+            lote = list(islice(paginas, tamanho_lote))
+            if not lote:
+                break
+            resultados = [
+                resultado
+                for resultado in executor.map(
+                    reprocessar_pagina, lote, chunksize=max(1, len(lote) // (num_processos * 4))
+                )
+                if resultado is not None
+            ]
+            for resultado in resultados:
+                if resultado["numero_processo"] in pdfs:
+                    resultado["PDF"] = pdfs[resultado["numero_processo"]]
+            feitos += armazem.gravar_varios(resultados)
+            print(f"Reprocessados {feitos}/{total}")
+    print(f"Reprocessamento concluído: {feitos} processos.")
+    return feitos
+
+
+def sinal_da_excecao(erro: Exception) -> str:
+    """Traduz a falha de um processo no sinal de saúde correspondente para o limitador."""
+    if isinstance(erro, (TimeoutException, requests.Timeout)):
+        return SINAL_TIMEOUT
+    if isinstance(erro, SessaoExpirada):
+        return SINAL_SESSAO
+    return SINAL_ERRO
+
+
+def registrar_no_disjuntor(disjuntor: DisjuntorCircuito, erro: Optional[Exception]):
+    if erro is None or not POLITICA_PROCESSOS.transitoria(erro):
+        disjuntor.registrar_sucesso()
+    elif disjuntor.registrar_falha():
+        print(f"Muitas falhas seguidas: todos os workers pausados por {disjuntor.pausa_atual:.0f} s.")
+        logger.warning("Disjuntor aberto após falhas consecutivas | %s: %s", type(erro).__name__, erro)
+
+
+def reaplicar_sessao(driver: Optional[Chrome], sessao: Optional[motor_http.SessaoHTTP], cookies: List[Dict]):
+    """Troca os cookies do driver (e da sessão HTTP do worker) pelos do novo login."""
+    if driver is not None:
+        aplicar_cookies(driver, cookies)
+    if sessao is not None:
+        motor_http.atualizar_cookies(sessao, cookies)
+
+
+def hash_do_pdf(processo: str, caminho_pdf: Optional[str]) -> Optional[str]:
+    """Hash do PDF recém-baixado, calculado na thread do worker: a principal só grava."""
+    if not caminho_pdf:
+        return None
+    try:
+        return hash_arquivo(Path(PASTA_DOWNLOAD, caminho_pdf))
+    except OSError as e:
+        logger.warning("PDF do processo %s fora do cache: %s", processo, e)
+        return None
 
 
-def adicionar_resultado_ao_excel(resultado: Dict[str, str], nome_arquivo: str):
-    """Adiciona uma linha ao arquivo Excel existente."""
+def registrar_no_cache(
+    cache: CacheProcessos,
+    processo: str,
+    caminho_pdf: Optional[str],
+    hash_pdf: Optional[str],
+    metadados: bool = True,
+):
+    """Marca como frescos os metadados e/ou o PDF recém-obtidos (thread principal).
+
+    O PDF só entra com o hash já calculado pelo worker (hash_do_pdf).
+    """
+    if metadados:
+        cache.registrar(processo, METADADOS)
+    if caminho_pdf and hash_pdf:
+        try:
+            cache.registrar_pdf(processo, Path(PASTA_DOWNLOAD, caminho_pdf), hash_conteudo=hash_pdf)
+        except OSError as e:
+            logger.warning("PDF do processo %s fora do cache: %s", processo, e)
+
+
+def reabrir_vencidos(cache: CacheProcessos, diario: DiarioExecucao, processos: List[str]) -> int:
+    """Processos da entrada desta execução já concluídos, mas com os metadados além do
+    TTL, voltam à fila do diário. Concluídos de entradas antigas ficam como estão."""
+    concluidos = set(diario.concluidos())
+    return diario.reabrir(cache.expirados([p for p in processos if p in concluidos], METADADOS))
+
+
+def pdfs_no_disco(armazem: ArmazemResultados, processos: List[str]) -> Dict[str, Path]:
+    """Onde está o PDF de cada processo: o caminho gravado na coluna PDF (o nome dado
+    pelo ESAJ) ou, sem ele, `{processo}.pdf` em PASTA_DOWNLOAD (buscar_pdfs.py)."""
+    links = armazem.valores_da_coluna("PDF")
+    caminhos: Dict[str, Path] = {}
+    for processo in processos:
+        caminho = caminho_do_link_pdf(links.get(processo, "")) or PASTA_DOWNLOAD / f"{processo}.pdf"
+        if caminho.exists():
+            caminhos[processo] = caminho
+    return caminhos
+
+
+def planejar_pelo_cache(
+    cache: CacheProcessos,
+    processos: List[str],
+    armazem: ArmazemResultados,
+    diario: DiarioExecucao,
+    estagio_pdf: bool = True,
+) -> Tuple[List[str], List[Tuple[str, str]], Dict[str, str]]:
+    """Separa os processos pendentes conforme o que ainda está fresco no cache.
+
+    Metadados e PDF frescos: o processo é concluído sem acessar o ESAJ. Só os
+    metadados frescos (com a URL do processo conhecida e `estagio_pdf`): vai
+    direto para o download. Só o PDF fresco: a consulta é feita, mas a pasta
+    digital não é baixada de novo. Retorna (a consultar, (processo, url) para
+    baixar, processo -> PDF em cache).
+    """
+    a_consultar: List[str] = []
+    a_baixar: List[Tuple[str, str]] = []
+    pdfs_em_cache: Dict[str, str] = {}
+    agora = time.time()
+    for processo in processos:
+        metadados_frescos = cache.fresco(processo, METADADOS, agora)
+        pdf_fresco = cache.fresco(processo, PDF, agora)
+        if metadados_frescos and pdf_fresco:
+            armazem.atualizar_campos(processo, {"PDF": formatar_link_pdf(cache.caminho_pdf(processo).name)})
+            diario.concluir(processo)
+            continue
+        url_processo = diario.url_processo(processo) if metadados_frescos and estagio_pdf else None
+        if url_processo:
+            diario.aguardar_pdf(processo, url_processo)
+            a_baixar.append((processo, url_processo))
+            continue
+        if pdf_fresco:
+            pdfs_em_cache[processo] = cache.caminho_pdf(processo).name
+        a_consultar.append(processo)
+    return a_consultar, a_baixar, pdfs_em_cache
+
+
+def executar_worker(
+    id_worker: int,
+    driver: Optional[Chrome],
+    pasta_download: Path,
+    fila: "queue.Queue[str]",
+    fila_pdf: "Optional[queue.Queue[Optional[Tuple[str, str]]]]",
+    eventos: "queue.Queue[Tuple]",
+    limitador: LimitadorAdaptativo,
+    disjuntor: DisjuntorCircuito,
+    participante: ParticipanteSessao,
+    sessao: Optional[motor_http.SessaoHTTP],
+    arquivo: Optional[ArquivoHTML],
+    total: int,
+    pdfs_em_cache: Optional[Dict[str, str]] = None,
+):
+    """Consome a fila de processos com um driver próprio até ela esvaziar.
+
+    Com `fila_pdf`, o download da pasta digital fica para o estágio de PDF e o
+    worker segue para o próximo processo assim que os metadados saem. Se a
+    sessão expirar no meio de um processo, o worker espera o novo login
+    (`participante`) e repete o mesmo processo. Os processos em `pdfs_em_cache`
+    só têm os metadados consultados. O worker não grava no diário: cada mudança
+    de estado do processo vai como evento para a thread principal.
+    """
+    pdfs_em_cache = pdfs_em_cache or {}
+    try:
+        while True:
+            try:
+                processo = fila.get_nowait()
+            except queue.Empty:
+                return
+            print(
+                f"[worker {id_worker}] Processando {total - fila.qsize()}/{total} - processo: {processo}"
+                f" (taxa {limitador.taxa_por_minuto:.1f}/min)"
+            )
+            disjuntor.aguardar_liberacao()
+            eventos.put(("inicio", processo))
+            erro: Optional[Exception] = None
+            url_pdf: Optional[str] = None
+            caminho_pdf: Optional[str] = None
+            try:
+                with metricas.processo_atual(processo), metricas.medir("processo_total"):
+                    resultado, url_pdf, caminho_pdf = participante.executar(
+                        lambda: processar_processo(
+                            driver, processo, pasta_download, sessao,
+                            adiar_pdf=fila_pdf is not None, limitador=limitador, arquivo=arquivo,
+                            pdf_em_cache=pdfs_em_cache.get(processo),
+                        )
+                    )
+            except Exception as e:
+                # Selenium, HTTP, número inválido ou erro inesperado: nenhum pode derrubar
+                # a thread e deixar o lote pendurado
+                erro = e
+                limitador.registrar_sinal(sinal_da_excecao(erro))
+                resultado = registrar_erro(processo, erro)
+            registrar_no_disjuntor(disjuntor, erro)
+            # Os metadados entram na fila de eventos antes do pedido de PDF, garantindo
+            # que a thread principal grave a linha antes de receber o PDF dela
+            eventos.put(("metadados", resultado, erro, url_pdf, caminho_pdf, hash_do_pdf(processo, caminho_pdf)))
+            if url_pdf and fila_pdf is not None:
+                fila_pdf.put((processo, url_pdf))
+    finally:
+        eventos.put(("fim", "metadados"))
+
+
+def executar_worker_pdf(
+    id_worker: int,
+    driver: Chrome,
+    pasta_download: Path,
+    fila_pdf: "queue.Queue[Optional[Tuple[str, str]]]",
+    eventos: "queue.Queue[Tuple]",
+    limitador: LimitadorAdaptativo,
+    disjuntor: DisjuntorCircuito,
+    participante: ParticipanteSessao,
+):
+    """Estágio de download: baixa a pasta digital dos processos já consultados."""
+    try:
+        while True:
+            item = fila_pdf.get()
+            if item is None:
+                return
+            processo, url_processo = item
+            print(f"[pdf {id_worker}] Baixando pasta digital do processo {processo}")
+            erro: Optional[Exception] = None
+            caminho_pdf: Optional[str] = None
+            try:
+                disjuntor.aguardar_liberacao()
+                limitador.adquirir()
+                with metricas.processo_atual(processo), metricas.medir("pdf_total"):
+                    caminho_pdf = participante.executar(lambda: baixar_pasta_digital(driver, url_processo, pasta_download))
+            except Exception as e:
+                erro = e
+                limitador.registrar_sinal(sinal_da_excecao(erro))
+                try:
+                    logger.error("Falha no PDF do processo %s | %s: %s", processo, type(e).__name__, e)
+                except Exception:
+                    pass
+                print(f"Erro ao baixar o PDF de {processo}: {type(e).__name__}: {e}")
+            registrar_no_disjuntor(disjuntor, erro)
+            eventos.put(("pdf", processo, caminho_pdf, hash_do_pdf(processo, caminho_pdf), erro))
+    finally:
+        eventos.put(("fim", "pdf"))
+
+
+def executar_em_pool(
+    processos: List[str],
+    armazem: ArmazemResultados,
+    diario: DiarioExecucao,
+    num_workers: int = NUM_WORKERS,
+    num_workers_pdf: int = NUM_WORKERS_PDF,
+    pdfs_pendentes: Optional[List[Tuple[str, str]]] = None,
+    arquivo: Optional[ArquivoHTML] = None,
+    cache: Optional[CacheProcessos] = None,
+    pdfs_em_cache: Optional[Dict[str, str]] = None,
+):
+    """Distribui os processos entre vários Chrome que compartilham um único login.
+
+    Os workers de metadados consultam os processos; com `num_workers_pdf` > 0, os
+    downloads da pasta digital correm num estágio separado, com drivers próprios,
+    e os metadados são gravados na hora com o PDF pendente. Com o motor HTTP e o
+    estágio de PDF, os workers de metadados nem abrem navegador: só o estágio de
+    PDF usa o Selenium. Cada driver baixa em sua própria subpasta de
+    PASTA_DOWNLOAD; apenas a thread principal grava no armazém e no diário. `pdfs_pendentes` são (processo, url) de execuções
+    anteriores que só precisam do download.
+
+    Falhas transitórias (POLITICA_PROCESSOS) não viram linha de ERRO: voltam para
+    uma fila adiada, consultada de novo ao fim da passada, até PASSADAS_ADIADAS vezes.
+
+    Com `cache`, cada metadado e PDF obtido é registrado nele; os processos em
+    `pdfs_em_cache` (processo -> PDF fresco) não baixam a pasta digital de novo.
+    """
+    pdfs_pendentes = pdfs_pendentes or []
+    num_workers = max(1, min(num_workers, len(processos))) if processos else 0
+    if num_workers_pdf > 0:
+        num_workers_pdf = max(1, min(num_workers_pdf, len(processos) + len(pdfs_pendentes)))
+    total_drivers = num_workers + num_workers_pdf
+    pastas = [PASTA_DOWNLOAD / f".worker_{indice}" for indice in range(1, total_drivers + 1)]
+    drivers: List[Optional[Chrome]] = []
+    # Pelo HTTP, o worker de metadados só precisaria do navegador para baixar o PDF
+    metadados_sem_driver = MOTOR_CONSULTA == "http" and num_workers_pdf > 0
+    coletor = metricas.MetricasExecucao(len(processos), ARQUIVO_METRICAS_CSV, ARQUIVO_METRICAS_PROMETHEUS)
+    metricas.ativar(coletor)
+    coletor.iniciar_relatorios(INTERVALO_RELATORIO)
+
     try:
-        # Carrega o workbook existente (data_only=False para preservar fórmulas)
-        wb = openpyxl.load_workbook(nome_arquivo, data_only=False)
-        ws = wb.active
-        
-        # Garante que os cabeçalhos base existam
-        cabecalhos_existentes = [
-            celula.value for celula in next(ws.iter_rows(min_row=1, max_row=1))
+        # O login (manual, se preciso) acontece num navegador visível à parte, que
+        # volta a ser aberto pelo coordenador sempre que a sessão expirar
+        pasta_login = PASTA_DOWNLOAD / ".login"
+        cookies = autenticar(pasta_login)
+        coordenador = CoordenadorSessao(lambda: autenticar(pasta_login), cookies)
+
+        for indice, pasta in enumerate(pastas, start=1):
+            if metadados_sem_driver and indice <= num_workers:
+                drivers.append(None)
+                continue
+            driver = inicializar_driver(pasta, perfil=PASTA_PERFIS / f"worker_{indice}")
+            drivers.append(driver)
+            aplicar_cookies(driver, cookies)
+        print(f"{sum(driver is not None for driver in drivers)} navegador(es) prontos com a mesma sessão.")
+
+        sessoes_http: List[Optional[motor_http.SessaoHTTP]] = [
+            motor_http.criar_sessao_http(cookies) if MOTOR_CONSULTA == "http" and indice < num_workers else None
+            for indice in range(total_drivers)
+        ]
+        limitador = LimitadorAdaptativo(
+            TAXA_MAXIMA_POR_MINUTO / 60,
+            TAXA_MINIMA_POR_MINUTO / 60,
+            LATENCIA_ALVO,
+        )
+        # Um participante por driver, mantido entre as passadas: ele sabe de qual login são os cookies do driver.
+        # Cada expiração, mesmo renovada, conta para o limitador: é o sintoma mais comum de excesso de ritmo
+        participantes = [
+            coordenador.participante(
+                lambda novos, driver=driver, sessao=sessao: reaplicar_sessao(driver, sessao, novos),
+                ao_expirar=lambda: limitador.registrar_sinal(SINAL_SESSAO),
+            )
+            for driver, sessao in zip(drivers, sessoes_http)
         ]
-        colunas_base = obter_colunas_resultado()
-        colunas = [valor for valor in cabecalhos_existentes if valor]
 
-        if not colunas:
-            colunas = colunas_base.copy()
-            for idx, coluna in enumerate(colunas, start=1):
-                ws.cell(row=1, column=idx, value=coluna)
-        else:
-            for coluna_base in colunas_base:
-                if coluna_base not in colunas:
-                    colunas.append(coluna_base)
-                    cell = ws.cell(row=1, column=len(colunas), value=coluna_base)
-                    cell.font = Font(bold=True)
-
-        # Adiciona dinamicamente eventuais novas colunas provenientes das partes
-        dynamic_keys = [k for k in resultado.keys() if k not in colunas]
-        if dynamic_keys:
+        fila: "queue.Queue[str]" = queue.Queue()
+        fila_pdf: "Optional[queue.Queue[Optional[Tuple[str, str]]]]" = None
+        if num_workers_pdf:
+            fila_pdf = queue.Queue()
+            for pendente in pdfs_pendentes:
+                fila_pdf.put(pendente)
+        eventos: "queue.Queue[Tuple]" = queue.Queue()
+        disjuntor = DisjuntorCircuito(LIMITE_FALHAS_CONSECUTIVAS, PAUSA_DISJUNTOR)
+
+        def iniciar_passada(lote: List[str]) -> int:
+            for processo in lote:
+                fila.put(processo)
+            quantidade = min(num_workers, len(lote))
+            for indice in range(1, quantidade + 1):
+                threading.Thread(
+                    target=executar_worker,
+                    args=(
+                        indice, drivers[indice - 1], pastas[indice - 1], fila, fila_pdf, eventos, limitador,
+                        disjuntor, participantes[indice - 1], sessoes_http[indice - 1], arquivo,
+                        len(lote), pdfs_em_cache,
+                    ),
+                    name=f"worker-{indice}",
+                    daemon=True,
+                ).start()
+            return quantidade
+
+        for indice in range(1, num_workers_pdf + 1):
+            threading.Thread(
+                target=executar_worker_pdf,
+                args=(
+                    indice, drivers[num_workers + indice - 1], pastas[num_workers + indice - 1],
+                    fila_pdf, eventos, limitador, disjuntor, participantes[num_workers + indice - 1],
+                ),
+                name=f"pdf-{indice}",
+                daemon=True,
+            ).start()
+
+        passada = 1
+        adiados: List[str] = []
+        workers_ativos = iniciar_passada(processos) if processos else 0
+        workers_pdf_ativos = num_workers_pdf
+        pdfs_em_aberto = len(pdfs_pendentes)
+        tentativas_pdf: Dict[str, int] = {}
+        # A passada adiada é agendada, não esperada: a thread principal segue
+        # gravando os PDFs e o diário enquanto o prazo não chega
+        prazo_passada: Optional[float] = None
+
+        while workers_ativos or workers_pdf_ativos or adiados:
+            if not workers_ativos and adiados:
+                if prazo_passada is None:
+                    espera = POLITICA_PROCESSOS.espera(passada)
+                    prazo_passada = time.monotonic() + espera
+                    print(f"\nNova passada ({passada + 1}) por {len(adiados)} processo(s) adiado(s) em {espera:.0f} s...")
+                if time.monotonic() >= prazo_passada:
+                    passada += 1
+                    prazo_passada = None
+                    workers_ativos = iniciar_passada(adiados)
+                    adiados = []
+            if not workers_ativos and not adiados and not pdfs_em_aberto and fila_pdf is not None:
+                # Sem novos metadados nem downloads pendentes, o estágio de PDF pode terminar
+                for _ in range(workers_pdf_ativos):
+                    fila_pdf.put(None)
+                fila_pdf = None
+
+            espera_evento = None if prazo_passada is None else max(0.0, prazo_passada - time.monotonic())
             try:
-                # Se a coluna 'ADVOGADOS DEVEDOR' existir, insere as novas colunas logo depois dela
-                if "ADVOGADOS DEVEDOR" in colunas:
-                    insert_pos = colunas.index("ADVOGADOS DEVEDOR")  # 0-based index
-                    # excel insertion position is 1-based; insert after the found column
-                    excel_insert_at = insert_pos + 2
-                    for chave in dynamic_keys:
-                        # insere uma coluna vazia no arquivo para deslocar dados
-                        ws.insert_cols(excel_insert_at)
-                        cell = ws.cell(row=1, column=excel_insert_at, value=chave)
-                        cell.font = Font(bold=True)
-                        # atualiza lista de colunas em memória para refletir a nova ordem
-                        colunas.insert(insert_pos + 1, chave)
-                        insert_pos += 1
-                        excel_insert_at += 1
+                evento = eventos.get(timeout=espera_evento)
+            except queue.Empty:
+                continue  # chegou a hora da passada adiada
+            if evento[0] == "inicio":
+                diario.iniciar(evento[1])
+                continue
+            if evento[0] == "fim":
+                if evento[1] == "pdf":
+                    workers_pdf_ativos -= 1
                 else:
-                    # fallback: anexa no final
-                    for chave in dynamic_keys:
-                        colunas.append(chave)
-                        cell = ws.cell(row=1, column=len(colunas), value=chave)
-                        cell.font = Font(bold=True)
-            except Exception:
-                # se qualquer erro ao inserir colunas, anexa no final como fallback seguro
-                for chave in dynamic_keys:
-                    if chave not in colunas:
-                        colunas.append(chave)
-                        cell = ws.cell(row=1, column=len(colunas), value=chave)
-                        cell.font = Font(bold=True)
-
-        # Encontra a próxima linha vazia
-        proxima_linha = ws.max_row + 1
-
-        for col_idx, coluna in enumerate(colunas, start=1):
-            valor = resultado.get(coluna, "")
-            if valor is None:
-                valor = ""
-            ws.cell(row=proxima_linha, column=col_idx, value=valor)
-        
-        # Salva o arquivo
-        wb.save(nome_arquivo)
-        wb.close()
-        
-    except Exception as e:
-        print(f"Erro ao salvar resultado no Excel: {e}")
-        # Fallback: usa pandas como backup
-        try:
-            if Path(nome_arquivo).exists():
-                df_existente = pd.read_excel(nome_arquivo)
-                df_novo = pd.DataFrame([resultado])
-                df_combinado = pd.concat([df_existente, df_novo], ignore_index=True)
+                    workers_ativos -= 1
+                continue
+
+            if evento[0] == "metadados":
+                _, resultado, erro, url_pdf, caminho_pdf, hash_pdf = evento
+                processo = resultado["numero_processo"]
+                if erro is not None and POLITICA_PROCESSOS.transitoria(erro) and passada <= PASSADAS_ADIADAS:
+                    # Falha transitória: sem linha de ERRO; o processo volta na próxima passada
+                    diario.adiar(processo, erro)
+                    adiados.append(processo)
+                    print(f"Processo {processo} adiado para nova tentativa ({type(erro).__name__})")
+                    continue
+                # Salva o resultado imediatamente no armazém e só então atualiza o diário
+                with metricas.processo_atual(processo), metricas.medir("gravacao"):
+                    armazem.gravar(resultado)
+                    if cache is not None and erro is None:
+                        registrar_no_cache(cache, processo, caminho_pdf, hash_pdf)
+                coletor.concluir_processo()
+                if erro is not None:
+                    diario.falhar(processo, erro)
+                elif url_pdf:
+                    pdfs_em_aberto += 1
+                    diario.aguardar_pdf(processo, url_pdf)
+                else:
+                    diario.concluir(processo)
+                print(f"Resultado salvo para o processo {processo}")
+                continue
+
+            _, processo, caminho_pdf, hash_pdf, erro = evento
+            tentativas_pdf[processo] = tentativas_pdf.get(processo, 0) + 1
+            if (
+                erro is not None
+                and POLITICA_PROCESSOS.transitoria(erro)
+                and tentativas_pdf[processo] <= PASSADAS_ADIADAS
+                and fila_pdf is not None
+            ):
+                # Vai para o fim da fila de downloads, atrás dos que ainda não foram tentados
+                fila_pdf.put((processo, diario.url_processo(processo)))
+                print(f"PDF do processo {processo} adiado para nova tentativa ({type(erro).__name__})")
+                continue
+            pdfs_em_aberto -= 1
+            with metricas.processo_atual(processo), metricas.medir("gravacao"):
+                armazem.atualizar_campos(processo, {"PDF": formatar_link_pdf(caminho_pdf)})
+                if cache is not None and caminho_pdf:
+                    registrar_no_cache(cache, processo, caminho_pdf, hash_pdf, metadados=False)
+            if erro is not None:
+                diario.falhar(processo, erro)
             else:
-                df_combinado = pd.DataFrame([resultado])
-            df_combinado.to_excel(nome_arquivo, index=False, engine='openpyxl')
-        except Exception as e2:
-            print(f"Erro no fallback ao salvar: {e2}")
+                diario.concluir(processo)
+            print(f"PDF registrado para o processo {processo}")
+    finally:
+        for driver in drivers:
+            if driver is None:
+                continue
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        metricas.ativar(None)
+        coletor.encerrar()
+
+
+def mostrar_status(diario: DiarioExecucao):
+    contagens = diario.contagens()
+    print(
+        f"Concluídos: {contagens[CONCLUIDO]} | Falhas: {contagens[FALHA]} | "
+        f"Pendentes: {contagens[PENDENTE]} | Em andamento: {contagens[EM_ANDAMENTO]} | "
+        f"PDF pendente: {contagens[PDF_PENDENTE]}"
+    )
+    for classe_erro, quantidade in diario.falhas_por_classe().items():
+        print(f"  {classe_erro}: {quantidade}")
 
 
 def main():
@@ -678,55 +1456,99 @@ def main():
         logger.addHandler(handler)
 
     LIMITE_CASOS = 300
-    processos = carregar_processos(CAMINHO_PLANILHA, limite=LIMITE_CASOS)
-    if not processos:
-        print("Nenhum número de processo encontrado na planilha.")
-        return
-
-    # Inicializa o arquivo de resultados com cabeçalhos
-    inicializar_arquivo_resultados(NOME_ARQUIVO_RESULTADOS)
-    
-    driver: Optional[Chrome] = None
-    processos_processados = []
-
+    diario = DiarioExecucao(ARQUIVO_DIARIO)
     try:
-        driver = inicializar_driver()
-        driver.get(URL_LOGIN)
-        input("Faça o login manualmente e pressione ENTER para continuar...")
-
-        for indice, processo in enumerate(processos, start=1):
-            print(f"Processando {indice}/{len(processos)} - processo: {processo}")
-            processos_processados.append(processo)
-            try:
-                resultado = processar_processo(driver, processo)
-            except (NoSuchElementException, TimeoutException, WebDriverException, ValueError) as erro:
-                resultado = registrar_erro(processo, erro)
-            
-            # Salva o resultado imediatamente no Excel
-            adicionar_resultado_ao_excel(resultado, NOME_ARQUIVO_RESULTADOS)
-            print(f"Resultado salvo no Excel para o processo {processo}")
-            # Pausa curta para estabilizar antes do próximo processo
-            #time.sleep(GAP_ENTRE_PROCESSOS)
-            # Pausa longa de 2 minutos conforme solicitado
-            #time.sleep(PAUSA_2_MINUTOS)
-
+        # A planilha de entrada só é lida: o progresso fica todo no diário
+        relatorio = RelatorioEntrada()
+        entrada = list(carregar_processos(CAMINHO_PLANILHA, relatorio=relatorio))
+        novos = diario.registrar_processos(entrada)
+        print(relatorio.resumo())
+        for numero_linha, valor, motivo in relatorio.invalidos:
+            logger.warning("Entrada inválida na linha %s: %r (%s)", numero_linha, valor, motivo)
+        for numero_linha, valor, motivo in relatorio.invalidos[:20]:
+            print(f"  linha {numero_linha}: {valor!r} ({motivo})")
+        if len(relatorio.invalidos) > 20:
+            print(f"  ... e mais {len(relatorio.invalidos) - 20} (ver {LOG_ARQUIVO})")
+        retomados = diario.retomar()
+        if novos or retomados:
+            print(f"{novos} processos novos no diário, {retomados} retomados de uma execução interrompida.")
+
+        armazem = abrir_armazem()
+        cache = CacheProcessos(ARQUIVO_CACHE, {METADADOS: TTL_METADADOS, PDF: TTL_PDF})
+        arquivo = ArquivoHTML(ARQUIVO_PAGINAS)
+        executou = False
+        try:
+            # Resultados de execuções anteriores ao cache também contam como obtidos (os
+            # mesmos status que a execução registra no cache); os concluídos desta entrada
+            # com os metadados vencidos voltam à fila para nova consulta
+            cache.semear_metadados(armazem.gravados_em(("OK", STATUS_NAO_ENCONTRADO)))
+            reabertos = reabrir_vencidos(cache, diario, entrada)
+            if reabertos:
+                print(f"{reabertos} processo(s) concluído(s) com os metadados vencidos voltaram à fila.")
+            processos = diario.pendentes(LIMITE_CASOS)
+            # Downloads que ficaram na fila numa execução anterior (metadados já gravados).
+            # Só o estágio de PDF os consome: mesmo com NUM_WORKERS_PDF = 0, abre um worker para eles
+            pdfs_pendentes = diario.pdfs_pendentes()
+            num_workers_pdf = NUM_WORKERS_PDF or (1 if pdfs_pendentes else 0)
+            if num_workers_pdf > NUM_WORKERS_PDF:
+                print(f"{len(pdfs_pendentes)} PDF(s) pendente(s) de uma execução anterior: 1 worker de PDF nesta execução.")
+            if not processos and not pdfs_pendentes:
+                print("Nenhum processo pendente.")
+                mostrar_status(diario)
+                return
+
+            # PDFs já no disco, com o nome que o robo gravou, contam como baixados
+            executou = True
+            cache.semear_pdfs(pdfs_no_disco(armazem, processos))
+            a_consultar, a_baixar, pdfs_em_cache = planejar_pelo_cache(
+                cache, processos, armazem, diario, estagio_pdf=num_workers_pdf > 0
+            )
+            pulados = len(processos) - len(a_consultar) - len(a_baixar)
+            if pulados or a_baixar or pdfs_em_cache:
+                print(
+                    f"Cache: {pulados} processo(s) sem nada a buscar, {len(a_baixar)} só com o PDF a baixar, "
+                    f"{len(pdfs_em_cache)} só com os metadados a consultar."
+                )
+            if a_consultar or pdfs_pendentes or a_baixar:
+                executar_em_pool(
+                    a_consultar, armazem, diario, NUM_WORKERS, num_workers_pdf,
+                    pdfs_pendentes + a_baixar, arquivo, cache, pdfs_em_cache,
+                )
+        finally:
+            arquivo.fechar()
+            cache.fechar()
+            if executou:
+                try:
+                    exportar_resultados(armazem)
+                except Exception as e:
+                    print(f"Erro ao exportar resultados para o Excel: {e}")
+            armazem.fechar()
+        mostrar_status(diario)
     finally:
-        if driver:
-            driver.quit()
-        
-        # Remove os processos processados do arquivo processos.xlsx
-        if processos_processados:
-            try:
-                df = pd.read_excel(CAMINHO_PLANILHA)
-                df_original = df.copy()
-                df = df[~df["Processo"].astype(str).isin(processos_processados)]
-                df.to_excel(CAMINHO_PLANILHA, index=False)
-                print(f"\n{len(processos_processados)} processos removidos do arquivo processos.xlsx")
-            except Exception as e:
-                print(f"Erro ao remover processos do arquivo: {e}")
+        diario.fechar()
     
     print(f"\nProcessamento concluído! Todos os resultados foram salvos em {NOME_ARQUIVO_RESULTADOS}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "exportar":
+        # Exporta sob demanda, mesmo com uma execução em andamento
+        armazem = abrir_armazem()
+        exportar_resultados(armazem)
+        armazem.fechar()
+    elif len(sys.argv) > 1 and sys.argv[1] == "reprocessar":
+        # Refaz os resultados a partir do HTML arquivado, sem acessar o ESAJ
+        armazem = abrir_armazem()
+        arquivo = ArquivoHTML(ARQUIVO_PAGINAS)
+        try:
+            reprocessar_arquivo(arquivo, armazem)
+            exportar_resultados(armazem)
+        finally:
+            arquivo.fechar()
+            armazem.fechar()
+    elif len(sys.argv) > 1 and sys.argv[1] == "status":
+        diario = DiarioExecucao(ARQUIVO_DIARIO)
+        mostrar_status(diario)
+        diario.fechar()
+    else:
+        main()
@@ -1,11 +1,14 @@
 import os
 import re
-import pdfplumber
+import time
 import pytesseract
-from pdf2image import convert_from_path
 import openpyxl
 import unicodedata
 import pandas as pd
+from documento_pdf import DocumentoPDF, abrir_documento
+from indice_pdfs import IndicePDFs
+from progresso_planilha import ProgressoPlanilha, impressao_pdf
+from supervisor_processos import SupervisorProcessos
 
 # >>> Ajuste aqui para o caminho da pasta bin do Poppler <<<
 POPPLER_PATH = r"C:\Users\rafae\Downloads\Release-25.11.0-0\poppler-25.11.0\Library\bin"
@@ -23,6 +26,27 @@ padrao_cnpj = re.compile(r'(\d{2}[\.\s\/-]?\d{3}[\.\s\/-]?\d{3}[\.\s\/-]?\d{4}[\
 # Regex para encontrar campo CPF/CNPJ (aceita diferentes variações: CPF, cpf, C.P.F, c.p.f, CNPJ, etc.)
 padrao_campo_cpf = re.compile(r'c\.?\s*p\.?\s*f\.?|c\.?\s*n\.?\s*p\.?\s*j\.?', re.IGNORECASE)
 
+# Onde começar a procurar a página do Anexo II: "inicio" ou "fim" (nas pastas digitais
+# longas o anexo costuma estar perto do fim; a primeira página encontrada é a usada)
+ORDEM_BUSCA_ANEXO = "inicio"
+# Índice local do texto dos PDFs: nas execuções seguintes só os PDFs novos ou alterados são lidos (None = sem índice)
+ARQUIVO_INDICE_PDFS = "indice_pdfs.sqlite3"
+# PDFs extraídos em paralelo (0 = um por vez, no próprio processo, sem tempo limite)
+PROCESSOS_EXTRACAO = os.cpu_count() or 1
+# Segundos que um PDF pode levar (parser + OCR) antes de o processo dele ser encerrado
+TEMPO_LIMITE_EXTRACAO = 600
+TEXTO_ERRO_EXTRACAO = "Erro na extração"
+TEXTO_PDF_NAO_ENCONTRADO = "PDF não encontrado"
+# Marcações que não são resultado: a célula conta como vazia e a linha é (re)processada
+VALORES_PROVISORIOS = (None, "", TEXTO_PDF_NAO_ENCONTRADO, TEXTO_ERRO_EXTRACAO)
+# A planilha é salva a cada LINHAS_POR_GRAVACAO linhas ou INTERVALO_GRAVACAO segundos (o que vier
+# primeiro); entre uma gravação e outra, o progresso fica no diário "<planilha>.progresso.jsonl"
+LINHAS_POR_GRAVACAO = 200
+INTERVALO_GRAVACAO = 60
+
+# Índice de PDFs aberto em cada processo de extração (ver inicializar_extracao)
+_indice_pdfs = None
+
 def normalizar_nome(nome):
     """Normaliza o nome para comparação (remove espaços extras, converte para minúsculas, remove acentos)"""
     if not nome:
@@ -192,38 +216,27 @@ def encontrar_cpf_proximo_ao_nome(texto, nome_requerente, debug=False):
         print("    [DEBUG] Nenhum CPF encontrado")
     return None
 
-def extrair_todas_partes_anexoII(caminho_pdf, debug=False):
+def extrair_todas_partes_anexoII(pdf, debug=False):
     """Extrai todas as partes (Requerente, Invitante, Interessado, etc.) e seus CPFs/CNPJs do Anexo II.
+    `pdf` é o caminho ou um DocumentoPDF já aberto (reaproveita o que já foi extraído).
     Retorna um dicionário com {tipo_parte: {'nome': str, 'cpf_cnpj': str}}"""
-    pagina_anexo = None
-    texto_pagina = ""
-    
+    with abrir_documento(pdf, POPPLER_PATH) as documento:
+        return _extrair_todas_partes(documento, debug)
+
+def _extrair_todas_partes(documento, debug=False):
     # Tipos de partes a procurar
     tipos_partes = [
         'requerente', 'invitante', 'interessado', 'cedente', 'sucessora', 
         'favorecido', 'sucessor', 'cessionário', 'favorecida'
     ]
     
-    # 1. Procurar página do Anexo II
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for i, pagina in enumerate(pdf.pages):
-            texto = pagina.extract_text()
-            if texto and ("Anexo II" in texto or "ANEXO II" in texto or "anexo ii" in texto):
-                pagina_anexo = i
-                texto_pagina = texto
-                # Tentar também extrair tabelas
-                tabelas = pagina.extract_tables()
-                if tabelas:
-                    for tabela in tabelas:
-                        for linha in tabela:
-                            if linha:
-                                texto_pagina += "\n" + " ".join([str(cell) if cell else "" for cell in linha])
-                break
-    
+    # 1. Procurar página do Anexo II (texto e tabelas)
+    pagina_anexo = documento.pagina_anexo(ORDEM_BUSCA_ANEXO)
     if pagina_anexo is None:
         if debug:
             print("    [DEBUG] Página 'Anexo II' não encontrada no PDF")
         return {}
+    texto_pagina = documento.texto_com_tabelas(pagina_anexo)
     
     if debug:
         print(f"    [DEBUG] Página Anexo II encontrada: página {pagina_anexo + 1}")
@@ -234,14 +247,7 @@ def extrair_todas_partes_anexoII(caminho_pdf, debug=False):
         if debug:
             print("    [DEBUG] Texto muito curto, tentando OCR...")
         try:
-            paginas = convert_from_path(
-                caminho_pdf,
-                first_page=pagina_anexo+1,
-                last_page=pagina_anexo+1,
-                poppler_path=POPPLER_PATH,
-                dpi=300
-            )
-            texto_pagina = pytesseract.image_to_string(paginas[0], lang="por")
+            texto_pagina = documento.ocr(pagina_anexo)
         except Exception as e:
             if debug:
                 print(f"    [DEBUG] Erro no OCR: {e}")
@@ -347,32 +353,20 @@ def extrair_todas_partes_anexoII(caminho_pdf, debug=False):
     
     return partes_encontradas
 
-def extrair_cpf_anexoII(caminho_pdf, nome_requerente, debug=False):
+def extrair_cpf_anexoII(pdf, nome_requerente, debug=False):
     """Extrai CPF ou CNPJ do requerente na página do Anexo II do PDF.
-    Funciona mesmo se o nome do requerente estiver vazio."""
-    pagina_anexo = None
-    texto_pagina = ""
-
-    # 1. Procurar página do Anexo II
-    with pdfplumber.open(caminho_pdf) as pdf:
-        for i, pagina in enumerate(pdf.pages):
-            texto = pagina.extract_text()
-            if texto and ("Anexo II" in texto or "ANEXO II" in texto or "anexo ii" in texto):
-                pagina_anexo = i
-                texto_pagina = texto
-                # Tentar também extrair tabelas
-                tabelas = pagina.extract_tables()
-                if tabelas:
-                    for tabela in tabelas:
-                        for linha in tabela:
-                            if linha:
-                                texto_pagina += "\n" + " ".join([str(cell) if cell else "" for cell in linha])
-                break
+    Funciona mesmo se o nome do requerente estiver vazio. `pdf` é o caminho ou um DocumentoPDF."""
+    with abrir_documento(pdf, POPPLER_PATH) as documento:
+        return _extrair_cpf(documento, nome_requerente, debug)
 
+def _extrair_cpf(documento, nome_requerente, debug=False):
+    # 1. Procurar página do Anexo II (texto e tabelas)
+    pagina_anexo = documento.pagina_anexo(ORDEM_BUSCA_ANEXO)
     if pagina_anexo is None:
         if debug:
             print("    [DEBUG] Página 'Anexo II' não encontrada no PDF")
         return None
+    texto_pagina = documento.texto_com_tabelas(pagina_anexo)
 
     if debug:
         print(f"    [DEBUG] Página Anexo II encontrada: página {pagina_anexo + 1}")
@@ -387,14 +381,7 @@ def extrair_cpf_anexoII(caminho_pdf, nome_requerente, debug=False):
     if debug:
         print("    [DEBUG] Tentando OCR na página do Anexo II...")
     try:
-        paginas = convert_from_path(
-            caminho_pdf,
-            first_page=pagina_anexo+1,
-            last_page=pagina_anexo+1,
-            poppler_path=POPPLER_PATH,
-            dpi=300  # Maior resolução para melhor OCR
-        )
-        texto_ocr = pytesseract.image_to_string(paginas[0], lang="por")
+        texto_ocr = documento.ocr(pagina_anexo)
         
         if debug:
             print(f"    [DEBUG] Tamanho do texto OCR: {len(texto_ocr)} caracteres")
@@ -490,70 +477,217 @@ def atualizar_excel_iterativo(caminho_excel, pasta_pdfs):
         print("Procurando por: Requerente, Invitante, Interessado, Cedente, Sucessora, Favorecido, Sucessor, Cessionário, Favorecida")
         return
 
-    # Iterar linhas
+    try:
+        _processar_linhas(wb, ws, caminho_excel, pasta_pdfs, col_numero_processo, colunas_partes)
+    finally:
+        if _indice_pdfs is not None:
+            _indice_pdfs.fechar()
+
+def _processar_linhas(wb, ws, caminho_excel, pasta_pdfs, col_numero_processo, colunas_partes):
+    progresso = ProgressoPlanilha(f"{caminho_excel}.progresso.jsonl")
+    try:
+        _processar_com_progresso(wb, ws, caminho_excel, pasta_pdfs, col_numero_processo, colunas_partes, progresso)
+    finally:
+        progresso.fechar()
+
+def _processar_com_progresso(wb, ws, caminho_excel, pasta_pdfs, col_numero_processo, colunas_partes, progresso):
+    anteriores = progresso.carregar()
+    # Levantar as linhas e os PDFs que existem; a extração dos PDFs vai para os processos
+    linhas = []  # (row, numero_processo, caminho_pdf ou None, impressão do PDF)
+    tarefas = []  # (row, argumentos de extrair_cpfs_do_pdf)
+    puladas = recuperadas = preenchidas = 0
     for row in range(2, ws.max_row+1):
         numero_processo = str(ws.cell(row=row, column=col_numero_processo).value).strip()
         caminho_pdf = os.path.join(pasta_pdfs, f"{numero_processo}.pdf")
+        if not os.path.exists(caminho_pdf):
+            linhas.append((row, numero_processo, None, None))
+            continue
+        impressao = impressao_pdf(caminho_pdf)
+        anterior = anteriores.get(numero_processo)
+        if anterior and anterior["pdf"] == impressao and not anterior["erro"]:
+            # Mesmo PDF já processado: só devolve à planilha o que não chegou a ser salvo
+            if restaurar_valores(ws, row, colunas_partes, anterior["valores"]):
+                recuperadas += 1
+            puladas += 1
+            continue
+        if anterior is None:
+            # Preenchida antes do diário existir (ou à mão): não é sobrescrita, e entra
+            # no diário para que só uma mudança no PDF a faça ser processada de novo
+            valores = valores_preenchidos(ws, row, colunas_partes)
+            if valores:
+                progresso.registrar(numero_processo, impressao, valores)
+                preenchidas += 1
+                puladas += 1
+                continue
+        linhas.append((row, numero_processo, caminho_pdf, impressao))
+        # Nome do requerente para o método alternativo (None = não há coluna de requerente)
+        nome_requerente = None
+        if 'requerente' in colunas_partes:
+            valor = ws.cell(row=row, column=colunas_partes['requerente']['nome']).value
+            nome_requerente = str(valor).strip() if valor else ""
+        # Ativar debug apenas para os primeiros processos
+        tarefas.append((row, (caminho_pdf, nome_requerente, row <= 3)))
+    if puladas:
+        print(
+            f"[INFO] {puladas} linha(s) já processadas com o mesmo PDF puladas "
+            f"({recuperadas} recuperada(s) do diário, {preenchidas} já preenchida(s) na planilha)"
+        )
 
-        if os.path.exists(caminho_pdf):
-            print(f"\n[...] Processo {numero_processo}: Processando...")
-            # Ativar debug apenas para os primeiros processos
-            debug = (row <= 3)
-            
-            # Extrair todas as partes do PDF
-            partes_encontradas = extrair_todas_partes_anexoII(caminho_pdf, debug=debug)
-            
-            # Preencher as colunas correspondentes
-            for tipo, dados in partes_encontradas.items():
-                if tipo in colunas_partes:
-                    col_cpf = colunas_partes[tipo]['cpf_cnpj']
-                    if col_cpf and dados['cpf_cnpj']:
-                        ws.cell(row=row, column=col_cpf, value=dados['cpf_cnpj'])
-                        print(f"[OK] {tipo.capitalize()}: CPF/CNPJ encontrado {dados['cpf_cnpj']}")
-                    elif col_cpf:
-                        ws.cell(row=row, column=col_cpf, value="CPF/CNPJ não encontrado")
-                        print(f"[!] {tipo.capitalize()}: CPF/CNPJ não encontrado")
-            
-            # Se não encontrou nenhuma parte, tentar método antigo (compatibilidade)
-            if not partes_encontradas:
-                print(f"[!] Nenhuma parte encontrada, tentando método alternativo...")
-                # Tentar encontrar pelo nome do requerente se existir
-                if 'requerente' in colunas_partes:
-                    col_requerente = colunas_partes['requerente']['nome']
-                    nome_requerente = str(ws.cell(row=row, column=col_requerente).value).strip() if ws.cell(row=row, column=col_requerente).value else ""
-                    cpf = extrair_cpf_anexoII(caminho_pdf, nome_requerente, debug=debug)
-                    if cpf and 'requerente' in colunas_partes:
-                        col_cpf = colunas_partes['requerente']['cpf_cnpj']
-                        if col_cpf:
-                            ws.cell(row=row, column=col_cpf, value=cpf)
-                            print(f"[OK] Requerente: CPF/CNPJ encontrado {cpf}")
-        else:
-            # Preencher todas as colunas de CPF/CNPJ com "PDF não encontrado"
-            for tipo, dados in colunas_partes.items():
-                if dados['cpf_cnpj']:
-                    ws.cell(row=row, column=dados['cpf_cnpj'], value="PDF não encontrado")
-            print(f"[X] Processo {numero_processo}: PDF não encontrado")
+    if PROCESSOS_EXTRACAO > 0:
+        supervisor = SupervisorProcessos(
+            extrair_cpfs_do_pdf, PROCESSOS_EXTRACAO, TEMPO_LIMITE_EXTRACAO,
+            inicializar_extracao, (ARQUIVO_INDICE_PDFS,),
+        )
+        print(f"[INFO] {len(tarefas)} PDF(s) em {PROCESSOS_EXTRACAO} processo(s)")
+        resultados = supervisor.executar(tarefas)
+    else:
+        inicializar_extracao(ARQUIVO_INDICE_PDFS)
+        resultados = _extrair_em_sequencia(tarefas)
 
-        # Salvar imediatamente após cada linha
-        try:
-            wb.save(caminho_excel)
-        except PermissionError:
-            print(f"\n[ERRO] Não foi possível salvar o arquivo Excel!")
-            print(f"O arquivo '{caminho_excel}' pode estar aberto. Feche-o e execute o script novamente.")
-            wb.close()
-            return
-        except Exception as e:
-            print(f"\n[ERRO] Erro ao salvar o arquivo Excel: {e}")
-            wb.close()
-            return
+    # Os resultados chegam na ordem das linhas; só este laço escreve na planilha
+    nao_salvas = recuperadas
+    ultima_gravacao = time.monotonic()
+    try:
+        for row, numero_processo, caminho_pdf, impressao in linhas:
+            if caminho_pdf:
+                print(f"\n[...] Processo {numero_processo}: Processando...")
+                _, resultado, erro = next(resultados)
+                valores = gravar_resultado_linha(ws, row, colunas_partes, resultado, erro)
+                progresso.registrar(numero_processo, impressao, valores, erro)
+            else:
+                # Preencher com "PDF não encontrado" as colunas de CPF/CNPJ ainda sem resultado
+                for tipo, dados in colunas_partes.items():
+                    if dados['cpf_cnpj'] and ws.cell(row=row, column=dados['cpf_cnpj']).value in VALORES_PROVISORIOS:
+                        ws.cell(row=row, column=dados['cpf_cnpj'], value=TEXTO_PDF_NAO_ENCONTRADO)
+                print(f"[X] Processo {numero_processo}: PDF não encontrado")
+
+            # Salvar em lotes: o diário já garante o que foi feito desde a última gravação
+            nao_salvas += 1
+            if nao_salvas >= LINHAS_POR_GRAVACAO or time.monotonic() - ultima_gravacao >= INTERVALO_GRAVACAO:
+                if not salvar_planilha(wb, caminho_excel):
+                    return
+                print(f"[INFO] Planilha salva ({nao_salvas} linha(s) desde a última gravação)")
+                nao_salvas = 0
+                ultima_gravacao = time.monotonic()
+    finally:
+        # Encerra os processos de extração, inclusive numa saída antecipada
+        resultados.close()
+
+    if nao_salvas and not salvar_planilha(wb, caminho_excel):
+        return
     
     # Fechar o arquivo ao final
     wb.close()
     print("\n[CONCLUÍDO] Processamento finalizado com sucesso!")
 
 
+def salvar_planilha(wb, caminho_excel):
+    """Salva a planilha; numa falha avisa, fecha o arquivo e retorna False."""
+    try:
+        wb.save(caminho_excel)
+        return True
+    except PermissionError:
+        print(f"\n[ERRO] Não foi possível salvar o arquivo Excel!")
+        print(f"O arquivo '{caminho_excel}' pode estar aberto. Feche-o e execute o script novamente.")
+    except Exception as e:
+        print(f"\n[ERRO] Erro ao salvar o arquivo Excel: {e}")
+    print("O progresso desde a última gravação está no diário e será recuperado na próxima execução.")
+    wb.close()
+    return False
+
+
+def valores_preenchidos(ws, row, colunas_partes):
+    """{tipo: valor} das colunas de CPF/CNPJ da linha que já têm um resultado."""
+    valores = {}
+    for tipo, dados in colunas_partes.items():
+        if dados['cpf_cnpj']:
+            valor = ws.cell(row=row, column=dados['cpf_cnpj']).value
+            if valor not in VALORES_PROVISORIOS:
+                valores[tipo] = valor
+    return valores
+
+
+def restaurar_valores(ws, row, colunas_partes, valores):
+    """Escreve na linha os valores do diário que não chegaram à planilha. Uma célula
+    com resultado (inclusive corrigido à mão) não é sobrescrita. Retorna se mudou algo."""
+    mudou = False
+    for tipo, valor in valores.items():
+        col_cpf = colunas_partes.get(tipo, {}).get('cpf_cnpj')
+        if col_cpf and ws.cell(row=row, column=col_cpf).value in VALORES_PROVISORIOS and valor:
+            ws.cell(row=row, column=col_cpf, value=valor)
+            mudou = True
+    return mudou
+
+
+def inicializar_extracao(arquivo_indice):
+    """Abre o índice de PDFs do processo atual (uma vez por processo de extração)."""
+    global _indice_pdfs
+    _indice_pdfs = IndicePDFs(arquivo_indice) if arquivo_indice else None
+
+
+def extrair_cpfs_do_pdf(caminho_pdf, nome_requerente=None, debug=False):
+    """Partes do Anexo II do PDF e, se nenhuma for encontrada e houver coluna de
+    requerente, o CPF/CNPJ dele pelo método alternativo. Roda nos processos de
+    extração e não mexe na planilha. Retorna (partes_encontradas, cpf_requerente)."""
+    # O PDF é aberto uma vez só: o método alternativo reaproveita as páginas já lidas
+    with DocumentoPDF(caminho_pdf, POPPLER_PATH, indice=_indice_pdfs) as documento:
+        partes_encontradas = extrair_todas_partes_anexoII(documento, debug=debug)
+        cpf = None
+        if not partes_encontradas and nome_requerente is not None:
+            cpf = extrair_cpf_anexoII(documento, nome_requerente, debug=debug)
+    return partes_encontradas, cpf
+
+
+def _extrair_em_sequencia(tarefas):
+    """Mesmo formato do SupervisorProcessos.executar, no próprio processo e sem tempo limite."""
+    for row, argumentos in tarefas:
+        try:
+            yield row, extrair_cpfs_do_pdf(*argumentos), None
+        except Exception as e:
+            yield row, None, f"{type(e).__name__}: {e}"
+
+
+def gravar_resultado_linha(ws, row, colunas_partes, resultado, erro):
+    """Escreve na linha os CPFs/CNPJs extraídos (ou o erro da extração).
+    Retorna {tipo: valor} do que foi escrito, para o diário de progresso."""
+    valores = {}
+    if erro is not None:
+        for tipo, dados in colunas_partes.items():
+            if dados['cpf_cnpj']:
+                ws.cell(row=row, column=dados['cpf_cnpj'], value=TEXTO_ERRO_EXTRACAO)
+                valores[tipo] = TEXTO_ERRO_EXTRACAO
+        print(f"[ERRO] Falha na extração: {erro}")
+        return valores
+
+    partes_encontradas, cpf = resultado
+    # Preencher as colunas correspondentes
+    for tipo, dados in partes_encontradas.items():
+        if tipo in colunas_partes:
+            col_cpf = colunas_partes[tipo]['cpf_cnpj']
+            if col_cpf and dados['cpf_cnpj']:
+                ws.cell(row=row, column=col_cpf, value=dados['cpf_cnpj'])
+                valores[tipo] = dados['cpf_cnpj']
+                print(f"[OK] {tipo.capitalize()}: CPF/CNPJ encontrado {dados['cpf_cnpj']}")
+            elif col_cpf:
+                ws.cell(row=row, column=col_cpf, value="CPF/CNPJ não encontrado")
+                valores[tipo] = "CPF/CNPJ não encontrado"
+                print(f"[!] {tipo.capitalize()}: CPF/CNPJ não encontrado")
+
+    # Se não encontrou nenhuma parte, o método antigo (compatibilidade) já rodou na extração
+    if not partes_encontradas:
+        print(f"[!] Nenhuma parte encontrada, usado o método alternativo")
+        if cpf and 'requerente' in colunas_partes:
+            col_cpf = colunas_partes['requerente']['cpf_cnpj']
+            if col_cpf:
+                ws.cell(row=row, column=col_cpf, value=cpf)
+                valores['requerente'] = cpf
+                print(f"[OK] Requerente: CPF/CNPJ encontrado {cpf}")
+    return valores
+
+
 # Exemplo de uso
-pasta_pdfs = r"G:\Drives compartilhados\Tecnologia\PDFs - Esaj TJSP"
-caminho_excel = r"C:\Users\rafae\OneDrive\Desktop\robo\resultados_processo_final.xlsx"
+if __name__ == "__main__":
+    pasta_pdfs = r"G:\Drives compartilhados\Tecnologia\PDFs - Esaj TJSP"
+    caminho_excel = r"C:\Users\rafae\OneDrive\Desktop\robo\resultados_processo_final.xlsx"
 
-atualizar_excel_iterativo(caminho_excel, pasta_pdfs)
+    atualizar_excel_iterativo(caminho_excel, pasta_pdfs)
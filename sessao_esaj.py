@@ -0,0 +1,109 @@
+import threading
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CAMINHO_LOGIN = "/sajcas/login"
+TENTATIVAS_SESSAO = 3  # novos logins tolerados por processo antes de desistir dele
+
+
+class SessaoExpirada(Exception):
+    """O ESAJ redirecionou para o login do CAS no meio da execução."""
+
+
+def redirecionado_para_login(url: str) -> bool:
+    return CAMINHO_LOGIN in (url or "")
+
+
+class CoordenadorSessao:
+    """Ponto único de renovação do login compartilhado pelos workers.
+
+    O primeiro worker que encontra a sessão expirada chama `autenticar` (que
+    devolve os cookies novos); os demais que esbarrarem no login, ou que forem
+    iniciar um processo, ficam parados até o novo login. Cada renovação avança a
+    `geracao`, e cada worker reaplica os cookies no seu driver quando vê que a
+    geração mudou.
+    """
+
+    def __init__(self, autenticar: Callable[[], List[Dict]], cookies: List[Dict]):
+        self._autenticar = autenticar
+        self._cookies = cookies
+        self._geracao = 0
+        self._lock = threading.Lock()
+        self._liberada = threading.Event()
+        self._liberada.set()
+
+    @property
+    def geracao(self) -> int:
+        return self._geracao
+
+    def aguardar_liberacao(self) -> Tuple[List[Dict], int]:
+        """Espera um login em curso terminar; devolve os cookies e a geração atuais."""
+        self._liberada.wait()
+        with self._lock:
+            return self._cookies, self._geracao
+
+    def renovar(self, geracao_vista: int):
+        """Chamado por quem viu a sessão expirar. Só um worker por geração refaz o login."""
+        with self._lock:
+            lider = geracao_vista == self._geracao and self._liberada.is_set()
+            if lider:
+                self._liberada.clear()
+        if not lider:
+            self._liberada.wait()
+            return
+        try:
+            print("\nSessão expirada: workers pausados até o novo login.")
+            cookies = self._autenticar()
+            with self._lock:
+                self._cookies = cookies
+                self._geracao += 1
+            print("Sessão renovada; retomando os processos em andamento.")
+        finally:
+            self._liberada.set()
+
+    def participante(
+        self,
+        aplicar_cookies: Callable[[List[Dict]], None],
+        ao_expirar: Optional[Callable[[], None]] = None,
+    ) -> "ParticipanteSessao":
+        return ParticipanteSessao(self, aplicar_cookies, ao_expirar)
+
+
+class ParticipanteSessao:
+    """Lado do worker: mantém o driver (e a sessão HTTP) na geração de login atual.
+
+    `ao_expirar` é chamado a cada expiração renovada (ex.: para o limitador de
+    taxa recuar); a expiração que esgota as tentativas chega como exceção.
+    """
+
+    def __init__(
+        self,
+        coordenador: CoordenadorSessao,
+        aplicar_cookies: Callable[[List[Dict]], None],
+        ao_expirar: Optional[Callable[[], None]] = None,
+    ):
+        self._coordenador = coordenador
+        self._aplicar_cookies = aplicar_cookies
+        self._ao_expirar = ao_expirar
+        self.geracao = coordenador.geracao
+
+    def sincronizar(self):
+        cookies, geracao = self._coordenador.aguardar_liberacao()
+        if geracao != self.geracao:
+            self._aplicar_cookies(cookies)
+            self.geracao = geracao
+
+    def executar(self, funcao: Callable[[], T], tentativas: int = TENTATIVAS_SESSAO) -> T:
+        """Executa `funcao`; se a sessão expirar no meio, espera o novo login e repete."""
+        for tentativa in range(1, tentativas + 1):
+            self.sincronizar()
+            try:
+                return funcao()
+            except SessaoExpirada:
+                if tentativa == tentativas:
+                    raise
+                if self._ao_expirar is not None:
+                    self._ao_expirar()
+                self._coordenador.renovar(self.geracao)
+        raise RuntimeError("ParticipanteSessao.executar chamado com zero tentativas")
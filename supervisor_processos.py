@@ -0,0 +1,144 @@
+import multiprocessing
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+
+def _laco_worker(conexao, funcao: Callable, inicializar: Optional[Callable], args_inicializar: tuple):
+    """Executa as tarefas recebidas pela conexão, uma de cada vez, até receber None."""
+    if inicializar is not None:
+        inicializar(*args_inicializar)
+    while True:
+        try:
+            tarefa = conexao.recv()
+        except EOFError:
+            return
+        if tarefa is None:
+            return
+        chave, argumentos = tarefa
+        try:
+            conexao.send((chave, funcao(*argumentos), None))
+        except Exception as e:
+            conexao.send((chave, None, f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, contexto, funcao, inicializar, args_inicializar):
+        self.conexao, conexao_filho = contexto.Pipe()
+        self.processo = contexto.Process(
+            target=_laco_worker,
+            args=(conexao_filho, funcao, inicializar, args_inicializar),
+            daemon=True,
+        )
+        self.processo.start()
+        conexao_filho.close()
+        self.chave = None
+        self.inicio = 0.0
+
+    def enviar(self, chave, argumentos):
+        self.conexao.send((chave, argumentos))
+        self.chave = chave
+        self.inicio = time.monotonic()
+
+    def encerrar(self, forcar: bool = False):
+        if not forcar:
+            try:
+                self.conexao.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.processo.join(5)
+        if self.processo.is_alive():
+            self.processo.terminate()
+            self.processo.join()
+        self.conexao.close()
+
+
+class SupervisorProcessos:
+    """Executa `funcao` em vários processos, com tempo limite por tarefa.
+
+    Diferente do ProcessPoolExecutor, um worker que passa do `tempo_limite`
+    numa tarefa é encerrado (terminate) e substituído por um novo: um PDF que
+    trava o parser ou o OCR custa só aquela tarefa, não o lote. Os resultados
+    saem na ordem em que as tarefas foram enviadas, para um único consumidor
+    gravá-los. `inicializar` roda uma vez em cada processo (abrir conexões etc.).
+    """
+
+    def __init__(
+        self,
+        funcao: Callable,
+        num_processos: int,
+        tempo_limite: Optional[float] = None,
+        inicializar: Optional[Callable] = None,
+        args_inicializar: tuple = (),
+    ):
+        self.funcao = funcao
+        self.num_processos = max(1, num_processos)
+        self.tempo_limite = tempo_limite
+        self.inicializar = inicializar
+        self.args_inicializar = args_inicializar
+        self._contexto = multiprocessing.get_context()
+
+    def _novo_worker(self) -> _Worker:
+        return _Worker(self._contexto, self.funcao, self.inicializar, self.args_inicializar)
+
+    def executar(self, tarefas: Iterable[Tuple[object, tuple]]) -> Iterator[Tuple[object, object, Optional[str]]]:
+        """Recebe (chave, argumentos) e devolve (chave, resultado, erro), na ordem das tarefas.
+
+        `erro` é None no sucesso; numa exceção, no tempo limite ou na morte do
+        worker, o resultado é None e `erro` descreve o que houve.
+        """
+        pendentes = iter(tarefas)
+        ordem: deque = deque()
+        prontos: Dict[object, Tuple[object, Optional[str]]] = {}
+        workers = [self._novo_worker() for _ in range(self.num_processos)]
+
+        def despachar(worker: _Worker):
+            tarefa = next(pendentes, None)
+            if tarefa is None:
+                worker.chave = None
+                return
+            chave, argumentos = tarefa
+            ordem.append(chave)
+            worker.enviar(chave, argumentos)
+
+        def substituir(worker: _Worker) -> _Worker:
+            worker.encerrar(forcar=True)
+            novo = self._novo_worker()
+            workers[workers.index(worker)] = novo
+            return novo
+
+        try:
+            for worker in list(workers):
+                despachar(worker)
+            while True:
+                ocupados = [worker for worker in workers if worker.chave is not None]
+                if not ocupados:
+                    break
+                espera = None
+                if self.tempo_limite is not None:
+                    prazo = min(worker.inicio for worker in ocupados) + self.tempo_limite
+                    espera = max(0.0, prazo - time.monotonic())
+                prontas = wait([worker.conexao for worker in ocupados], timeout=espera)
+
+                for worker in ocupados:
+                    if worker.conexao in prontas:
+                        try:
+                            chave, resultado, erro = worker.conexao.recv()
+                        except EOFError:
+                            # O processo morreu no meio da tarefa (falta de memória, crash do OCR...)
+                            chave, resultado, erro = worker.chave, None, "processo encerrado inesperadamente"
+                            worker = substituir(worker)
+                        prontos[chave] = (resultado, erro)
+                        despachar(worker)
+                    elif self.tempo_limite is not None and time.monotonic() - worker.inicio > self.tempo_limite:
+                        prontos[worker.chave] = (None, f"tempo limite de {self.tempo_limite:.0f} s excedido")
+                        despachar(substituir(worker))
+
+                while ordem and ordem[0] in prontos:
+                    chave = ordem.popleft()
+                    resultado, erro = prontos.pop(chave)
+                    yield chave, resultado, erro
+        finally:
+            for worker in workers:
+                worker.encerrar(forcar=worker.chave is not None)
@@ -0,0 +1,90 @@
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import motor_http
+import robo
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures" / "esaj"
+
+# Rotas do servidor local -> fixture servida
+ROTAS = {
+    "/cpopg/abrirConsultaDeRequisitorios.do": "consulta.html",
+    "/cpopg/search.do": "processo_completo.html",
+}
+
+
+class ManipuladorFixtures(SimpleHTTPRequestHandler):
+    """Serve as fixtures do ESAJ e guarda os parâmetros recebidos na consulta."""
+
+    ultima_consulta = ""
+
+    def do_GET(self):
+        caminho, _, consulta = self.path.partition("?")
+        fixture = ROTAS.get(caminho)
+        if not fixture:
+            self.send_error(404)
+            return
+        if caminho.endswith("search.do"):
+            ManipuladorFixtures.ultima_consulta = consulta
+        conteudo = (PASTA_FIXTURES / fixture).read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def testar_motor_http(processo="0000001-45.2020.8.26.0053"):
+    """Executa a consulta HTTP contra um servidor local e mostra os campos extraídos"""
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), partial(ManipuladorFixtures, directory=str(PASTA_FIXTURES)))
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    url_base = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    try:
+        sessao = motor_http.criar_sessao_http(
+            [{"name": "JSESSIONID", "value": "teste", "domain": "127.0.0.1", "path": "/"}],
+            url_base=url_base,
+        )
+        parte1, parte3 = robo.separar_numero_processo(processo)
+        html, url_processo = motor_http.consultar_processo(sessao, parte1, parte3)
+        dados = robo.extrair_dados_html(html)
+
+        print("=" * 80)
+        print(f"TESTANDO MOTOR HTTP: {processo}")
+        print(f"Servidor: {url_base}")
+        print(f"URL do processo: {url_processo}")
+        print(f"Parâmetros enviados: {ManipuladorFixtures.ultima_consulta}")
+        print("=" * 80)
+        for campo, valor in dados.items():
+            print(f"  {campo}: {valor}")
+
+        erros = []
+        if "numeroDigitoAnoUnificado=0000001-45.2020" not in ManipuladorFixtures.ultima_consulta:
+            erros.append("numeroDigitoAnoUnificado não enviado com a máscara")
+        if "foroNumeroUnificado=0053" not in ManipuladorFixtures.ultima_consulta:
+            erros.append("foroNumeroUnificado não enviado")
+        if dados["classe"] != "Precatório":
+            erros.append(f"classe inesperada: {dados['classe']!r}")
+        if dados["requerentes"] != ["Maria da Silva Souza"]:
+            erros.append(f"requerentes inesperados: {dados['requerentes']!r}")
+        if "Terceiro" not in dados["partes_em_colunas"]:
+            erros.append("coluna dinâmica 'Terceiro' ausente")
+        return erros
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+# Teste
+if __name__ == "__main__":
+    erros = testar_motor_http()
+    if erros:
+        print("\n[ERRO] " + "\n[ERRO] ".join(erros))
+    else:
+        print("\n[OK] Consulta HTTP extraiu os campos esperados")
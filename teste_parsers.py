@@ -0,0 +1,99 @@
+import importlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import parser_esaj
+import robo
+
+PASTA_FIXTURES = Path(__file__).parent / "fixtures" / "esaj"
+# Saída esperada de cada fixture, capturada das funções da versão de referência (ver capturar_esperado)
+SUFIXO_ESPERADO = ".esperado.json"
+
+
+def _fragmento(soup, element_id):
+    elemento = soup.find(id=element_id)
+    return str(elemento) if elemento else ""
+
+
+def _texto_renderizado(elemento):
+    """Texto do campo como o `.text` do Selenium que o robo original lia (innerText):
+    &nbsp; vira espaço e os espaços se colapsam. As quebras de linha do innerText
+    (<br>) também viram espaço, porque a planilha recebe cada campo numa linha só."""
+    if elemento is None:
+        return ""
+    return " ".join(elemento.get_text(separator=" ").replace("\xa0", " ").split())
+
+
+def capturar_esperado(caminho_html, modulo):
+    """Saída de referência da página: os extratores de `modulo` aplicados como o robo
+    original aplicava (outerHTML da tabela de partes e da de movimentações, página
+    inteira para os outros números) e o texto renderizado de cada campo simples."""
+    html = Path(caminho_html).read_text(encoding="utf-8")
+    soup = BeautifulSoup(html, "html.parser")
+    requerentes, devedores, advogados_req, advogados_dev, partes_em_colunas = modulo.extrair_partes(
+        _fragmento(soup, "tablePartesPrincipais")
+    )
+    esperado = {
+        campo: _texto_renderizado(soup.find(id=element_id))
+        for campo, element_id in robo.CAMPOS_PROCESSO.items()
+    }
+    esperado.update(
+        outros_numeros=modulo.extrair_outros_numeros(html),
+        requerentes=requerentes,
+        devedores=devedores,
+        advogados_req=advogados_req,
+        advogados_dev=advogados_dev,
+        partes_em_colunas=partes_em_colunas,
+        movimentacoes=modulo.extrair_movimentacoes(_fragmento(soup, "tabelaUltimasMovimentacoes")),
+    )
+    return esperado
+
+
+def comparar_com_esperado(caminho_html, parser):
+    """Extrai a página com o `parser` e lista as diferenças para a saída esperada"""
+    caminho_html = Path(caminho_html)
+    esperado = json.loads(caminho_html.with_suffix(SUFIXO_ESPERADO).read_text(encoding="utf-8"))
+    html = caminho_html.read_text(encoding="utf-8")
+    inicio = time.perf_counter()
+    dados = robo.extrair_dados_html(html, parser=parser)
+    tempo = time.perf_counter() - inicio
+
+    print(f"{caminho_html.name}: {parser} {tempo * 1000:.1f} ms")
+    diferencas = []
+    for campo, valor_esperado in esperado.items():
+        # Página de "não encontrado" não extrai partes nem movimentações: contam como vazias
+        valor = dados.get(campo, type(valor_esperado)())
+        if isinstance(valor, tuple):
+            valor = list(valor)
+        if valor != valor_esperado:
+            diferencas.append(f"{caminho_html.name} [{parser}] [{campo}]: esperado={valor_esperado!r} obtido={valor!r}")
+    return diferencas
+
+
+# Teste
+if __name__ == "__main__":
+    fixtures = sorted(caminho for caminho in PASTA_FIXTURES.glob("*.html") if caminho.name != "consulta.html")
+    if len(sys.argv) > 1 and sys.argv[1] == "capturar":
+        # python teste_parsers.py capturar <módulo de referência>
+        # ex.: git show <commit>:robo.py > robo_referencia.py && python teste_parsers.py capturar robo_referencia
+        modulo = importlib.import_module(sys.argv[2] if len(sys.argv) > 2 else "robo")
+        for caminho in fixtures:
+            caminho.with_suffix(SUFIXO_ESPERADO).write_text(
+                json.dumps(capturar_esperado(caminho, modulo), ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+            print(f"[OK] {caminho.with_suffix(SUFIXO_ESPERADO).name} capturado de {modulo.__name__}")
+    else:
+        parsers = ["bs4"] + (["lxml"] if parser_esaj.lxml_disponivel() else [])
+        diferencas = []
+        for caminho in fixtures:
+            for parser in parsers:
+                diferencas.extend(comparar_com_esperado(caminho, parser))
+        if diferencas:
+            print("\n[ERRO] " + "\n[ERRO] ".join(diferencas))
+            sys.exit(1)
+        print(f"\n[OK] {' e '.join(parsers)} reproduziram a saída esperada em {len(fixtures)} páginas")
@@ -1,9 +1,9 @@
 import os
 import re
-import pdfplumber
 import pytesseract
-from pdf2image import convert_from_path
 import unicodedata
+from documento_pdf import DocumentoPDF
+from indice_pdfs import IndicePDFs
 
 # >>> Ajuste aqui para o caminho da pasta bin do Poppler <<<
 POPPLER_PATH = r"C:\Users\rafae\Downloads\Release-25.11.0-0\poppler-25.11.0\Library\bin"
@@ -12,6 +12,8 @@ pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR"
 # Regex para CPF (aceita diferentes formatos - mais flexível)
 padrao_cpf = re.compile(r'(\d{3}[\.\s\/-]?\d{3}[\.\s\/-]?\d{3}[\.\s\/-]?\d{2})')
 padrao_campo_cpf = re.compile(r'c\.?\s*p\.?\s*f\.?', re.IGNORECASE)
+ORDEM_BUSCA_ANEXO = "inicio"  # ou "fim"
+ARQUIVO_INDICE_PDFS = "indice_pdfs.sqlite3"  # o mesmo índice do roboCPF (None = lê sempre o PDF)
 
 def normalizar_nome(nome):
     """Normaliza o nome para comparação"""
@@ -36,57 +38,56 @@ def testar_pdf(numero_processo, pasta_pdfs, nome_requerente=None):
     print(f"Caminho: {caminho_pdf}")
     print(f"=" * 80)
     
+    # O PDF é aberto uma vez só e cada página é extraída no máximo uma vez
+    indice = IndicePDFs(ARQUIVO_INDICE_PDFS) if ARQUIVO_INDICE_PDFS else None
+    try:
+        with DocumentoPDF(caminho_pdf, POPPLER_PATH, indice=indice) as documento:
+            return _testar_documento(documento, nome_requerente)
+    finally:
+        if indice is not None:
+            indice.fechar()
+
+def _testar_documento(documento, nome_requerente=None):
     # 1. Procurar página do Anexo II
     print("\n[1] Procurando página 'Anexo II'...")
-    pagina_anexo = None
-    texto_pagina = ""
-    
-    with pdfplumber.open(caminho_pdf) as pdf:
-        print(f"    Total de páginas: {len(pdf.pages)}")
-        for i, pagina in enumerate(pdf.pages):
-            texto = pagina.extract_text()
-            if texto:
-                # Verificar variações de "Anexo II"
-                if "Anexo II" in texto or "ANEXO II" in texto or "anexo ii" in texto or "ANEXO 2" in texto or "Anexo 2" in texto:
-                    pagina_anexo = i
-                    texto_pagina = texto
-                    print(f"    [OK] Pagina Anexo II encontrada na pagina {i+1}")
-                    break
-                # Mostrar primeiras palavras de cada página para debug
-                if i < 3:
-                    palavras_inicio = texto[:100].replace('\n', ' ')
-                    print(f"    Página {i+1} (início): {palavras_inicio}...")
+    print(f"    Total de páginas: {documento.total_paginas}")
+    pagina_anexo = documento.pagina_anexo(ORDEM_BUSCA_ANEXO)
+    # Mostrar primeiras palavras das primeiras páginas para debug
+    for i in range(min(3, documento.total_paginas if pagina_anexo is None else pagina_anexo)):
+        texto = documento.texto(i)
+        if texto:
+            palavras_inicio = texto[:100].replace('\n', ' ')
+            print(f"    Página {i+1} (início): {palavras_inicio}...")
     
     if pagina_anexo is None:
         print("    [ERRO] Pagina 'Anexo II' NAO encontrada!")
         print("\n[DEBUG] Tentando buscar em todas as páginas...")
-        with pdfplumber.open(caminho_pdf) as pdf:
-            for i, pagina in enumerate(pdf.pages):
-                texto = pagina.extract_text()
-                if texto:
-                    # Procurar por palavras-chave relacionadas
-                    texto_lower = texto.lower()
-                    if "anexo" in texto_lower or "requerente" in texto_lower:
-                        print(f"\n    Página {i+1} contém 'anexo' ou 'requerente'")
-                        print(f"    Primeiras 200 caracteres: {texto[:200]}")
+        for i in range(documento.total_paginas):
+            texto = documento.texto(i)
+            if texto:
+                # Procurar por palavras-chave relacionadas
+                texto_lower = texto.lower()
+                if "anexo" in texto_lower or "requerente" in texto_lower:
+                    print(f"\n    Página {i+1} contém 'anexo' ou 'requerente'")
+                    print(f"    Primeiras 200 caracteres: {texto[:200]}")
         return None
+    print(f"    [OK] Pagina Anexo II encontrada na pagina {pagina_anexo+1}")
+    texto_pagina = documento.texto(pagina_anexo)
     
     # 2. Extrair tabelas também
     print("\n[2] Extraindo texto e tabelas da página do Anexo II...")
-    with pdfplumber.open(caminho_pdf) as pdf:
-        pagina = pdf.pages[pagina_anexo]
-        tabelas = pagina.extract_tables()
-        if tabelas:
-            print(f"    [OK] {len(tabelas)} tabela(s) encontrada(s)")
-            for idx, tabela in enumerate(tabelas):
-                print(f"\n    Tabela {idx+1}:")
-                for linha in tabela[:5]:  # Mostrar primeiras 5 linhas
-                    if linha:
-                        linha_texto = " | ".join([str(cell) if cell else "" for cell in linha])
-                        print(f"      {linha_texto}")
-                        texto_pagina += "\n" + linha_texto
-        else:
-            print("    Nenhuma tabela encontrada")
+    tabelas = documento.tabelas(pagina_anexo)
+    if tabelas:
+        print(f"    [OK] {len(tabelas)} tabela(s) encontrada(s)")
+        for idx, tabela in enumerate(tabelas):
+            print(f"\n    Tabela {idx+1}:")
+            for linha in tabela[:5]:  # Mostrar primeiras 5 linhas
+                if linha:
+                    linha_texto = " | ".join([str(cell) if cell else "" for cell in linha])
+                    print(f"      {linha_texto}")
+                    texto_pagina += "\n" + linha_texto
+    else:
+        print("    Nenhuma tabela encontrada")
     
     # 3. Mostrar texto extraído
     print(f"\n[3] Texto extraído da página do Anexo II ({len(texto_pagina)} caracteres):")
@@ -123,14 +124,7 @@ def testar_pdf(numero_processo, pasta_pdfs, nome_requerente=None):
     if not cpfs_encontrados:
         print("\n[6] Nenhum CPF encontrado no texto. Tentando OCR...")
         try:
-            paginas = convert_from_path(
-                caminho_pdf,
-                first_page=pagina_anexo+1,
-                last_page=pagina_anexo+1,
-                poppler_path=POPPLER_PATH,
-                dpi=300
-            )
-            texto_ocr = pytesseract.image_to_string(paginas[0], lang="por")
+            texto_ocr = documento.ocr(pagina_anexo)
             print(f"    Texto OCR extraído ({len(texto_ocr)} caracteres):")
             print("-" * 80)
             print(texto_ocr[:1000])